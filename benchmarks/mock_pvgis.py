@@ -0,0 +1,64 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ================== سرور جایگزین PVGIS ==================
+# پاسخی با ساختار PVcalc که با peakpower خطی است؛ برای بنچمارک و تست بدون اینترنت.
+# errors صف کدهای وضعیت خطاست: هر درخواست تا خالی شدن صف با کد بعدی آن پاسخ می‌گیرد.
+
+MONTHLY_PER_KWP = [98, 112, 146, 160, 178, 190, 196, 192, 172, 140, 106, 94]
+
+
+def pvcalc_response(peakpower):
+    monthly = [{'month': i + 1, 'E_m': e * peakpower, 'SD_m': e * peakpower * 0.06}
+               for i, e in enumerate(MONTHLY_PER_KWP)]
+    total = sum(MONTHLY_PER_KWP) * peakpower
+    return {'outputs': {'monthly': {'fixed': monthly},
+                        'totals': {'fixed': {'E_y': total, 'SD_y': total * 0.03}}}}
+
+
+class MockPVGISServer:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.errors = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    status = server.errors.pop(0) if server.errors else None
+                if server.latency:
+                    time.sleep(server.latency)
+                if status is not None:
+                    self.send_error(status)
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                body = json.dumps(pvcalc_response(float(query.get('peakpower', ['1'])[0]))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}/api/v5_2/PVcalc"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,348 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from .mock_pvgis import MockPVGISServer
+
+# ================== بنچمارک مسیرهای داغ ==================
+# python -m benchmarks.run -o bench.json
+# خروجی JSON: زمان هر فراخوانی (میکروثانیه) برای مقایسه بین نسخه‌ها.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(fn, repeat=5, number=None):
+    timer = timeit.Timer(fn)
+    if number is None:
+        number, _ = timer.autorange()
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {'number': number, 'repeat': repeat, 'min_us': min(runs),
+            'median_us': statistics.median(runs), 'mean_us': statistics.fmean(runs)}
+
+
+def bench_income():
+    import numpy as np
+
+    from solar import Production, evaluate_metrics, project_cashflow
+    from solar.cashflow import build_scenarios, compute_cashflow
+    from solar.finance import financial_metrics
+    from solar.months import MONTHS_ORDER
+    from solar.pipeline import _compiled
+    from solar.schedules import load_schedule, tariff_for
+
+    tariff = tariff_for(5)
+    monthly = dict(zip(MONTHS_ORDER, [700.0, 760, 800, 820, 830, 760, 690, 600, 480, 430, 450, 560]))
+    production = Production(sum(monthly.values()), monthly, "bench")
+    scenarios = build_scenarios(production.as_array() / 5, np.linspace(1, 50, 1000), np.tile([0, 0.1, 0.2, 0.0], 250))
+    batch = compute_cashflow(scenarios, tariff.rate_vector())
+    return {
+        'income_20y': measure(lambda: project_cashflow(production, tariff)),
+        'income_20y_with_metrics': measure(
+            lambda: evaluate_metrics(project_cashflow(production, tariff), 250_000_000)),
+        'income_20y_batch_1000': measure(lambda: compute_cashflow(scenarios, tariff.rate_vector())),
+        'financial_metrics_batch_1000': measure(lambda: financial_metrics(
+            batch['yearly_income'], batch['yearly_production'], np.linspace(5e7, 2e9, 1000))),
+        'tariff_compile_uncached': measure(lambda: _compiled.__wrapped__(tariff)),
+        'tariff_rate_vector_cached': measure(tariff.rate_vector),
+        'tariff_for_schedule': measure(lambda: tariff_for(4.6, load_schedule().key)),
+    }
+
+
+def bench_core():
+    from solar import INVERTERS, calculate_roi, get_suitable_inverter
+    from solar.sizing import DC_AC_RATIO_RANGE, _cheapest_combination
+
+    incomes = [40e6 * 1.3 ** i for i in range(20)]
+    capacities = [1.5, 4.6, 9.9, 14.2, 19.0, 45.0]
+    return {
+        'calculate_roi': measure(lambda: calculate_roi(incomes, 250_000_000)),
+        'calculate_roi_no_payback': measure(lambda: calculate_roi(incomes, 1e18)),
+        'get_suitable_inverter_x6': measure(
+            lambda: [get_suitable_inverter(c, "Huawei") for c in capacities]),
+        'size_inverters_uncached_45kw': measure(
+            lambda: _cheapest_combination.__wrapped__(45.0, tuple(INVERTERS), *DC_AC_RATIO_RANGE)),
+    }
+
+
+def bench_optimizer():
+    from solar import Site
+    from solar.optimizer import AZIMUTHS, TILTS, _orientation_poa, optimize, orientation_yields
+    from solar.production import REFERENCE_PANEL
+
+    site = Site(35.69, 51.39)
+    return {
+        f'orientation_poa_{len(TILTS)}x{len(AZIMUTHS)}': measure(
+            lambda: _orientation_poa.__wrapped__(site.lat, site.lon, TILTS, AZIMUTHS, None), repeat=3, number=1),
+        f'orientation_yields_{len(TILTS)}x{len(AZIMUTHS)}_panel_model': measure(
+            lambda: orientation_yields.__wrapped__(site.lat, site.lon, panel=REFERENCE_PANEL), repeat=3),
+        'optimize_30m2_by_profit': measure(lambda: optimize(site, 30), repeat=3),
+        'optimize_30m2_by_irr': measure(lambda: optimize(site, 30, rank_by='irr'), repeat=3),
+    }
+
+
+def bench_stages():
+    from solar import ALL_PANELS
+    from solar.stages import graph
+
+    params = dict(lat=35.69, lon=51.39, tilt=35, azimuth=0.0, shading_loss=0.0, horizon=None, use_pvgis=False,
+                  roof_area=30, panel_name=next(iter(ALL_PANELS)), panel_power=None, panel_count=None,
+                  inverter_brand="Growatt", cost_per_watt=35_000, schedule=None, discount_rate=0.35)
+    graph.resolve("metrics", **params)
+    costs = iter(range(10**9))
+
+    def cost_changed():
+        # فقط design و metrics دوباره حساب می‌شوند
+        return graph.resolve("metrics", **{**params, 'cost_per_watt': 35_000 + next(costs)})
+
+    def uncached():
+        graph.clear()
+        return graph.resolve("metrics", **params)
+
+    return {
+        'stages_rerun_cached': measure(lambda: graph.resolve("metrics", **params)),
+        'stages_rerun_cost_changed': measure(cost_changed),
+        'stages_rerun_uncached': measure(uncached, repeat=3),
+    }
+
+
+def bench_compare():
+    from solar import ALL_PANELS
+    from solar.compare import compare_sites
+    from solar.stages import graph
+
+    params = dict(tilt=35, azimuth=0.0, shading_loss=0.0, horizon=None, use_pvgis=False,
+                  roof_area=30, panel_name=next(iter(ALL_PANELS)), panel_power=None, panel_count=None,
+                  inverter_brand="Growatt", cost_per_watt=35_000, schedule=None, discount_rate=0.35)
+    points = [(None, 35.69, 51.39), (None, 32.65, 51.67), (None, 29.59, 52.58), (None, 31.90, 54.37)]
+
+    def uncached():
+        graph.clear()
+        return list(compare_sites(points, params))
+
+    return {
+        'compare_4_sites_uncached': measure(uncached, repeat=3),
+        'compare_4_sites_cached': measure(lambda: list(compare_sites(points, params))),
+    }
+
+
+def bench_shading():
+    from solar.production import simulate_hourly, site_weather
+    from solar.shading import beam_blocked, parse_horizon
+
+    horizon = parse_horizon("90,8; 135,5; 180,3; 225,6; 270,10", "200,30,6,12")
+    weather = site_weather(35.69, 51.39)
+    return {
+        'horizon_beam_mask_8760': measure(lambda: beam_blocked(weather, horizon)),
+        'simulate_hourly_with_horizon': measure(lambda: simulate_hourly(35.69, 51.39, 35, 180, horizon=horizon),
+                                                repeat=3),
+    }
+
+
+def bench_geo():
+    from solar.geo import load_gazetteer, nearest_place, place_label
+
+    load_gazetteer()
+    return {
+        'nearest_place': measure(lambda: nearest_place(32.9, 51.5)),
+        'place_label_outside': measure(lambda: place_label(30.0, 58.0)),
+    }
+
+
+def bench_self_consumption():
+    import numpy as np
+
+    from solar.schedules import tariff_for
+    from solar.selfconsumption import Battery, archetype_profile, simulate_self_consumption
+
+    hour = np.arange(8760) % 24
+    production = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None) * 3.0
+    load = archetype_profile("household")
+    tariff = tariff_for(3)
+    return {
+        'self_consumption_20y': measure(lambda: simulate_self_consumption(production, load, tariff)),
+        'self_consumption_20y_battery': measure(
+            lambda: simulate_self_consumption(production, load, tariff, Battery(10, 5)), repeat=3),
+    }
+
+
+def bench_layout():
+    from solar.catalog import ALL_PANELS
+    from solar.layout import layout_panels
+
+    panel = ALL_PANELS["Jinko Solar (Tiger Pro, Eagle)"]
+    polygon = [(0, 0), (14, 0), (18, 10), (4, 12), (0, 6)]
+    return {
+        'layout_rectangle_20x15': measure(lambda: layout_panels(panel, 35, 35.69, 20, 15)),
+        'layout_polygon_5_vertices': measure(lambda: layout_panels(panel, 35, 35.69, polygon=polygon)),
+    }
+
+
+def bench_formatting(rows=10_000):
+    import random
+
+    from solar.formatting import format_currency, persian_numbers, to_persian_number
+
+    rng = random.Random(0)
+    ints = [rng.randrange(0, 10 ** 12) for _ in range(rows)]
+    floats = [rng.uniform(0, 1e4) for _ in range(rows)]
+    return {
+        f'to_persian_number_int_x{rows}': measure(lambda: [to_persian_number(v) for v in ints], repeat=3),
+        f'to_persian_number_float_x{rows}': measure(lambda: [to_persian_number(v) for v in floats], repeat=3),
+        f'format_currency_x{rows}': measure(lambda: [format_currency(v) for v in ints], repeat=3),
+        f'persian_numbers_int_x{rows}': measure(lambda: persian_numbers(ints), repeat=3),
+    }
+
+
+def bench_tmy(cache_dir):
+    import numpy as np
+
+    from solar.tmy import WeatherStore, read_pvgis_csv
+
+    hour = np.arange(8760) % 24
+    ghi = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None) * 800
+    lines = ["Latitude (decimal degrees):\t35.69", "Longitude (decimal degrees):\t51.39",
+             "time(UTC),T2m,RH,G(h),Gb(n),Gd(h),IR(h),WS10m,WD10m,SP"]
+    lines += [f"20230101:{i % 24:02d}00,20.0,30,{g:.1f},{g:.1f},{g / 5:.1f},300,2.0,0,88000"
+              for i, g in enumerate(ghi)]
+    store = WeatherStore(os.path.join(cache_dir, "weather"))
+    key = store.put(read_pvgis_csv(lines))
+    return {
+        'tmy_parse_pvgis_csv': measure(lambda: read_pvgis_csv(lines), repeat=3),
+        'tmy_store_load_columns': measure(lambda: store.columns(key)),
+    }
+
+
+def bench_scenarios(cache_dir):
+    from dataclasses import replace
+
+    from solar import ALL_PANELS
+    from solar.report import format_columns, monthly_detail, write_report_pdf, write_report_xlsx
+    from solar.scenarios import Scenario, ScenarioStore, scenario_inputs, scenario_key
+    from solar.stages import graph
+
+    params = dict(lat=35.69, lon=51.39, tilt=35, azimuth=0.0, shading_loss=0.0, horizon=None, use_pvgis=False,
+                  roof_area=30, panel_name=next(iter(ALL_PANELS)), panel_power=None, panel_count=None,
+                  inverter_brand="Growatt", cost_per_watt=35_000, schedule=None, discount_rate=0.35)
+    stages = graph.resolve("design", "production", "income", "metrics", **params)
+    inputs = scenario_inputs(params)
+    scenario = Scenario(scenario_key(inputs), inputs, "تهران", stages['design'], stages['production'],
+                        stages['income'], stages['metrics'])
+    store = ScenarioStore(os.path.join(cache_dir, "scenarios.sqlite3"))
+    store.put(scenario)
+    keys = iter(range(10 ** 9))
+    return {
+        'scenario_key': measure(lambda: scenario_key(scenario_inputs(params))),
+        'scenario_store_put': measure(lambda: store.put(replace(scenario, key=str(next(keys)))), repeat=3),
+        'scenario_store_get': measure(lambda: store.get(scenario.key)),
+        'report_monthly_table': measure(lambda: format_columns(monthly_detail(scenario))),
+        'report_xlsx': measure(lambda: write_report_xlsx(scenario, io.BytesIO()), repeat=3),
+        'report_pdf': measure(lambda: write_report_pdf(scenario, io.BytesIO()), repeat=3),
+    }
+
+
+def bench_pvgis(server, cache_dir):
+    from solar.pvgis_cache import PVGISCache
+    from solar.pvgis_client import PVGISClient
+    from solar.sources import get_pvgis_data
+
+    client = PVGISClient(base_url=server.url)
+    warm = PVGISCache(os.path.join(cache_dir, "warm.sqlite3"))
+    get_pvgis_data(35.69, 51.39, 5.0, 35, cache=warm, client=client)
+
+    cold_paths = iter(range(10 ** 9))
+
+    def uncached():
+        cache = PVGISCache(os.path.join(cache_dir, f"cold-{next(cold_paths)}.sqlite3"))
+        return get_pvgis_data(35.69, 51.39, 5.0, 35, cache=cache, client=client)
+
+    return {
+        'get_pvgis_data_uncached': measure(uncached, repeat=3, number=20),
+        'get_pvgis_data_cached': measure(lambda: get_pvgis_data(35.69, 51.39, 5.0, 35, cache=warm, client=client)),
+        'get_pvgis_data_neighbour': measure(lambda: get_pvgis_data(35.71, 51.39, 5.0, 35, cache=warm, client=client)),
+    }
+
+
+def bench_app(runs=5):
+    from streamlit.testing.v1 import AppTest
+
+    script = os.path.join(ROOT, "main.py")
+    start = time.perf_counter()
+    app = AppTest.from_file(script, default_timeout=120).run()
+    cold = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    def rerun():
+        app.run()
+
+    def calculate():
+        app.button(key="calculate").click().run()
+
+    calculate()  # گرم کردن کش‌ها
+    return {
+        'app_cold_run': {'seconds': cold},
+        'app_rerun': measure(rerun, repeat=runs, number=1),
+        'app_rerun_with_calculation': measure(calculate, repeat=runs, number=1),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("-o", "--output", default="-", help="فایل JSON خروجی (پیش‌فرض stdout)")
+    parser.add_argument("--skip-app", action="store_true", help="بدون اجرای کامل اسکریپت با AppTest")
+    args = parser.parse_args(argv)
+
+    with MockPVGISServer() as server, tempfile.TemporaryDirectory() as cache_dir:
+        # قبل از import ماژول‌های solar تا کلاینت، کش‌ها، انبار سناریو و خروجی‌های برنامه هم محلی باشند
+        os.environ["PVGIS_URL"] = server.url
+        os.environ["SOLAR_PVGIS_CACHE"] = os.path.join(cache_dir, "app.sqlite3")
+        os.environ["SOLAR_SCENARIO_STORE"] = os.path.join(cache_dir, "app-scenarios.sqlite3")
+        os.environ["SOLAR_EXPORT_DIR"] = os.path.join(cache_dir, "exports")
+        sys.path.insert(0, ROOT)
+
+        results = {}
+        for group in (bench_income, bench_core, bench_optimizer, bench_layout, bench_stages, bench_compare,
+                      bench_shading, bench_geo, bench_self_consumption, bench_formatting):
+            results.update(group())
+        results.update(bench_tmy(cache_dir))
+        results.update(bench_scenarios(cache_dir))
+        results.update(bench_pvgis(server, cache_dir))
+        if not args.skip_app:
+            results.update(bench_app())
+
+    import numpy as np
+
+    report = {
+        'revision': _git_revision(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,305 +1,305 @@
+import time
+from dataclasses import replace
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import math
-import base64
-import requests
 from streamlit_folium import st_folium
 import folium
 
+from solar import (
+    ALL_PANELS, FOREIGN_PANELS, INVERTERS, IRANIAN_PANELS,
+    Site, evaluate_metrics,
+)
+from solar.assets import asset_urls
+from solar.compare import MAX_SITES, compare_sites, parse_points
+from solar.formatting import format_currency, persian_numbers, to_persian_number
+from solar.geo import place_label
+from solar.layout import SETBACK, layout_panels, layout_svg, parse_polygon
+from solar.montecarlo import simulate
+from solar.optimizer import TILT_MAX, TILT_MIN, optimize
+from solar.months import MONTHS_ORDER
+from solar.perf import recorder, span
+from solar.production import panel_model
+from solar.report import MIME_TYPES, export_report, format_columns, monthly_detail
+from solar.scenarios import Scenario, default_store, inputs_horizon, scenario_inputs, scenario_key
+from solar.schedules import available_schedules, load_schedule, tariff_for
+from solar.shading import Horizon, load_horizon_csv, parse_horizon
+from solar.selfconsumption import (
+    ARCHETYPES, DEFAULT_CONSUMPTION, Battery, archetype_profile, hourly_production, load_profile_csv,
+    simulate_self_consumption, to_cashflow,
+)
+from solar.tariff import COST_PER_WATT, RETAIL_PRICE
+from solar.sources import default_cache
+from solar.stages import graph
+
 # --- تنظیمات اولیه ---
 st.set_page_config(page_title="محاسبه‌گر خورشیدی", page_icon="☀️", layout="wide")
 
-# ================== تابع تبدیل اعداد به فارسی ==================
-def to_persian_number(number):
-    persian_digits = '۰۱۲۳۴۵۶۷۸۹'
-    english_digits = '0123456789'
-    trans_table = str.maketrans(english_digits, persian_digits)
-    
-    if isinstance(number, (int, float)):
-        number = f"{number:,.0f}" if isinstance(number, int) or number == int(number) else f"{number:,.2f}"
-    
-    return str(number).translate(trans_table)
-
-def format_currency(amount):
-    if abs(amount) >= 1_000_000_000:
-        return f"{to_persian_number(round(amount/1_000_000_000, 2))} میلیارد"
-    else:
-        return f"{to_persian_number(int(amount/1_000_000))} میلیون"
+# زمان‌سنجی مراحل: با SOLAR_PROFILE=1 یا ?debug=1 در آدرس فعال می‌شود
+recorder.start_run(recorder.default_enabled or st.query_params.get("debug") == "1")
 
 # ================== بارگذاری تصاویر ==================
-def get_base64_image(image_path):
-    try:
-        with open(image_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
-    except:
-        return ""
-
-logo_b64 = get_base64_image("logo.png")
-bg1_b64 = get_base64_image("bg1.jpg")
-bg2_b64 = get_base64_image("bg2.jpg")
-bg3_b64 = get_base64_image("bg3.jpg")
+# نسخه‌های فشرده بار اول در static/ ساخته می‌شوند (یا از پیش با `python -m solar.assets`)
+@st.cache_resource
+def get_asset_urls():
+    return asset_urls()
 
 # ================== تابع بارگذاری فونت ==================
-def load_font(font_path):
-    try:
-        with open(font_path, "rb") as f:
-            data = f.read()
-        b64_font = base64.b64encode(data).decode()
-        
-        st.markdown(f"""
-            <style>
-                @font-face {{
-                    font-family: 'IRANYekanX';
-                    src: url(data:font/ttf;base64,{b64_font}) format('truetype');
-                }}
-                
-                html, body, [class*="css"], .stMarkdown, .stMetric, h1, h2, h3, h4, h5, p, span, div, label {{
-                    font-family: 'IRANYekanX', sans-serif !important;
-                    direction: rtl;
-                    text-align: center;
-                }}
-                
-                .main .block-container {{
-                    padding: 0 !important;
-                    max-width: 100% !important;
-                }}
-                
-                [data-testid="stMetricValue"] {{
-                    font-size: clamp(1rem, 3vw, 1.5rem) !important;
-                    font-weight: bold;
-                    color: #00C853 !important;
-                    text-align: center !important;
-                }}
-                
-                [data-testid="stMetricLabel"] {{
-                    text-align: center !important;
-                }}
-                
-                .streamlit-expanderHeader {{
-                    direction: rtl !important;
-                    display: flex !important;
-                    flex-direction: row-reverse !important;
-                    justify-content: center !important;
-                }}
-                
-                [data-testid="stExpander"] > details > summary {{
-                    flex-direction: row-reverse !important;
-                }}
-                
-                .profit-box {{
-                    background: linear-gradient(135deg, #00C853 0%, #00E676 100%);
-                    padding: clamp(1rem, 3vw, 1.5rem);
-                    border-radius: 15px;
-                    color: white;
-                    text-align: center;
-                    margin: 1rem auto;
-                    max-width: 600px;
-                }}
-                
-                .highlight-box {{
-                    background: linear-gradient(135deg, #FF6B35 0%, #FF8C42 100%);
-                    padding: clamp(0.8rem, 2vw, 1.2rem);
-                    border-radius: 12px;
-                    color: white;
-                    text-align: center;
-                }}
-                
-                .info-box {{
-                    background: linear-gradient(135deg, #2196F3 0%, #42A5F5 100%);
-                    padding: clamp(0.8rem, 2vw, 1rem);
-                    border-radius: 10px;
-                    color: white;
-                    text-align: center;
-                    margin: 0.5rem auto;
-                    max-width: 500px;
-                }}
-                
-                .warning-box {{
-                    background: linear-gradient(135deg, #FF9800 0%, #FFB74D 100%);
-                    padding: 1rem;
-                    border-radius: 10px;
-                    color: white;
-                    text-align: center;
-                    margin: 0.5rem 0;
-                }}
-                
-                .winner-box {{
-                    padding: 1rem;
-                    border-radius: 10px;
-                    text-align: center;
-                    margin-top: 1rem;
-                }}
-                
-                .stButton > button {{
-                    background: linear-gradient(135deg, #FF4B4B 0%, #FF6B6B 100%);
-                    color: white;
-                    font-size: clamp(1rem, 2.5vw, 1.3rem);
-                    padding: clamp(0.8rem, 2vw, 1rem) clamp(1rem, 3vw, 2rem);
-                    border-radius: 12px;
-                    border: none;
-                    width: 100%;
-                    max-width: 400px;
-                    margin: 0 auto;
-                    display: block;
-                }}
-                
-                /* هیرو سکشن */
-                .hero-section {{
-                    position: relative;
-                    min-height: 100vh;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    text-align: center;
-                    overflow: hidden;
-                    margin: -1rem -1rem 2rem -1rem;
-                }}
-                
-                .hero-bg {{
-                    position: absolute;
-                    top: 0;
-                    left: 0;
-                    width: 100%;
-                    height: 100%;
-                    background-size: cover;
-                    background-position: center;
-                    animation: slideshow 15s infinite;
-                    z-index: 0;
-                }}
-                
-                .hero-bg::before {{
-                    content: '';
-                    position: absolute;
-                    top: 0;
-                    left: 0;
-                    width: 100%;
-                    height: 100%;
-                    background: linear-gradient(135deg, rgba(0,0,0,0.7) 0%, rgba(0,0,0,0.4) 100%);
-                    z-index: 1;
-                }}
-                
-                @keyframes slideshow {{
-                    0%, 30% {{ background-image: url('data:image/jpeg;base64,{bg1_b64}'); }}
-                    33%, 63% {{ background-image: url('data:image/jpeg;base64,{bg2_b64}'); }}
-                    66%, 100% {{ background-image: url('data:image/jpeg;base64,{bg3_b64}'); }}
-                }}
-                
-                .hero-content {{
-                    position: relative;
-                    z-index: 2;
-                    color: white;
-                    padding: clamp(1rem, 4vw, 2rem);
-                    max-width: 900px;
-                    width: 100%;
-                    display: flex;
-                    flex-direction: column;
-                    align-items: center;
-                    justify-content: center;
-                }}
-                
-                .logo-img {{
-                    width: clamp(80px, 15vw, 120px);
-                    height: clamp(80px, 15vw, 120px);
-                    border-radius: 50%;
-                    box-shadow: 0 10px 40px rgba(255,255,0,0.3);
-                    margin-bottom: clamp(1rem, 3vw, 1.5rem);
-                }}
-                
-                .hero-title {{
-                    font-size: clamp(1.5rem, 5vw, 3rem);
-                    font-weight: bold;
-                    margin-bottom: 0.5rem;
-                    text-shadow: 2px 2px 10px rgba(0,0,0,0.5);
-                    text-align: center;
-                    width: 100%;
-                }}
-                
-                .hero-subtitle {{
-                    font-size: clamp(0.9rem, 2.5vw, 1.3rem);
-                    margin-bottom: clamp(1.5rem, 4vw, 2rem);
-                    opacity: 0.9;
-                    text-align: center;
-                    width: 100%;
-                }}
-                
+def load_font(font_url, font_format):
+    st.markdown(f"""
+        <style>
+            @font-face {{
+                font-family: 'IRANYekanX';
+                src: url('{font_url}') format('{font_format}');
+            }}
+            
+            html, body, [class*="css"], .stMarkdown, .stMetric, h1, h2, h3, h4, h5, p, span, div, label {{
+                font-family: 'IRANYekanX', sans-serif !important;
+                direction: rtl;
+                text-align: center;
+            }}
+            
+            .main .block-container {{
+                padding: 0 !important;
+                max-width: 100% !important;
+            }}
+            
+            [data-testid="stMetricValue"] {{
+                font-size: clamp(1rem, 3vw, 1.5rem) !important;
+                font-weight: bold;
+                color: #00C853 !important;
+                text-align: center !important;
+            }}
+            
+            [data-testid="stMetricLabel"] {{
+                text-align: center !important;
+            }}
+            
+            .streamlit-expanderHeader {{
+                direction: rtl !important;
+                display: flex !important;
+                flex-direction: row-reverse !important;
+                justify-content: center !important;
+            }}
+            
+            [data-testid="stExpander"] > details > summary {{
+                flex-direction: row-reverse !important;
+            }}
+            
+            .profit-box {{
+                background: linear-gradient(135deg, #00C853 0%, #00E676 100%);
+                padding: clamp(1rem, 3vw, 1.5rem);
+                border-radius: 15px;
+                color: white;
+                text-align: center;
+                margin: 1rem auto;
+                max-width: 600px;
+            }}
+            
+            .highlight-box {{
+                background: linear-gradient(135deg, #FF6B35 0%, #FF8C42 100%);
+                padding: clamp(0.8rem, 2vw, 1.2rem);
+                border-radius: 12px;
+                color: white;
+                text-align: center;
+            }}
+            
+            .info-box {{
+                background: linear-gradient(135deg, #2196F3 0%, #42A5F5 100%);
+                padding: clamp(0.8rem, 2vw, 1rem);
+                border-radius: 10px;
+                color: white;
+                text-align: center;
+                margin: 0.5rem auto;
+                max-width: 500px;
+            }}
+            
+            .warning-box {{
+                background: linear-gradient(135deg, #FF9800 0%, #FFB74D 100%);
+                padding: 1rem;
+                border-radius: 10px;
+                color: white;
+                text-align: center;
+                margin: 0.5rem 0;
+            }}
+            
+            .winner-box {{
+                padding: 1rem;
+                border-radius: 10px;
+                text-align: center;
+                margin-top: 1rem;
+            }}
+            
+            .stButton > button {{
+                background: linear-gradient(135deg, #FF4B4B 0%, #FF6B6B 100%);
+                color: white;
+                font-size: clamp(1rem, 2.5vw, 1.3rem);
+                padding: clamp(0.8rem, 2vw, 1rem) clamp(1rem, 3vw, 2rem);
+                border-radius: 12px;
+                border: none;
+                width: 100%;
+                max-width: 400px;
+                margin: 0 auto;
+                display: block;
+            }}
+            
+            /* هیرو سکشن */
+            .hero-section {{
+                position: relative;
+                min-height: 100vh;
+                display: flex;
+                align-items: center;
+                justify-content: center;
+                text-align: center;
+                overflow: hidden;
+                margin: -1rem -1rem 2rem -1rem;
+            }}
+            
+            .hero-bg {{
+                position: absolute;
+                top: 0;
+                left: 0;
+                width: 100%;
+                height: 100%;
+                background-size: cover;
+                background-position: center;
+                animation: slideshow 15s infinite;
+                z-index: 0;
+            }}
+            
+            .hero-bg::before {{
+                content: '';
+                position: absolute;
+                top: 0;
+                left: 0;
+                width: 100%;
+                height: 100%;
+                background: linear-gradient(135deg, rgba(0,0,0,0.7) 0%, rgba(0,0,0,0.4) 100%);
+                z-index: 1;
+            }}
+            
+            @keyframes slideshow {{
+                0%, 30% {{ background-image: url('{assets['bg1']}'); }}
+                33%, 63% {{ background-image: url('{assets['bg2']}'); }}
+                66%, 100% {{ background-image: url('{assets['bg3']}'); }}
+            }}
+            
+            .hero-content {{
+                position: relative;
+                z-index: 2;
+                color: white;
+                padding: clamp(1rem, 4vw, 2rem);
+                max-width: 900px;
+                width: 100%;
+                display: flex;
+                flex-direction: column;
+                align-items: center;
+                justify-content: center;
+            }}
+            
+            .logo-img {{
+                width: clamp(80px, 15vw, 120px);
+                height: clamp(80px, 15vw, 120px);
+                border-radius: 50%;
+                box-shadow: 0 10px 40px rgba(255,255,0,0.3);
+                margin-bottom: clamp(1rem, 3vw, 1.5rem);
+            }}
+            
+            .hero-title {{
+                font-size: clamp(1.5rem, 5vw, 3rem);
+                font-weight: bold;
+                margin-bottom: 0.5rem;
+                text-shadow: 2px 2px 10px rgba(0,0,0,0.5);
+                text-align: center;
+                width: 100%;
+            }}
+            
+            .hero-subtitle {{
+                font-size: clamp(0.9rem, 2.5vw, 1.3rem);
+                margin-bottom: clamp(1.5rem, 4vw, 2rem);
+                opacity: 0.9;
+                text-align: center;
+                width: 100%;
+            }}
+            
+            .hero-stats {{
+                display: flex;
+                justify-content: center;
+                align-items: center;
+                gap: clamp(1rem, 5vw, 3rem);
+                flex-wrap: wrap;
+                width: 100%;
+            }}
+            
+            .stat-item {{
+                text-align: center;
+                min-width: clamp(80px, 20vw, 120px);
+            }}
+            
+            .stat-value {{
+                font-size: clamp(1.3rem, 4vw, 2.5rem);
+                font-weight: bold;
+                color: #FFD700;
+                text-shadow: 2px 2px 10px rgba(0,0,0,0.5);
+            }}
+            
+            .stat-label {{
+                font-size: clamp(0.7rem, 1.8vw, 0.9rem);
+                opacity: 0.8;
+            }}
+            
+            .calc-container {{
+                max-width: 1200px;
+                margin: 0 auto;
+                padding: clamp(1rem, 3vw, 2rem);
+                text-align: center;
+            }}
+            
+            .calc-container h3 {{
+                text-align: center !important;
+            }}
+            
+            #MainMenu {{visibility: hidden;}}
+            footer {{visibility: hidden;}}
+            header {{visibility: hidden;}}
+            
+            /* رسپانسیو برای موبایل */
+            @media (max-width: 768px) {{
                 .hero-stats {{
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    gap: clamp(1rem, 5vw, 3rem);
-                    flex-wrap: wrap;
-                    width: 100%;
+                    gap: 1rem;
                 }}
-                
                 .stat-item {{
-                    text-align: center;
-                    min-width: clamp(80px, 20vw, 120px);
-                }}
-                
-                .stat-value {{
-                    font-size: clamp(1.3rem, 4vw, 2.5rem);
-                    font-weight: bold;
-                    color: #FFD700;
-                    text-shadow: 2px 2px 10px rgba(0,0,0,0.5);
-                }}
-                
-                .stat-label {{
-                    font-size: clamp(0.7rem, 1.8vw, 0.9rem);
-                    opacity: 0.8;
-                }}
-                
-                .calc-container {{
-                    max-width: 1200px;
-                    margin: 0 auto;
-                    padding: clamp(1rem, 3vw, 2rem);
-                    text-align: center;
-                }}
-                
-                .calc-container h3 {{
-                    text-align: center !important;
+                    flex: 0 0 30%;
                 }}
-                
-                #MainMenu {{visibility: hidden;}}
-                footer {{visibility: hidden;}}
-                header {{visibility: hidden;}}
-                
-                /* رسپانسیو برای موبایل */
-                @media (max-width: 768px) {{
-                    .hero-stats {{
-                        gap: 1rem;
-                    }}
-                    .stat-item {{
-                        flex: 0 0 30%;
-                    }}
-                }}
-            </style>
-        """, unsafe_allow_html=True)
-        return True
-    except FileNotFoundError:
-        return False
+            }}
+        </style>
+    """, unsafe_allow_html=True)
 
-load_font("IRANYekanX-Bold.ttf")
+with span("assets"):
+    assets = get_asset_urls()
+    load_font(assets['font'], assets['font_format'])
 
 # ================== هیرو سکشن ==================
+hero_schedule = load_schedule()
 st.markdown(f"""
 <div class="hero-section">
     <div class="hero-bg"></div>
     <div class="hero-content">
-        <img src="data:image/png;base64,{logo_b64}" class="logo-img" alt="لوگو">
+        <img src="{assets['logo']}" class="logo-img" alt="لوگو">
         <h1 class="hero-title">شرکت توزیع نیروی  برق تهران بزرگ</h1>
         <p class="hero-subtitle">نرم افزار محاسبه نیروگاه های خورشیدی</p>
         <div class="hero-stats">
             <div class="stat-item">
-                <div class="stat-value">۲۰</div>
+                <div class="stat-value">{to_persian_number(hero_schedule.contract_years)}</div>
                 <div class="stat-label">سال قرارداد</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">۳,۸۲۰</div>
+                <div class="stat-value">{to_persian_number(hero_schedule.t_base)}</div>
                 <div class="stat-label">تومان/kWh</div>
             </div>
             <div class="stat-item">
-                <div class="stat-value">۳۰٪</div>
+                <div class="stat-value">{to_persian_number(round(hero_schedule.annual_inflation * 100))}٪</div>
                 <div class="stat-label">رشد سالانه</div>
             </div>
         </div>
@@ -307,360 +307,107 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-# ================== ثوابت فرمول ساتبا ==================
-T_BASE = 3820  # نرخ پایه (تومان/kWh)
-
-# ================== پنل‌های خارجی ==================
-FOREIGN_PANELS = {
-    "Jinko Solar (Tiger Pro, Eagle)": {
-        "power_range": (550, 620),
-        "default_power": 580,
-        "length_mm": 2278,
-        "width_mm": 1134,
-        "thickness_mm": 30,
-        "area": 2.58,
-        "efficiency": 22.5,
-        "origin": "خارجی"
-    },
-    "Trina Solar (Vertex S, Vertex N)": {
-        "power_range": (430, 510),
-        "default_power": 470,
-        "length_mm": 1762,
-        "width_mm": 1134,
-        "thickness_mm": 30,
-        "area": 2.00,
-        "efficiency": 21.8,
-        "origin": "خارجی"
-    },
-    "Canadian Solar (HiKu6, TOPHiKu6)": {
-        "power_range": (540, 610),
-        "default_power": 575,
-        "length_mm": 2261,
-        "width_mm": 1134,
-        "thickness_mm": 35,
-        "area": 2.56,
-        "efficiency": 22.3,
-        "origin": "خارجی"
-    },
-    "JA Solar (DeepBlue 4.0)": {
-        "power_range": (430, 500),
-        "default_power": 465,
-        "length_mm": 1762,
-        "width_mm": 1134,
-        "thickness_mm": 30,
-        "area": 2.00,
-        "efficiency": 21.5,
-        "origin": "خارجی"
-    },
-    "LONGi Solar (Hi-MO 6)": {
-        "power_range": (420, 490),
-        "default_power": 455,
-        "length_mm": 1722,
-        "width_mm": 1134,
-        "thickness_mm": 30,
-        "area": 1.95,
-        "efficiency": 22.0,
-        "origin": "خارجی"
-    },
-    "AE Solar (Topcon Series)": {
-        "power_range": (550, 620),
-        "default_power": 580,
-        "length_mm": 2278,
-        "width_mm": 1133,
-        "thickness_mm": 30,
-        "area": 2.58,
-        "efficiency": 22.4,
-        "origin": "خارجی"
-    },
-    "Q Cells (Q.Peak Duo)": {
-        "power_range": (400, 470),
-        "default_power": 435,
-        "length_mm": 1879,
-        "width_mm": 1045,
-        "thickness_mm": 32,
-        "area": 1.96,
-        "efficiency": 21.6,
-        "origin": "خارجی"
-    },
-    "SunPower (Maxeon 6)": {
-        "power_range": (410, 450),
-        "default_power": 430,
-        "length_mm": 1872,
-        "width_mm": 1032,
-        "thickness_mm": 40,
-        "area": 1.93,
-        "efficiency": 22.8,
-        "origin": "خارجی"
-    },
-    "REC Solar (Alpha Pure)": {
-        "power_range": (405, 450),
-        "default_power": 425,
-        "length_mm": 1730,
-        "width_mm": 1118,
-        "thickness_mm": 30,
-        "area": 1.93,
-        "efficiency": 22.2,
-        "origin": "خارجی"
-    },
-    "Znshine Solar (Zebra Series)": {
-        "power_range": (600, 700),
-        "default_power": 650,
-        "length_mm": 2465,
-        "width_mm": 1134,
-        "thickness_mm": 35,
-        "area": 2.79,
-        "efficiency": 23.0,
-        "origin": "خارجی"
-    },
-}
-
-# ================== پنل‌های ایرانی ==================
-IRANIAN_PANELS = {
-    "مانا انرژی پاک (PERC, TOPCon)": {
-        "power_range": (400, 550),
-        "default_power": 475,
-        "length_mm": 1956,
-        "width_mm": 992,
-        "thickness_mm": 35,
-        "area": 1.94,
-        "efficiency": 21.5,
-        "origin": "ایرانی"
-    },
-    "تابان انرژی (Taban Mono)": {
-        "power_range": (380, 500),
-        "default_power": 440,
-        "length_mm": 1956,
-        "width_mm": 992,
-        "thickness_mm": 40,
-        "area": 1.94,
-        "efficiency": 21.0,
-        "origin": "ایرانی"
-    },
-    "سولار صنعت فیروزه": {
-        "power_range": (380, 480),
-        "default_power": 430,
-        "length_mm": 1956,
-        "width_mm": 992,
-        "thickness_mm": 40,
-        "area": 1.94,
-        "efficiency": 20.8,
-        "origin": "ایرانی"
-    },
-    "پایدار سولار (Bifacial)": {
-        "power_range": (540, 620),
-        "default_power": 580,
-        "length_mm": 2278,
-        "width_mm": 1134,
-        "thickness_mm": 30,
-        "area": 2.58,
-        "efficiency": 22.3,
-        "origin": "ایرانی"
-    },
-    "ماناسازان": {
-        "power_range": (380, 480),
-        "default_power": 430,
-        "length_mm": 1956,
-        "width_mm": 992,
-        "thickness_mm": 35,
-        "area": 1.94,
-        "efficiency": 20.8,
-        "origin": "ایرانی"
-    },
-    "انرژی‌های نوین مهرآباد": {
-        "power_range": (380, 480),
-        "default_power": 430,
-        "length_mm": 1956,
-        "width_mm": 992,
-        "thickness_mm": 30,
-        "area": 1.94,
-        "efficiency": 20.8,
-        "origin": "ایرانی"
-    },
-    "برق آفتابی هدایت نور یزد": {
-        "power_range": (380, 480),
-        "default_power": 430,
-        "length_mm": 1956,
-        "width_mm": 992,
-        "thickness_mm": 30,
-        "area": 1.94,
-        "efficiency": 20.5,
-        "origin": "ایرانی"
-    },
-    "الکترونیک سازان سمنان": {
-        "power_range": (380, 480),
-        "default_power": 430,
-        "length_mm": 1956,
-        "width_mm": 992,
-        "thickness_mm": 30,
-        "area": 1.94,
-        "efficiency": 20.5,
-        "origin": "ایرانی"
-    },
-}
-
-# ترکیب همه پنل‌ها
-ALL_PANELS = {**FOREIGN_PANELS, **IRANIAN_PANELS}
-
-# ================== اینورترها ==================
-INVERTERS = {
-    "Growatt": {
-        "models": {3: "MIN 3000TL-X", 5: "MIN 5000TL-X", 6: "MIN 6000TL-X", 8: "MOD 8KTL3-X", 10: "MOD 10KTL3-X", 15: "MOD 15KTL3-X", 20: "MOD 20KTL3-X"},
-        "warranty": 5, "origin": "چین", "price_per_kw": 1_800_000,
-    },
-    "Huawei": {
-        "models": {3: "SUN2000-3KTL", 5: "SUN2000-5KTL", 6: "SUN2000-6KTL", 8: "SUN2000-8KTL", 10: "SUN2000-10KTL", 15: "SUN2000-15KTL", 20: "SUN2000-20KTL"},
-        "warranty": 5, "origin": "چین", "price_per_kw": 2_200_000,
-    },
-    "Sungrow": {
-        "models": {3: "SG3.0RS", 5: "SG5.0RS", 6: "SG6.0RS", 8: "SG8.0RT", 10: "SG10RT", 15: "SG15RT", 20: "SG20RT"},
-        "warranty": 5, "origin": "چین", "price_per_kw": 2_000_000,
-    },
-    "Fronius": {
-        "models": {3: "Primo 3.0", 5: "Primo 5.0", 6: "Primo 6.0", 8: "Symo 8.2", 10: "Symo 10.0", 15: "Symo 15.0", 20: "Symo 20.0"},
-        "warranty": 7, "origin": "اتریش", "price_per_kw": 3_500_000,
-    },
-}
-
-def get_suitable_inverter(capacity_kw, brand):
-    inverter_data = INVERTERS.get(brand)
-    if not inverter_data:
-        return None
-    
-    models = inverter_data["models"]
-    suitable_size = None
-    
-    for size in sorted(models.keys()):
-        if size >= capacity_kw:
-            suitable_size = size
-            break
-    
-    if suitable_size is None:
-        suitable_size = max(models.keys())
-    
-    return {
-        "brand": brand,
-        "model": models[suitable_size],
-        "size_kw": suitable_size,
-        "warranty": inverter_data["warranty"],
-        "origin": inverter_data["origin"],
-        "price": suitable_size * inverter_data["price_per_kw"],
-    }
-
-# ================== فرمول ساتبا - ماهانه ==================
-def calculate_satba_rate_monthly(month_index, monthly_inflation, k3, k4):
-    k1 = (1 + monthly_inflation) ** month_index
-    k2 = 1.0
-    B = T_BASE * k1 * k2 * k3 * k4
-    return B
-
-# ================== PVGIS ==================
-@st.cache_data(ttl=86400)
-def get_pvgis_data(lat, lon, peak_power_kw, tilt=35):
-    try:
-        url = "https://re.jrc.ec.europa.eu/api/v5_2/PVcalc"
-        params = {
-            "lat": lat, "lon": lon, "peakpower": peak_power_kw,
-            "loss": 14, "mountingplace": "building", "angle": tilt,
-            "aspect": 0, "outputformat": "json", "pvcalculation": 1,
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            monthly = data['outputs']['monthly']['fixed']
-            monthly_production = {}
-            
-            persian_months = {1: "دی", 2: "بهمن", 3: "اسفند", 4: "فروردین", 5: "اردیبهشت", 6: "خرداد",
-                             7: "تیر", 8: "مرداد", 9: "شهریور", 10: "مهر", 11: "آبان", 12: "آذر"}
-            miladi_to_shamsi = {1: 10, 2: 11, 3: 12, 4: 1, 5: 2, 6: 3, 7: 4, 8: 5, 9: 6, 10: 7, 11: 8, 12: 9}
-            
-            for month_data in monthly:
-                miladi_month = month_data['month']
-                shamsi_month = miladi_to_shamsi[miladi_month]
-                month_name = persian_months[shamsi_month]
-                monthly_production[month_name] = month_data['E_m']
-            
-            yearly = data['outputs']['totals']['fixed']['E_y']
-            return {'success': True, 'yearly': yearly, 'monthly': monthly_production, 'source': 'PVGIS'}
-        else:
-            return {'success': False}
-    except:
-        return {'success': False}
-
-def calculate_solar_production(lat, lon, capacity_kw, tilt=35):
-    base_ghi = 2100 - (lat - 25) * 25
-    base_ghi = max(1600, min(2300, base_ghi))
-    pr = 0.78
-    yearly = capacity_kw * (base_ghi / 1000) * pr
-    
-    monthly_factors = {
-        "فروردین": 0.070, "اردیبهشت": 0.095, "خرداد": 0.105,
-        "تیر": 0.110, "مرداد": 0.115, "شهریور": 0.100,
-        "مهر": 0.090, "آبان": 0.080, "آذر": 0.065,
-        "دی": 0.055, "بهمن": 0.055, "اسفند": 0.060,
-    }
-    
-    monthly_production = {m: yearly * f for m, f in monthly_factors.items()}
-    return {'success': True, 'yearly': yearly, 'monthly': monthly_production, 'source': 'محاسبه محلی', 'ghi': base_ghi}
-
-def calculate_roi(yearly_incomes, initial_cost):
-    cumulative = 0
-    for year_idx, income in enumerate(yearly_incomes, start=1):
-        cumulative += income
-        if cumulative >= initial_cost:
-            remaining = initial_cost - (cumulative - income)
-            month_fraction = (remaining / income) * 12 if income > 0 else 0
-            return year_idx - 1 + (month_fraction / 12)
-    return None
-
 # ================== بخش محاسبه ==================
 st.markdown('<div class="calc-container">', unsafe_allow_html=True)
 
 st.markdown("### 🌍 محل نصب")
 
 default_lat, default_lon = 35.6892, 51.3890
-m = folium.Map(location=[default_lat, default_lon], zoom_start=6, tiles='OpenStreetMap')
-m.add_child(folium.LatLngPopup())
-folium.Marker([default_lat, default_lon], popup="تهران", icon=folium.Icon(color="red", icon="home")).add_to(m)
-
-map_output = st_folium(m, height=350, width=None, returned_objects=["last_clicked"])
+with span("map"):
+    m = folium.Map(location=[default_lat, default_lon], zoom_start=6, tiles='OpenStreetMap')
+    m.add_child(folium.LatLngPopup())
+    folium.Marker([default_lat, default_lon], popup="تهران", icon=folium.Icon(color="red", icon="home")).add_to(m)
+    compare_points = st.session_state.setdefault("compare_points", [])
+    for i, (name, point_lat, point_lon) in enumerate(compare_points):
+        folium.Marker([point_lat, point_lon], popup=name or place_label(point_lat, point_lon),
+                      tooltip=to_persian_number(i + 1), icon=folium.Icon(color="blue", icon="flag")).add_to(m)
+    
+    map_output = st_folium(m, height=350, width=None, returned_objects=["last_clicked"])
 
 if map_output and map_output.get('last_clicked'):
     lat = map_output['last_clicked']['lat']
     lon = map_output['last_clicked']['lng']
     
-    city = "موقعیت انتخابی"
-    if 35.5 < lat < 35.9 and 51.1 < lon < 51.7: city = "تهران"
-    elif 32.4 < lat < 32.8 and 51.5 < lon < 51.9: city = "اصفهان"
-    elif 29.4 < lat < 29.8 and 52.4 < lon < 52.7: city = "شیراز"
-    elif 36.1 < lat < 36.5 and 59.4 < lon < 59.8: city = "مشهد"
-    elif 37.9 < lat < 38.3 and 46.2 < lon < 46.5: city = "تبریز"
-    elif 30.2 < lat < 30.5 and 48.2 < lon < 48.5: city = "اهواز"
+    city = place_label(lat, lon)
     
     st.success(f"📍 **{city}**")
+    
+    def add_compare_point(point_lat, point_lon):
+        if (None, point_lat, point_lon) not in compare_points and len(compare_points) < MAX_SITES:
+            compare_points.append((None, point_lat, point_lon))
+    
+    st.button("➕ افزودن این محل به مقایسه", on_click=add_compare_point, args=(lat, lon),
+              disabled=len(compare_points) >= MAX_SITES)
 else:
     lat, lon = default_lat, default_lon
-    st.info("📍 تهران")
+    city = "تهران"
+    st.info(f"📍 {city}")
 
 st.markdown("---")
 
 # ================== ورودی‌ها ==================
 st.markdown("### 📏 مشخصات پروژه")
 
-col1, col2, col3 = st.columns(3)
+roof_mode = st.radio("ورودی بام", ["متراژ", "ابعاد مستطیل", "چندضلعی"], horizontal=True)
+roof_width = roof_depth = roof_polygon = None
+
+col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    roof_area = st.number_input("متراژ بام (m²)", value=30, min_value=10, max_value=500, step=5)
+    if roof_mode == "متراژ":
+        roof_area = st.number_input("متراژ بام (m²)", value=30, min_value=10, max_value=500, step=5)
+    elif roof_mode == "ابعاد مستطیل":
+        roof_width = st.number_input("عرض شرقی-غربی (m)", value=6.0, min_value=2.0, max_value=100.0, step=0.5)
+        roof_depth = st.number_input("عمق شمالی-جنوبی (m)", value=5.0, min_value=2.0, max_value=100.0, step=0.5)
+        roof_area = roof_width * roof_depth
+    else:
+        polygon_text = st.text_area("رأس‌های بام (x,y متر؛ y رو به جنوب)", "0,0; 8,0; 8,4; 5,7; 0,7")
+        try:
+            roof_polygon = parse_polygon(polygon_text)
+        except ValueError as e:
+            st.error(str(e))
+            roof_polygon = [(0, 0), (5, 0), (5, 5), (0, 5)]
+        roof_area = None
+    if roof_mode != "متراژ":
+        setback = st.number_input("فاصله از لبه (m)", value=SETBACK, min_value=0.0, max_value=3.0, step=0.1)
 
 with col2:
-    tilt_angle = st.number_input("زاویه نصب (درجه)", value=35, min_value=10, max_value=45, step=5)
+    tilt_angle = st.number_input("زاویه نصب (درجه)", value=35, min_value=TILT_MIN, max_value=TILT_MAX, step=5)
 
 with col3:
-    shading_options = {"بدون سایه": 0, "کمی سایه ۱۰٪": 0.10, "سایه متوسط ۲۰٪": 0.20}
+    azimuth = st.number_input("جهت پنل (درجه از جنوب)", value=0, min_value=-90, max_value=90, step=15,
+                              help="۰ رو به جنوب، منفی به سمت شرق و مثبت به سمت غرب")
+
+with col4:
+    shading_options = {"بدون سایه": 0, "کمی سایه ۱۰٪": 0.10, "سایه متوسط ۲۰٪": 0.20, "پروفیل افق و موانع": None}
     shading_choice = st.selectbox("وضعیت سایه", list(shading_options.keys()))
     shading_loss = shading_options[shading_choice]
 
+# ================== پروفیل افق ==================
+horizon = None
+if shading_loss is None:
+    shading_loss = 0.0
+    with st.expander("⛰ پروفیل افق و موانع", expanded=True):
+        hz_col1, hz_col2 = st.columns(2)
+        with hz_col1:
+            horizon_file = st.file_uploader("فایل افق (CSV: آزیموت، ارتفاع)", type=["csv", "txt"])
+            horizon_text = st.text_area("افق: آزیموت,ارتفاع (درجه از شمال؛ ۱۸۰ جنوب)",
+                                        "90,8; 135,5; 180,3; 225,6; 270,10")
+        with hz_col2:
+            obstacles_text = st.text_area("موانع: آزیموت,پهنا,ارتفاع,فاصله (درجه و متر)", "200,30,6,12")
+        try:
+            horizon = parse_horizon(horizon_text, obstacles_text)
+            if horizon_file is not None:
+                horizon = Horizon(load_horizon_csv(horizon_file.getvalue()), horizon.obstacles)
+        except ValueError as e:
+            st.error(str(e))
+        if horizon:
+            st.area_chart(pd.DataFrame({'آزیموت': np.arange(360), 'ارتفاع افق (درجه)': horizon.elevations()})
+                          .set_index('آزیموت'), color="#6B7280")
+            st.caption(f"سهم آسمان دیده‌شده: {to_persian_number(round(horizon.sky_view_factor * 100, 1))}٪")
+        else:
+            horizon = None
+
 # ================== انتخاب پنل ==================
 st.markdown("---")
 st.markdown("### 💡 انتخاب پنل")
@@ -694,12 +441,27 @@ panel_power = st.slider(
     value=selected_panel_data['default_power'],
     step=5
 )
-
-# محاسبه تعداد و ظرفیت
-usable_area = roof_area * 0.75
-panel_count = math.floor(usable_area / selected_panel_data['area'])
-capacity_kw = round((panel_count * panel_power) / 1000, 2)
-total_panel_area = round(panel_count * selected_panel_data['area'], 2)
+selected_panel_model = panel_model(selected_panel_data)
+st.caption(f"ضریب دمایی {to_persian_number(selected_panel_model.temp_coefficient)}٪/°C — "
+           f"NOCT {to_persian_number(selected_panel_model.noct)}°C — "
+           f"افت بازده در نور کم {to_persian_number(round(selected_panel_model.low_light_loss * 100, 1))}٪")
+
+# محاسبه تعداد و ظرفیت (با ابعاد بام: چیدمان هندسی با فاصله ردیف‌ها)
+layout = None
+if roof_mode != "متراژ":
+    with span("layout"):
+        layout = layout_panels(selected_panel_data, tilt_angle, lat, roof_width, roof_depth, roof_polygon, setback)
+    roof_area = layout['roof_area']
+
+# ورودی‌های گراف مراحل؛ هر مرحله فقط وقتی ورودی‌هایش عوض شود دوباره حساب می‌شود
+stage_params = dict(lat=lat, lon=lon, tilt=tilt_angle, azimuth=azimuth, shading_loss=shading_loss, horizon=horizon,
+                    use_pvgis=True,
+                    roof_area=roof_area, panel_name=selected_panel_name, panel_power=panel_power,
+                    panel_count=layout['count'] if layout else None)
+design = graph.get("capacity", **stage_params)
+panel_count = design.panel_count
+capacity_kw = design.capacity_kw
+total_panel_area = design.panel_area
 
 # نمایش نتیجه انتخاب
 p1, p2, p3, p4 = st.columns(4)
@@ -708,6 +470,13 @@ p2.metric("ظرفیت کل", f"{to_persian_number(capacity_kw)} kW")
 p3.metric("مساحت اشغالی", f"{to_persian_number(total_panel_area)} m²")
 p4.metric("مساحت باقیمانده", f"{to_persian_number(round(roof_area - total_panel_area, 1))} m²")
 
+if layout:
+    with st.expander("🗺 پیش‌نمایش چیدمان پنل‌ها"):
+        st.markdown(f'<div style="direction: ltr;">{layout_svg(layout)}</div>', unsafe_allow_html=True)
+        orientation = "عمودی" if layout['orientation'] == "portrait" else "افقی"
+        st.caption(f"چیدمان {orientation} — فاصله ردیف‌ها {to_persian_number(round(layout['row_gap'], 2))} m "
+                   f"(بدون سایه در ظهر زمستان) — بالای تصویر شمال")
+
 # ================== انتخاب اینورتر ==================
 st.markdown("---")
 st.markdown("### ⚡ انتخاب اینورتر")
@@ -718,26 +487,30 @@ inverter_brand = st.selectbox(
     format_func=lambda x: f"{x} ({INVERTERS[x]['origin']})"
 )
 
-selected_inverter = get_suitable_inverter(capacity_kw, inverter_brand)
+stage_params.update(inverter_brand=inverter_brand, cost_per_watt=COST_PER_WATT)
+design = graph.get("design", **stage_params)
+selected_inverter = design.inverter
 
 if selected_inverter:
-    inv_col1, inv_col2, inv_col3 = st.columns(3)
+    inv_col1, inv_col2, inv_col3, inv_col4 = st.columns(4)
     inv_col1.metric("مدل", selected_inverter['model'])
     inv_col2.metric("ظرفیت", f"{to_persian_number(selected_inverter['size_kw'])} kW")
-    inv_col3.metric("قیمت تقریبی", format_currency(selected_inverter['price']))
-
-# ================== مقادیر ثابت قرارداد ==================
-k4 = 1.0
-contract_years = 20
-k3 = 1.2
-cost_per_watt = 35000
-annual_inflation = 0.30
-monthly_inflation = (1 + annual_inflation) ** (1/12) - 1
+    inv_col3.metric("نسبت DC/AC", to_persian_number(round(selected_inverter['dc_ac_ratio'], 2)))
+    inv_col4.metric("قیمت تقریبی", format_currency(selected_inverter['price']))
+elif design.capacity_kw > 0:
+    st.warning("برای این ظرفیت ترکیب اینورتری از این برند پیدا نشد؛ هزینه اینورتر در محاسبه لحاظ نشده است")
+
+# ================== جدول تعرفه قرارداد ==================
+schedule_keys = [f"{name}@v{version}" for name, versions in available_schedules().items() for version in versions]
+schedule_key = st.selectbox("جدول تعرفه", schedule_keys, index=len(schedule_keys) - 1,
+                            format_func=lambda k: f"{load_schedule(k).title} ({k})")
+stage_params.update(schedule=schedule_key)
+tariff = graph.get("tariff", **stage_params)
+contract_years = tariff.contract_years
+st.caption(f"ضریب ظرفیت (K3): {to_persian_number(tariff.k3)} — قرارداد {to_persian_number(contract_years)} ساله")
 
 # هزینه کل
-panel_cost = capacity_kw * 1000 * cost_per_watt
-inverter_cost = selected_inverter['price'] if selected_inverter else 0
-initial_cost = panel_cost + inverter_cost
+initial_cost = design.initial_cost
 
 st.markdown(f"""
 <div class="info-box">
@@ -748,64 +521,207 @@ st.markdown(f"""
 st.markdown("---")
 
 # ================== دکمه محاسبه ==================
-if st.button("🚀 محاسبه درآمد", type="primary", use_container_width=True):
-    
-    with st.spinner("📡 دریافت داده‌های ماهواره‌ای..."):
-        pvgis_result = get_pvgis_data(lat, lon, capacity_kw, tilt_angle)
-    
-    if pvgis_result['success']:
-        yearly_production = pvgis_result['yearly'] * (1 - shading_loss)
-        monthly_prod = {m: v * (1 - shading_loss) for m, v in pvgis_result['monthly'].items()}
-        data_source = pvgis_result['source']
+opt_col1, opt_col2 = st.columns(2)
+with opt_col1:
+    discount_rate = st.number_input("نرخ تنزیل سالانه (٪)", value=35, min_value=0, max_value=100, step=5) / 100
+with opt_col2:
+    risk_mode = st.toggle("🎲 تحلیل ریسک (مونت‌کارلو)", help="۲۰٬۰۰۰ مسیر تصادفی تورم، افت پنل، تابش و توقف نیروگاه")
+
+# ================== مصرف خودی ==================
+with st.expander("🏠 مصرف خودی و باتری"):
+    self_mode = st.toggle("شبیه‌سازی ساعتی مصرف در محل", help="برق مصرف‌شده در محل با تعرفه مصرف صرفه‌جویی و فقط مازاد به ساتبا فروخته می‌شود")
+    sc_col1, sc_col2, sc_col3 = st.columns(3)
+    with sc_col1:
+        profile_options = {**{label: key for key, label in ARCHETYPES.items()}, "فایل CSV ساعتی": "csv"}
+        profile_choice = profile_options[st.selectbox("پروفیل مصرف", list(profile_options.keys()))]
+    with sc_col2:
+        if profile_choice == "csv":
+            load_file = st.file_uploader("۸۷۶۰ مقدار ساعتی (kWh)", type=["csv"])
+            annual_consumption = None
+        else:
+            annual_consumption = st.number_input("مصرف سالانه (kWh)", value=DEFAULT_CONSUMPTION[profile_choice],
+                                                 min_value=0, step=500)
+    with sc_col3:
+        retail_price = st.number_input("تعرفه مصرف (تومان/kWh)", value=RETAIL_PRICE, min_value=0, step=100)
+    bat_col1, bat_col2 = st.columns(2)
+    with bat_col1:
+        battery_kwh = st.number_input("ظرفیت باتری (kWh)", value=0.0, min_value=0.0, max_value=200.0, step=2.5)
+    with bat_col2:
+        battery_kw = st.number_input("توان باتری (kW)", value=5.0, min_value=0.5, max_value=100.0, step=0.5)
+
+load_hourly = None
+if self_mode:
+    if profile_choice == "csv":
+        if load_file is not None:
+            try:
+                load_hourly = load_profile_csv(load_file.getvalue())
+            except ValueError as e:
+                st.error(str(e))
     else:
-        local_result = calculate_solar_production(lat, lon, capacity_kw, tilt_angle)
-        yearly_production = local_result['yearly'] * (1 - shading_loss)
-        monthly_prod = {m: v * (1 - shading_loss) for m, v in local_result['monthly'].items()}
-        data_source = local_result['source']
+        load_hourly = archetype_profile(profile_choice, annual_consumption)
+battery = Battery(battery_kwh, battery_kw) if battery_kwh > 0 else None
+
+# ================== پیشنهاد بهینه ==================
+@st.cache_data(max_entries=32, show_spinner=False)
+def find_best_designs(lat, lon, roof_area, shading_loss, horizon, rank_by, discount_rate, schedule_key):
+    return optimize(Site(lat, lon, shading_loss=shading_loss, horizon=horizon), roof_area, schedule=schedule_key,
+                    discount_rate=discount_rate, rank_by=rank_by)
+
+with st.expander("🧭 پیشنهاد بهترین زاویه، جهت، پنل و اینورتر"):
+    rank_options = {"بیشترین سود": "profit", "کوتاه‌ترین بازگشت سرمایه": "payback_years",
+                    "بیشترین NPV": "npv", "بیشترین IRR": "irr"}
+    rank_choice = st.radio("معیار رتبه‌بندی", list(rank_options.keys()), horizontal=True)
+    if st.button("🔍 جست‌وجوی همه ترکیب‌ها", use_container_width=True):
+        with st.spinner("🧭 ارزیابی همه ترکیب‌ها..."), span("optimizer"):
+            best = find_best_designs(lat, lon, roof_area, shading_loss, horizon, rank_options[rank_choice],
+                                     discount_rate, schedule_key)
+        st.caption("تولید با مدل محلی (pvlib) برای همه جهت‌ها تخمین زده شده است")
+        df_best = pd.DataFrame(best)
+        if not df_best.empty:
+            df_best = pd.DataFrame({
+                "پنل": df_best['panel'],
+                "توان (W)": df_best['panel_power'].apply(to_persian_number),
+                "تعداد": df_best['panel_count'].apply(to_persian_number),
+                "اینورتر": df_best['inverter'] + " " + df_best['inverter_model'],
+                "زاویه": df_best['tilt'].apply(to_persian_number),
+                "جهت": df_best['azimuth'].apply(to_persian_number),
+                "تولید سالانه (kWh)": df_best['yearly_production'].astype(int).apply(to_persian_number),
+                "هزینه": df_best['initial_cost'].apply(format_currency),
+                f"سود {to_persian_number(contract_years)} ساله": df_best['profit'].apply(format_currency),
+                "بازگشت (سال)": df_best['payback_years'].apply(
+                    lambda x: "—" if pd.isna(x) else to_persian_number(round(x, 1))),
+                "IRR (٪)": df_best['irr'].apply(lambda x: "—" if pd.isna(x) else to_persian_number(round(x * 100, 1))),
+            })
+            st.dataframe(df_best, use_container_width=True, hide_index=True)
+
+# ================== مقایسه چند محل ==================
+with st.expander(f"📍 مقایسه چند محل ({to_persian_number(len(compare_points))} نقطه روی نقشه)"):
+    st.caption("روی نقشه کلیک کنید و «افزودن این محل به مقایسه» را بزنید، یا مختصات را اینجا وارد کنید. "
+               "طراحی سیستم (پنل، اینورتر، هزینه و تعرفه) برای همه محل‌ها یکسان است.")
+    points_text = st.text_area("مختصات (هر خط: lat,lon یا نام,lat,lon)", placeholder="یزد,31.90,54.37\n29.59,52.58")
+    cmp_col1, cmp_col2 = st.columns(2)
+    with cmp_col1:
+        compare_clicked = st.button("⚖️ مقایسه محل‌ها", use_container_width=True,
+                                    disabled=not (compare_points or points_text.strip()))
+    with cmp_col2:
+        st.button("🗑 پاک کردن نقاط نقشه", use_container_width=True, on_click=compare_points.clear,
+                  disabled=not compare_points)
     
-    DEGRADATION = 0.007
+    if compare_clicked:
+        try:
+            points = (list(compare_points) + parse_points(points_text))[:MAX_SITES]
+        except ValueError as e:
+            st.error(str(e))
+            points = []
+        rows = [None] * len(points)
+        progress = st.progress(0.0, text="📡 دریافت داده تولید محل‌ها...")
+        table, charts = st.empty(), st.empty()
+        
+        def compare_frames():
+            table_rows, chart_rows = [], []
+            for i, r in enumerate(rows):
+                if r is None:
+                    continue
+                label = f"{to_persian_number(i + 1)}. {r['name']}"
+                if 'error' in r:
+                    table_rows.append({"محل": label, "منبع داده": r['error']})
+                    continue
+                table_rows.append({
+                    "محل": label,
+                    "تولید سالانه (kWh)": to_persian_number(int(r['yearly_production'])),
+                    "تولید ویژه (kWh/kWp)": to_persian_number(int(r['specific_yield'] or 0)),
+                    "درآمد سال اول": format_currency(r['first_year_income']),
+                    f"سود {to_persian_number(contract_years)} ساله": format_currency(r['profit']),
+                    "بازگشت (سال)": "—" if r['payback_years'] is None else to_persian_number(round(r['payback_years'], 1)),
+                    "IRR (٪)": "—" if r['irr'] is None else to_persian_number(round(r['irr'] * 100, 1)),
+                    "منبع داده": r['source'],
+                })
+                chart_rows.append({
+                    "محل": label,
+                    "تولید سالانه (MWh)": r['yearly_production'] / 1000,
+                    "درآمد سال اول (میلیون)": r['first_year_income'] / 1e6,
+                    "بازگشت سرمایه (سال)": r['payback_years'],
+                })
+            df_chart = pd.DataFrame(chart_rows, columns=["محل", "تولید سالانه (MWh)", "درآمد سال اول (میلیون)",
+                                                         "بازگشت سرمایه (سال)"]).set_index("محل")
+            return pd.DataFrame(table_rows).fillna("—"), df_chart
+        
+        params = {**stage_params, 'discount_rate': discount_rate}
+        with span("compare"):
+            for done_count, (i, row) in enumerate(compare_sites(points, params), start=1):
+                rows[i] = row
+                progress.progress(done_count / len(points),
+                                  text=f"{to_persian_number(done_count)} از {to_persian_number(len(points))} محل")
+                df_table, df_chart = compare_frames()
+                table.dataframe(df_table, use_container_width=True, hide_index=True)
+                with charts.container():
+                    chart_cols = st.columns(3)
+                    for col, column in zip(chart_cols, df_chart.columns):
+                        col.bar_chart(df_chart[[column]], color="#FF6B35")
+        progress.empty()
+
+# ================== سناریو: محاسبه یا بازکردن از نشانی ==================
+stage_params.update(discount_rate=discount_rate)
+scenario_params = scenario_inputs(stage_params)
+current_key = scenario_key(scenario_params)
+scenario = None
+
+if st.button("🚀 محاسبه درآمد", type="primary", use_container_width=True, key="calculate"):
+    with st.spinner("📡 دریافت داده‌های ماهواره‌ای..."), span("production"):
+        production = graph.get("production", **stage_params)
     
-    months_order = ["فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور",
-                    "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"]
+    with span("income"):
+        stages = graph.resolve("design", "income", "metrics", **stage_params)
     
-    contract_months = contract_years * 12
+    scenario = Scenario(current_key, scenario_params, city, stages['design'], production, stages['income'],
+                        stages['metrics'], time.time())
+    with span("scenario"):
+        default_store().put(scenario)
+    st.query_params["scenario"] = current_key
+elif st.query_params.get("scenario"):
+    with span("scenario"):
+        scenario = default_store().get(st.query_params["scenario"])
+    if scenario is None:
+        st.warning("سناریوی این نشانی پیدا نشد؛ برای محاسبه دکمه «محاسبه درآمد» را بزنید")
+
+if scenario is not None:
+    # همه نتایج از سناریو خوانده می‌شوند (نه از ویجت‌های فعلی) تا سناریوی بازشده از نشانی کامل نمایش داده شود
+    scenario_site = scenario.inputs
+    production, cashflow, metrics = scenario.production, scenario.cashflow, scenario.metrics
+    initial_cost = metrics.initial_cost
+    contract_years = len(cashflow.yearly_income)
+    try:
+        tariff = tariff_for(scenario.design.capacity_kw, scenario_site['schedule'])
+    except ValueError:
+        # جدول تعرفه سناریوی ذخیره‌شده حذف شده؛ نتایج ذخیره‌شده معتبرند و فقط تحلیل‌های تکمیلی با جدول فعلی است
+        tariff = replace(tariff_for(scenario.design.capacity_kw), contract_years=contract_years)
+        st.warning(f"جدول تعرفه «{scenario_site['schedule']}» این سناریو دیگر موجود نیست؛ "
+                   f"تحلیل مصرف خودی و ریسک با جدول {tariff.schedule} انجام می‌شود")
+    discount_rate = scenario_site['discount_rate']
     
-    yearly_data = []
-    income_list = []
+    yearly_production = production.yearly
+    monthly_prod = production.monthly
+    data_source = production.source
     
-    for year in range(1, contract_years + 1):
-        degradation_factor = 1 - ((year - 1) * DEGRADATION)
-        year_income = 0
-        year_production = 0
-        
-        for month_idx in range(12):
-            global_month = (year - 1) * 12 + month_idx
-            month_name = months_order[month_idx]
-            
-            prod = monthly_prod.get(month_name, yearly_production/12) * degradation_factor
-            rate = calculate_satba_rate_monthly(global_month, monthly_inflation, k3, k4)
-            income = prod * rate
-            
-            year_income += income
-            year_production += prod
-        
-        income_list.append(year_income)
-        yearly_data.append({
-            "سال": year,
-            "تولید (kWh)": int(year_production),
-            "درآمد (تومان)": int(year_income),
-        })
+    df_yearly = pd.DataFrame({
+        "سال": np.arange(1, contract_years + 1),
+        "تولید (kWh)": cashflow.yearly_production.astype(int),
+        "درآمد (تومان)": cashflow.yearly_income.astype(int),
+    })
     
-    df_yearly = pd.DataFrame(yearly_data)
-    roi_years = calculate_roi(income_list, initial_cost)
-    total_income = sum(income_list)
-    profit = total_income - initial_cost
+    if scenario.key != current_key:
+        st.info(f"📂 نتیجه سناریوی ذخیره‌شده «{scenario.label}» نمایش داده می‌شود که با ورودی‌های فعلی فرق دارد؛ "
+                f"برای محاسبه ورودی‌های فعلی دکمه «محاسبه درآمد» را بزنید")
+    st.caption(f"🔗 نشانی همین صفحه (?scenario={scenario.key}) این نتیجه را بدون محاسبه دوباره باز می‌کند")
+    
+    roi_years = metrics.payback_years
+    profit = metrics.profit
     
     # ================== نمایش نتایج ==================
     
     st.markdown(f"""
     <div class="profit-box">
-        <h2>💰 سود خالص ۲۰ ساله</h2>
+        <h2>💰 سود خالص {to_persian_number(contract_years)} ساله</h2>
         <h1 style="font-size: clamp(1.8rem, 5vw, 2.5rem);">{format_currency(profit)} تومان</h1>
     </div>
     """, unsafe_allow_html=True)
@@ -819,7 +735,7 @@ if st.button("🚀 محاسبه درآمد", type="primary", use_container_width
         st.metric("تولید سالانه", f"{to_persian_number(int(yearly_production))} kWh")
     
     with m3:
-        income_y1 = int(yearly_data[0]['درآمد (تومان)'])
+        income_y1 = int(df_yearly['درآمد (تومان)'].iloc[0])
         st.metric("درآمد سال اول", format_currency(income_y1))
     
     with m4:
@@ -831,11 +747,33 @@ if st.button("🚀 محاسبه درآمد", type="primary", use_container_width
             roi_text = f"> {contract_years} سال"
         st.metric("بازگشت سرمایه", roi_text)
     
+    st.caption(f"🌡 اثر دما و نور کم این پنل: {'+' if production.panel_factor >= 1 else '−'}"
+               f"{to_persian_number(round(abs(production.panel_factor - 1) * 100, 2))}٪ نسبت به پنل مرجع")
+    if scenario_site['horizon']:
+        st.caption(f"⛰ تلفات سایه افق و موانع: {to_persian_number(round(production.shading_loss * 100, 2))}٪ "
+                   f"از تولید سالانه (ساعت‌به‌ساعت با مسیر خورشید)")
+    if production.clipping_loss > 0:
+        st.caption(f"✂️ تلفات بریدگی اینورتر: {to_persian_number(round(production.clipping_loss * 100, 2))}٪ "
+                   f"از تولید سالانه (در محاسبه درآمد لحاظ شده است)")
+    
+    # شاخص‌های مالی تنزیل‌شده
+    f1, f2, f3, f4 = st.columns(4)
+    f1.metric("ارزش فعلی خالص (NPV)", format_currency(metrics.npv))
+    f2.metric("نرخ بازده داخلی (IRR)",
+              f"{to_persian_number(round(metrics.irr * 100, 1))}٪" if metrics.irr is not None else "—")
+    if metrics.discounted_payback_years is not None:
+        f3.metric("بازگشت سرمایه تنزیل‌شده", f"{to_persian_number(round(metrics.discounted_payback_years, 1))} سال")
+    else:
+        f3.metric("بازگشت سرمایه تنزیل‌شده", f"> {contract_years} سال")
+    f4.metric("هزینه تراز شده برق (LCOE)",
+              f"{to_persian_number(int(metrics.lcoe))} تومان/kWh" if metrics.lcoe is not None else "—")
+    
     # نمودار تولید ماهیانه (مستطیلی)
     st.markdown("### 📅 تولید ماهیانه")
-    prod_values = [monthly_prod.get(m, 0) for m in months_order]
-    chart_monthly = pd.DataFrame({'ماه': months_order, 'تولید (kWh)': prod_values}).set_index('ماه')
-    st.bar_chart(chart_monthly, color="#FF6B35")
+    prod_values = [monthly_prod.get(m, 0) for m in MONTHS_ORDER]
+    chart_monthly = pd.DataFrame({'ماه': MONTHS_ORDER, 'تولید (kWh)': prod_values}).set_index('ماه')
+    with span("charts"):
+        st.bar_chart(chart_monthly, color="#FF6B35")
     
     # نمودار درآمد سالانه
     st.markdown("### 📈 درآمد سالانه")
@@ -844,15 +782,134 @@ if st.button("🚀 محاسبه درآمد", type="primary", use_container_width
         'سال': df_yearly['سال'],
         'درآمد (میلیارد)': df_yearly['درآمد (تومان)'] / 1e9
     }).set_index('سال')
-    st.line_chart(chart_income, color="#00C853")
+    with span("charts"):
+        st.line_chart(chart_income, color="#00C853")
     
     # جدول سالانه
     with st.expander("جدول سالانه"):
-        df_show = df_yearly.copy()
-        df_show['سال'] = df_show['سال'].apply(to_persian_number)
-        df_show['تولید (kWh)'] = df_show['تولید (kWh)'].apply(lambda x: to_persian_number(x))
-        df_show['درآمد (تومان)'] = df_show['درآمد (تومان)'].apply(lambda x: to_persian_number(x))
-        st.dataframe(df_show, use_container_width=True, hide_index=True)
+        df_show = pd.DataFrame({column: persian_numbers(df_yearly[column]) for column in df_yearly.columns})
+        with span("charts"):
+            st.dataframe(df_show, use_container_width=True, hide_index=True)
+
+    # جدول ماه‌به‌ماه کل قرارداد؛ ستون‌ها یک‌جا به متن فارسی تبدیل می‌شوند
+    with st.expander(f"جدول ماهانه ({to_persian_number(len(cashflow.monthly_income))} ماه)"):
+        with span("report"):
+            df_monthly = pd.DataFrame(format_columns(monthly_detail(scenario)))
+        st.dataframe(df_monthly, use_container_width=True, hide_index=True)
+
+    # گزارش فقط با کلیک ساخته می‌شود و برای هر سناریو روی دیسک می‌ماند
+    d1, d2 = st.columns(2)
+    d1.download_button("📥 دریافت Excel", data=lambda: export_report(scenario, "xlsx"),
+                       file_name=f"solar-{scenario.key}.xlsx", mime=MIME_TYPES["xlsx"], use_container_width=True)
+    d2.download_button("📄 دریافت PDF", data=lambda: export_report(scenario, "pdf"),
+                       file_name=f"solar-{scenario.key}.pdf", mime=MIME_TYPES["pdf"], use_container_width=True)
+
+    # ================== مصرف خودی ==================
+    if load_hourly is not None:
+        with st.spinner("🏠 شبیه‌سازی ساعتی مصرف..."), span("self_consumption"):
+            hourly = hourly_production(production, scenario_site['lat'], scenario_site['lon'], scenario_site['tilt'],
+                                       180 + scenario_site['azimuth'], inputs_horizon(scenario_site),
+                                       panel_model(ALL_PANELS[scenario_site['panel_name']]))
+            self_result = simulate_self_consumption(hourly, load_hourly, tariff, battery, retail_price)
+            self_cost = initial_cost + (battery.cost if battery else 0)
+            self_metrics = evaluate_metrics(to_cashflow(self_result), self_cost, discount_rate)
+        
+        st.markdown("### 🏠 مصرف خودی")
+        s1, s2, s3, s4 = st.columns(4)
+        s1.metric("سهم مصرف در محل از تولید", f"{to_persian_number(round(self_result['self_consumption_ratio'] * 100, 1))}٪")
+        s2.metric("سهم تأمین مصرف از خورشید", f"{to_persian_number(round(self_result['self_sufficiency_ratio'] * 100, 1))}٪")
+        s3.metric("صرفه‌جویی سال اول", format_currency(self_result['yearly_savings'][0]))
+        s4.metric("فروش مازاد سال اول", format_currency(self_result['yearly_export_income'][0]))
+        
+        s5, s6, s7 = st.columns(3)
+        s5.metric(f"سود خالص {to_persian_number(contract_years)} ساله (با مصرف خودی)", format_currency(self_metrics.profit),
+                  delta=format_currency(self_metrics.profit - profit))
+        if self_metrics.payback_years is not None:
+            s6.metric("بازگشت سرمایه", f"{to_persian_number(round(self_metrics.payback_years, 1))} سال")
+        else:
+            s6.metric("بازگشت سرمایه", f"> {contract_years} سال")
+        s7.metric("هزینه احداث با باتری" if battery else "هزینه احداث", format_currency(self_cost))
+        
+        chart_self = pd.DataFrame({
+            'سال': df_yearly['سال'],
+            'صرفه‌جویی (میلیارد)': self_result['yearly_savings'] / 1e9,
+            'فروش مازاد (میلیارد)': self_result['yearly_export_income'] / 1e9,
+        }).set_index('سال')
+        with span("charts"):
+            st.bar_chart(chart_self)
+    
+    # ================== تحلیل ریسک ==================
+    if risk_mode:
+        with st.spinner("🎲 شبیه‌سازی مونت‌کارلو..."), span("montecarlo"):
+            risk = simulate(production, initial_cost, tariff, discount_rate=discount_rate)
+        
+        st.markdown("### 🎲 تحلیل ریسک")
+        
+        def payback_text(value):
+            if not np.isfinite(value):
+                return f"> {to_persian_number(contract_years)} سال"
+            return f"{to_persian_number(round(value, 1))} سال"
+        
+        def irr_text(value):
+            # وقتی بیشتر مسیرها بازگشت ندارند صدک IRR تعریف نشده است
+            return "—" if pd.isna(value) else f"{to_persian_number(round(value * 100, 1))}٪"
+        
+        r1, r2, r3 = st.columns(3)
+        for col, key, label in ((r1, 'p10', "بدبینانه (P10)"), (r2, 'p50', "میانه (P50)"), (r3, 'p90', "خوش‌بینانه (P90)")):
+            col.metric(f"سود {label}", format_currency(risk['profit'][key]))
+        # در بازگشت سرمایه، P90 طولانی‌ترین زمان است
+        r1.metric("بازگشت سرمایه (P90)", payback_text(risk['payback']['p90']))
+        r2.metric("بازگشت سرمایه (P50)", payback_text(risk['payback']['p50']))
+        r3.metric("بازگشت سرمایه (P10)", payback_text(risk['payback']['p10']))
+        
+        st.caption(
+            f"{to_persian_number(risk['n_paths'])} مسیر — احتمال زیان: "
+            f"{to_persian_number(round(risk['loss_probability'] * 100, 1))}٪ — "
+            f"IRR (P10 تا P90): {irr_text(risk['irr']['p10'])} تا {irr_text(risk['irr']['p90'])}"
+        )
+        
+        counts, edges = risk['profit_histogram']
+        centers = (edges[:-1] + edges[1:]) / 2 / 1e9
+        st.bar_chart(pd.DataFrame({'سود (میلیارد)': np.round(centers, 2), 'تعداد مسیر': counts}).set_index('سود (میلیارد)'),
+                     color="#00C853")
+        
+        counts, edges = risk['payback_histogram']
+        if counts is not None:
+            centers = (edges[:-1] + edges[1:]) / 2
+            st.bar_chart(pd.DataFrame({'بازگشت سرمایه (سال)': np.round(centers, 2), 'تعداد مسیر': counts}).set_index('بازگشت سرمایه (سال)'),
+                         color="#FF6B35")
+
+# ================== سناریوهای ذخیره‌شده ==================
+saved_scenarios = default_store().recent()
+if saved_scenarios:
+    with st.expander(f"🗂 سناریوهای ذخیره‌شده ({to_persian_number(len(saved_scenarios))})"):
+        scenario_labels = {
+            key: f"{label} — {to_persian_number(time.strftime('%Y-%m-%d %H:%M', time.localtime(created_at)))}"
+            for key, label, created_at in saved_scenarios
+        }
+        chosen = st.multiselect("مقایسه سناریوها", list(scenario_labels), format_func=scenario_labels.get,
+                                default=[scenario.key] if scenario is not None and scenario.key in scenario_labels else [])
+        summaries = [s.summary() for s in map(default_store().get, chosen) if s is not None]
+        if summaries:
+            df_saved = pd.DataFrame(summaries)
+            st.dataframe(pd.DataFrame({
+                "سناریو": df_saved['key'].map(scenario_labels),
+                "ظرفیت (kW)": df_saved['capacity_kw'].apply(to_persian_number),
+                "پنل": df_saved['panel_name'],
+                "تولید سالانه (kWh)": df_saved['yearly_production'].astype(int).apply(to_persian_number),
+                "هزینه": df_saved['initial_cost'].apply(format_currency),
+                "سود کل قرارداد": df_saved['profit'].apply(format_currency),
+                "بازگشت (سال)": df_saved['payback_years'].apply(
+                    lambda x: "—" if pd.isna(x) else to_persian_number(round(x, 1))),
+                "NPV": df_saved['npv'].apply(lambda x: "—" if pd.isna(x) else format_currency(x)),
+                "IRR (٪)": df_saved['irr'].apply(lambda x: "—" if pd.isna(x) else to_persian_number(round(x * 100, 1))),
+            }), use_container_width=True, hide_index=True)
+        
+        def open_scenario(key):
+            st.query_params["scenario"] = key
+        
+        open_key = st.selectbox("باز کردن سناریو", list(scenario_labels), format_func=scenario_labels.get)
+        st.button("📂 باز کردن", on_click=open_scenario, args=(open_key,))
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -868,3 +925,24 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# ================== پنل عملکرد (debug) ==================
+if recorder.enabled:
+    cache_stats = default_cache().stats()
+    gauges = {
+        'pvgis_cache_hit_rate': round(cache_stats['hit_rate'], 4),
+        'pvgis_cache_entries': cache_stats['entries'],
+        'pvgis_cache_reused': cache_stats['reused'],
+    }
+    recorder.write_textfile(gauges=gauges)
+    
+    with st.expander("🛠 عملکرد این اجرا"):
+        run_spans = recorder.run_spans()
+        df_spans = pd.DataFrame(run_spans, columns=["مرحله", "زمان (ms)"])
+        df_spans["زمان (ms)"] = (df_spans["زمان (ms)"] * 1000).round(2)
+        st.dataframe(df_spans, use_container_width=True, hide_index=True)
+        df_stages = pd.DataFrame([(name, hits, misses) for name, (hits, misses) in graph.stats.items()],
+                                 columns=["مرحله", "برخورد کش", "محاسبه"])
+        st.dataframe(df_stages, use_container_width=True, hide_index=True)
+        st.metric("نرخ برخورد کش PVGIS", f"{cache_stats['hit_rate'] * 100:.1f}٪ ({cache_stats['hits'] + cache_stats['reused']}/{cache_stats['hits'] + cache_stats['reused'] + cache_stats['misses']})")
+        st.code(recorder.prometheus(gauges), language="text")
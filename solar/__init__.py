@@ -0,0 +1,18 @@
+from .catalog import ALL_PANELS, FOREIGN_PANELS, INVERTERS, IRANIAN_PANELS
+from .metrics import calculate_roi
+from .pipeline import (
+    CashFlow,
+    Evaluation,
+    Metrics,
+    Production,
+    Site,
+    SystemDesign,
+    Tariff,
+    design_system,
+    estimate_production,
+    evaluate,
+    evaluate_metrics,
+    project_cashflow,
+)
+from .sizing import get_suitable_inverter
+from .tariff import calculate_satba_rate_monthly
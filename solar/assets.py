@@ -0,0 +1,132 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+
+# ================== خط لوله فایل‌های ایستا ==================
+# مرحله build: لوگو و تصاویر پس‌زمینه کوچک و به WebP فشرده می‌شوند، فونت (در صورت نصب بودن
+# fontTools و brotli) به WOFF2 تبدیل می‌شود و همه در پوشه static/ با یک manifest قرار می‌گیرند.
+# Streamlit با enableStaticServing آن‌ها را با آدرس ثابت app/static/... سرو می‌کند، پس در هر
+# اجرای مجدد اسکریپت فقط چند آدرس کوتاه به مرورگر فرستاده می‌شود. asset_urls اگر static/ نباشد یا از
+# فایل‌های منبع قدیمی‌تر باشد، خودش build را اجرا می‌کند؛ data URI فقط وقتی است که build ممکن نباشد.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(ROOT, "static")
+MANIFEST_PATH = os.path.join(STATIC_DIR, "manifest.json")
+STATIC_URL = "app/static/"
+
+# نام → (فایل منبع، بیشینه ابعاد تصویر)؛ لوگو حداکثر 120px نمایش داده می‌شود (۲ برابر برای صفحه‌های Retina)
+IMAGES = {
+    "logo": ("logo.png", (240, 240)),
+    "bg1": ("bg1.jpg", (1920, 1080)),
+    "bg2": ("bg2.jpg", (1920, 1080)),
+    "bg3": ("bg3.jpg", (1920, 1080)),
+}
+FONT = ("font", "IRANYekanX-Bold.ttf")
+
+MIME = {".webp": "image/webp", ".png": "image/png", ".jpg": "image/jpeg",
+        ".woff2": "font/woff2", ".ttf": "font/ttf"}
+FONT_FORMAT = {".woff2": "woff2", ".ttf": "truetype"}
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _build_image(src, dst_dir, name, max_size, quality):
+    from PIL import Image
+
+    with Image.open(src) as img:
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        img.thumbnail(max_size, Image.LANCZOS)
+        dst = os.path.join(dst_dir, f"{name}.webp")
+        img.save(dst, "WEBP", quality=quality, method=6)
+    return dst
+
+
+def _build_font(src, dst_dir, name):
+    try:
+        from fontTools.ttLib import TTFont
+
+        font = TTFont(src)
+        font.flavor = "woff2"
+        dst = os.path.join(dst_dir, f"{name}.woff2")
+        font.save(dst)
+        return dst
+    except ImportError:
+        # بدون fontTools/brotli همان TTF کپی می‌شود؛ باز هم با آدرس سرو می‌شود نه inline
+        dst = os.path.join(dst_dir, f"{name}.ttf")
+        shutil.copyfile(src, dst)
+        return dst
+
+
+def build(root=ROOT, out_dir=STATIC_DIR, quality=78):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    outputs = {name: _build_image(os.path.join(root, src), out_dir, name, size, quality)
+               for name, (src, size) in IMAGES.items()}
+    outputs[FONT[0]] = _build_font(os.path.join(root, FONT[1]), out_dir, FONT[0])
+
+    for name, path in outputs.items():
+        manifest[name] = {'file': os.path.basename(path), 'hash': _digest(path), 'bytes': os.path.getsize(path)}
+    # manifest آخر و یک‌جا نوشته می‌شود تا پروسه دیگر هیچ‌وقت manifest نیمه‌کاره نبیند
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    tmp = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path)
+    return manifest
+
+
+def _sources(root):
+    return [os.path.join(root, src) for src, _ in IMAGES.values()] + [os.path.join(root, FONT[1])]
+
+
+def ensure_built(root=ROOT, out_dir=None):
+    """manifest پوشه static/؛ اگر نبود یا از فایل‌های منبع قدیمی‌تر بود ساخته می‌شود. None اگر build ممکن نباشد."""
+    out_dir = out_dir or os.path.join(root, "static")
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        built_at = os.path.getmtime(manifest_path)
+        if all(os.path.getmtime(src) <= built_at for src in _sources(root) if os.path.exists(src)):
+            with open(manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+    try:
+        return build(root, out_dir)
+    except (ImportError, OSError):
+        # بدون Pillow یا با پوشه فقط‌خواندنی
+        return None
+
+
+def _data_uri(path):
+    with open(path, "rb") as f:
+        return f"data:{MIME[os.path.splitext(path)[1]]};base64,{base64.b64encode(f.read()).decode()}"
+
+
+def asset_urls(root=ROOT):
+    """آدرس هر فایل در static/ (در صورت نیاز همین‌جا build می‌شود)؛ data URI فقط اگر build ممکن نباشد."""
+    manifest = ensure_built(root)
+    if manifest is not None:
+        urls = {name: f"{STATIC_URL}{entry['file']}?v={entry['hash']}" for name, entry in manifest.items()}
+        urls['font_format'] = FONT_FORMAT[os.path.splitext(manifest[FONT[0]]['file'])[1]]
+        return urls
+
+    urls = {}
+    for name, (src, _) in IMAGES.items():
+        path = os.path.join(root, src)
+        urls[name] = _data_uri(path) if os.path.exists(path) else ""
+    font_path = os.path.join(root, FONT[1])
+    urls[FONT[0]] = _data_uri(font_path) if os.path.exists(font_path) else ""
+    urls['font_format'] = "truetype"
+    return urls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ساخت نسخه‌های فشرده لوگو، پس‌زمینه‌ها و فونت در static/")
+    parser.add_argument("--quality", type=int, default=78)
+    args = parser.parse_args()
+    for name, entry in build(quality=args.quality).items():
+        print(f"{name:6s} {entry['file']:14s} {entry['bytes'] / 1024:8.1f} KB")
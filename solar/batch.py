@@ -0,0 +1,205 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .catalog import ALL_PANELS
+from .finance import DISCOUNT_RATE
+from .layout import SETBACK, layout_panels
+from .pipeline import Site, evaluate
+from .shading import parse_horizon
+
+# ================== ارزیابی دسته‌ای سبد بام‌ها ==================
+# python -m solar.batch sites.csv -o results.csv --workers 8
+#
+# ستون‌های ورودی: lat, lon, roof_area, panel, inverter و به‌صورت اختیاری
+# id, panel_power, tilt, azimuth, shading_loss و roof_width, roof_depth, setback (با ابعاد بام،
+# تعداد پنل از چیدمان هندسی می‌آید) و horizon («آزیموت,ارتفاع; ...») و obstacles
+# («آزیموت,پهنا,ارتفاع,فاصله; ...») برای سایه ساعتی. ورودی تکه‌تکه خوانده می‌شود، هر تکه در یک پروسه
+# ارزیابی می‌شود و خروجی به همان ترتیب ورودی بلافاصله نوشته می‌شود؛ تعداد تکه‌های
+# در حال پردازش محدود است تا حافظه برای هر اندازه ورودی ثابت بماند.
+
+OUTPUT_FIELDS = [
+    "id", "lat", "lon", "roof_area", "panel", "inverter",
+    "panel_count", "capacity_kw", "inverter_model", "inverter_size_kw", "clipping_loss", "shading_loss",
+    "initial_cost", "yearly_production", "first_year_income", "total_income", "profit",
+    "payback_years", "npv", "irr", "discounted_payback_years", "lcoe", "source", "error",
+]
+
+
+def read_rows(path, batch_size=4096):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+
+
+class CsvSink:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8") if path != "-" else sys.stdout
+        self._writer = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS)
+        self._writer.writeheader()
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetSink:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string() if name in ("id", "panel", "inverter", "inverter_model",
+                                                                  "source", "error") else pa.float64())
+                                  for name in OUTPUT_FIELDS])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _float(row, key, default=None):
+    value = row.get(key)
+    return default if value in (None, "") else float(value)
+
+
+def evaluate_row(row, use_pvgis=False, discount_rate=DISCOUNT_RATE, schedule=None):
+    out = {
+        "id": None if row.get("id") is None else str(row["id"]), "lat": None, "lon": None, "roof_area": None,
+        "panel": row.get("panel"), "inverter": row.get("inverter"),
+    }
+    try:
+        # هر ستون عددی نامعتبر فقط همین ردیف را خطادار می‌کند، نه کل اجرا را
+        out.update(lat=_float(row, "lat"), lon=_float(row, "lon"), roof_area=_float(row, "roof_area"))
+        horizon = parse_horizon(row.get("horizon") or "", row.get("obstacles") or "")
+        site = Site(out["lat"], out["lon"], _float(row, "tilt", 35), _float(row, "shading_loss", 0.0),
+                    _float(row, "azimuth", 0.0), horizon or None)
+        power = _float(row, "panel_power")
+        panel_count = None
+        if _float(row, "roof_width") and _float(row, "roof_depth"):
+            layout = layout_panels(ALL_PANELS[out["panel"]], site.tilt, site.lat, _float(row, "roof_width"),
+                                   _float(row, "roof_depth"), setback=_float(row, "setback", SETBACK))
+            panel_count = layout['count']
+            if out["roof_area"] is None:
+                out["roof_area"] = layout['roof_area']
+        result = evaluate(site, out["roof_area"], out["panel"], int(power) if power else None,
+                          out["inverter"], use_pvgis=use_pvgis, discount_rate=discount_rate,
+                          panel_count=panel_count, schedule=schedule)
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+        return out
+
+    inverter = result.design.inverter or {}
+    out.update(
+        panel_count=result.design.panel_count,
+        capacity_kw=result.design.capacity_kw,
+        inverter_model=inverter.get("model"),
+        inverter_size_kw=inverter.get("size_kw"),
+        clipping_loss=round(result.production.clipping_loss, 5),
+        shading_loss=round(result.production.shading_loss, 5),
+        initial_cost=result.metrics.initial_cost,
+        yearly_production=round(result.production.yearly, 1),
+        first_year_income=round(float(result.cashflow.yearly_income[0])),
+        total_income=round(result.metrics.total_income),
+        profit=round(result.metrics.profit),
+        payback_years=None if result.metrics.payback_years is None else round(result.metrics.payback_years, 3),
+        npv=round(result.metrics.npv),
+        irr=None if result.metrics.irr is None else round(result.metrics.irr, 5),
+        discounted_payback_years=(None if result.metrics.discounted_payback_years is None
+                                  else round(result.metrics.discounted_payback_years, 3)),
+        lcoe=None if result.metrics.lcoe is None else round(result.metrics.lcoe, 1),
+        source=result.production.source,
+    )
+    return out
+
+
+def evaluate_chunk(rows, use_pvgis=False, discount_rate=DISCOUNT_RATE, schedule=None):
+    return [evaluate_row(row, use_pvgis, discount_rate, schedule) for row in rows]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def run(input_path, output_path, workers=None, chunk_size=64, use_pvgis=False, discount_rate=DISCOUNT_RATE,
+        progress=True, schedule=None):
+    workers = workers or os.cpu_count() or 1
+    sink = ParquetSink(output_path) if output_path.endswith(".parquet") else CsvSink(output_path)
+    done = errors = 0
+    start = time.perf_counter()
+
+    def report(final=False):
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed else 0.0
+        print(f"\r{done:,} سایت  {rate:,.1f} سایت/ثانیه  {errors:,} خطا  {elapsed:,.1f} s",
+              end="\n" if final else "", file=sys.stderr, flush=True)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in _chunks(read_rows(input_path), chunk_size):
+                pending.append(pool.submit(evaluate_chunk, chunk, use_pvgis, discount_rate, schedule))
+                # پنجره محدود: بیش از دو تکه برای هر پروسه در صف نمی‌ماند
+                while len(pending) >= 2 * workers:
+                    results = pending.popleft().result()
+                    sink.write(results)
+                    done += len(results)
+                    errors += sum(1 for r in results if r.get("error"))
+                    if progress:
+                        report()
+            while pending:
+                results = pending.popleft().result()
+                sink.write(results)
+                done += len(results)
+                errors += sum(1 for r in results if r.get("error"))
+                if progress:
+                    report()
+    finally:
+        sink.close()
+    if progress:
+        report(final=True)
+    return done, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m solar.batch",
+                                     description="ارزیابی دسته‌ای بام‌ها: تولید → اینورتر → درآمد ساتبا → بازگشت سرمایه")
+    parser.add_argument("input", help="فایل CSV یا Parquet سایت‌ها")
+    parser.add_argument("-o", "--output", default="-", help="CSV یا .parquet خروجی (پیش‌فرض stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--pvgis", action="store_true", help="استفاده از PVGIS (با کش دیسکی) پیش از مدل محلی")
+    parser.add_argument("--discount-rate", type=float, default=DISCOUNT_RATE, help="نرخ تنزیل برای NPV و LCOE")
+    parser.add_argument("--tariff", default=None, help="جدول تعرفه به شکل name یا name@vN (پیش‌فرض آخرین نسخه ساتبا)")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args(argv)
+    if any(path.endswith(".parquet") for path in (args.input, args.output)):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("برای ورودی یا خروجی parquet بسته pyarrow را نصب کنید: pip install pyarrow")
+    run(args.input, args.output, args.workers, args.chunk_size, args.pvgis, args.discount_rate,
+        progress=not args.quiet, schedule=args.tariff)
+
+
+if __name__ == "__main__":
+    main()
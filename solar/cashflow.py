@@ -0,0 +1,89 @@
+import numpy as np
+
+from .months import MONTHS_ORDER
+
+# ================== موتور جریان نقدی برداری ==================
+# همه توابع روی آرایه‌های NumPy کار می‌کنند؛ بعد آخر همیشه ماه‌ها (یا سال‌ها) است
+# و ابعاد قبلی سناریوها را نشان می‌دهند. یک سناریو = آرایه (12,) و یک دسته = (S, 12).
+
+DEGRADATION = 0.007
+
+
+def monthly_production_array(monthly_prod, yearly_production):
+    """دیکشنری تولید ماهانه (نام ماه شمسی) را به آرایه‌ای به ترتیب فروردین..اسفند تبدیل می‌کند."""
+    return np.array([monthly_prod.get(m, yearly_production / 12) for m in MONTHS_ORDER], dtype=float)
+
+
+def build_scenarios(monthly_per_kwp, capacity_kw, shading_loss=0.0):
+    """ماتریس تولید ماهانه (S, 12) برای ترکیب‌های ظرفیت/سایه از تولید ویژه هر کیلووات."""
+    monthly_per_kwp = np.asarray(monthly_per_kwp, dtype=float)
+    capacity_kw = np.asarray(capacity_kw, dtype=float)
+    shading_loss = np.asarray(shading_loss, dtype=float)
+    return monthly_per_kwp * (capacity_kw * (1 - shading_loss))[..., None]
+
+
+def rate_factors(contract_years, t_base, k2=1.0, k3=1.0, k4=1.0, steps=()):
+    """ضرایب نرخ هر ماه بدون تورم: t_base × k2 × k3 × k4 × ضریب پله‌ها.
+
+    steps: ((after_year, rate_multiplier, annual_inflation | None), ...)
+    """
+    multiplier = np.ones(contract_years * 12)
+    for after_year, rate_multiplier, _ in steps:
+        multiplier[after_year * 12:] *= rate_multiplier
+    return t_base * k2 * k3 * k4 * multiplier
+
+
+def inflation_path(contract_years, monthly_inflation, steps=()):
+    """ضریب تورم تجمعی k1 هر ماه؛ پله‌ها از سال after_year نرخ تورم را عوض می‌کنند."""
+    months = np.arange(contract_years * 12)
+    if not any(inflation is not None for _, _, inflation in steps):
+        return (1 + monthly_inflation) ** months
+    rates = np.full(contract_years * 12, monthly_inflation)
+    for after_year, _, annual_inflation in steps:
+        if annual_inflation is not None:
+            rates[after_year * 12:] = (1 + annual_inflation) ** (1 / 12) - 1
+    return np.concatenate([[1.0], np.cumprod(1 + rates[:-1])])
+
+
+def degradation_vector(contract_years, degradation=DEGRADATION):
+    """ضریب افت پنل برای هر سال قرارداد (خطی، سال اول بدون افت)."""
+    years = np.arange(contract_years)
+    return 1 - years * np.asarray(degradation, dtype=float)[..., None]
+
+
+def production_matrix(monthly_production, degradation_factors):
+    """تولید هر ماه قرارداد: (..., 12) × (..., Y) → (..., Y × 12)."""
+    monthly_production = np.asarray(monthly_production, dtype=float)
+    prod = monthly_production[..., None, :] * degradation_factors[..., :, None]
+    return prod.reshape(prod.shape[:-2] + (-1,))
+
+
+def compute_cashflow(monthly_production, monthly_rate, degradation=DEGRADATION, production_factors=None):
+    """جریان نقدی کامل قرارداد برای یک سناریو (12,) یا دسته‌ای از سناریوها (S, 12).
+
+    monthly_rate (..., Y × 12) نرخ خرید هر ماه قرارداد است (Tariff.rate_vector یا مسیرهای تصادفی آن) و
+    طول قرارداد را تعیین می‌کند؛ production_factors (..., Y, 12) ضرایب اضافه تولید (تغییرات تابش، توقف) است.
+    """
+    monthly_rate = np.asarray(monthly_rate, dtype=float)
+    contract_years = monthly_rate.shape[-1] // 12
+    degradation_factors = degradation_vector(contract_years, degradation)
+    if production_factors is not None:
+        degradation_factors = degradation_factors[..., None] * production_factors
+        monthly_prod = np.asarray(monthly_production, dtype=float)[..., None, :] * degradation_factors
+        monthly_prod = monthly_prod.reshape(monthly_prod.shape[:-2] + (-1,))
+    else:
+        monthly_prod = production_matrix(monthly_production, degradation_factors)
+    monthly_income = monthly_prod * monthly_rate
+
+    shape = monthly_income.shape[:-1] + (contract_years, 12)
+    yearly_production = monthly_prod.reshape(shape).sum(axis=-1)
+    yearly_income = monthly_income.reshape(shape).sum(axis=-1)
+
+    return {
+        'monthly_production': monthly_prod,
+        'monthly_rate': np.broadcast_to(monthly_rate, monthly_income.shape),
+        'monthly_income': monthly_income,
+        'yearly_production': yearly_production,
+        'yearly_income': yearly_income,
+        'total_income': yearly_income.sum(axis=-1),
+    }
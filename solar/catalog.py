@@ -0,0 +1,266 @@
+# ================== پنل‌های خارجی ==================
+# temp_coefficient: ضریب دمایی توان (%/°C)، noct: دمای نامی کار سلول (°C)،
+# low_light_loss: افت نسبی بازده در تابش ۲۰۰ W/m² نسبت به ۱۰۰۰ W/m² (از دیتاشیت سازنده)
+FOREIGN_PANELS = {
+    "Jinko Solar (Tiger Pro, Eagle)": {
+        "power_range": (550, 620),
+        "default_power": 580,
+        "length_mm": 2278,
+        "width_mm": 1134,
+        "thickness_mm": 30,
+        "area": 2.58,
+        "efficiency": 22.5,
+        "temp_coefficient": -0.29,
+        "noct": 45,
+        "low_light_loss": 0.025,
+        "origin": "خارجی"
+    },
+    "Trina Solar (Vertex S, Vertex N)": {
+        "power_range": (430, 510),
+        "default_power": 470,
+        "length_mm": 1762,
+        "width_mm": 1134,
+        "thickness_mm": 30,
+        "area": 2.00,
+        "efficiency": 21.8,
+        "temp_coefficient": -0.3,
+        "noct": 43,
+        "low_light_loss": 0.03,
+        "origin": "خارجی"
+    },
+    "Canadian Solar (HiKu6, TOPHiKu6)": {
+        "power_range": (540, 610),
+        "default_power": 575,
+        "length_mm": 2261,
+        "width_mm": 1134,
+        "thickness_mm": 35,
+        "area": 2.56,
+        "efficiency": 22.3,
+        "temp_coefficient": -0.34,
+        "noct": 42,
+        "low_light_loss": 0.035,
+        "origin": "خارجی"
+    },
+    "JA Solar (DeepBlue 4.0)": {
+        "power_range": (430, 500),
+        "default_power": 465,
+        "length_mm": 1762,
+        "width_mm": 1134,
+        "thickness_mm": 30,
+        "area": 2.00,
+        "efficiency": 21.5,
+        "temp_coefficient": -0.29,
+        "noct": 45,
+        "low_light_loss": 0.03,
+        "origin": "خارجی"
+    },
+    "LONGi Solar (Hi-MO 6)": {
+        "power_range": (420, 490),
+        "default_power": 455,
+        "length_mm": 1722,
+        "width_mm": 1134,
+        "thickness_mm": 30,
+        "area": 1.95,
+        "efficiency": 22.0,
+        "temp_coefficient": -0.29,
+        "noct": 45,
+        "low_light_loss": 0.025,
+        "origin": "خارجی"
+    },
+    "AE Solar (Topcon Series)": {
+        "power_range": (550, 620),
+        "default_power": 580,
+        "length_mm": 2278,
+        "width_mm": 1133,
+        "thickness_mm": 30,
+        "area": 2.58,
+        "efficiency": 22.4,
+        "temp_coefficient": -0.3,
+        "noct": 45,
+        "low_light_loss": 0.03,
+        "origin": "خارجی"
+    },
+    "Q Cells (Q.Peak Duo)": {
+        "power_range": (400, 470),
+        "default_power": 435,
+        "length_mm": 1879,
+        "width_mm": 1045,
+        "thickness_mm": 32,
+        "area": 1.96,
+        "efficiency": 21.6,
+        "temp_coefficient": -0.34,
+        "noct": 43,
+        "low_light_loss": 0.02,
+        "origin": "خارجی"
+    },
+    "SunPower (Maxeon 6)": {
+        "power_range": (410, 450),
+        "default_power": 430,
+        "length_mm": 1872,
+        "width_mm": 1032,
+        "thickness_mm": 40,
+        "area": 1.93,
+        "efficiency": 22.8,
+        "temp_coefficient": -0.27,
+        "noct": 42,
+        "low_light_loss": 0.02,
+        "origin": "خارجی"
+    },
+    "REC Solar (Alpha Pure)": {
+        "power_range": (405, 450),
+        "default_power": 425,
+        "length_mm": 1730,
+        "width_mm": 1118,
+        "thickness_mm": 30,
+        "area": 1.93,
+        "efficiency": 22.2,
+        "temp_coefficient": -0.26,
+        "noct": 44,
+        "low_light_loss": 0.02,
+        "origin": "خارجی"
+    },
+    "Znshine Solar (Zebra Series)": {
+        "power_range": (600, 700),
+        "default_power": 650,
+        "length_mm": 2465,
+        "width_mm": 1134,
+        "thickness_mm": 35,
+        "area": 2.79,
+        "efficiency": 23.0,
+        "temp_coefficient": -0.3,
+        "noct": 45,
+        "low_light_loss": 0.03,
+        "origin": "خارجی"
+    },
+}
+
+# ================== پنل‌های ایرانی ==================
+IRANIAN_PANELS = {
+    "مانا انرژی پاک (PERC, TOPCon)": {
+        "power_range": (400, 550),
+        "default_power": 475,
+        "length_mm": 1956,
+        "width_mm": 992,
+        "thickness_mm": 35,
+        "area": 1.94,
+        "efficiency": 21.5,
+        "temp_coefficient": -0.34,
+        "noct": 45,
+        "low_light_loss": 0.035,
+        "origin": "ایرانی"
+    },
+    "تابان انرژی (Taban Mono)": {
+        "power_range": (380, 500),
+        "default_power": 440,
+        "length_mm": 1956,
+        "width_mm": 992,
+        "thickness_mm": 40,
+        "area": 1.94,
+        "efficiency": 21.0,
+        "temp_coefficient": -0.36,
+        "noct": 45,
+        "low_light_loss": 0.04,
+        "origin": "ایرانی"
+    },
+    "سولار صنعت فیروزه": {
+        "power_range": (380, 480),
+        "default_power": 430,
+        "length_mm": 1956,
+        "width_mm": 992,
+        "thickness_mm": 40,
+        "area": 1.94,
+        "efficiency": 20.8,
+        "temp_coefficient": -0.37,
+        "noct": 46,
+        "low_light_loss": 0.04,
+        "origin": "ایرانی"
+    },
+    "پایدار سولار (Bifacial)": {
+        "power_range": (540, 620),
+        "default_power": 580,
+        "length_mm": 2278,
+        "width_mm": 1134,
+        "thickness_mm": 30,
+        "area": 2.58,
+        "efficiency": 22.3,
+        "temp_coefficient": -0.32,
+        "noct": 44,
+        "low_light_loss": 0.035,
+        "origin": "ایرانی"
+    },
+    "ماناسازان": {
+        "power_range": (380, 480),
+        "default_power": 430,
+        "length_mm": 1956,
+        "width_mm": 992,
+        "thickness_mm": 35,
+        "area": 1.94,
+        "efficiency": 20.8,
+        "temp_coefficient": -0.37,
+        "noct": 46,
+        "low_light_loss": 0.04,
+        "origin": "ایرانی"
+    },
+    "انرژی‌های نوین مهرآباد": {
+        "power_range": (380, 480),
+        "default_power": 430,
+        "length_mm": 1956,
+        "width_mm": 992,
+        "thickness_mm": 30,
+        "area": 1.94,
+        "efficiency": 20.8,
+        "temp_coefficient": -0.37,
+        "noct": 46,
+        "low_light_loss": 0.04,
+        "origin": "ایرانی"
+    },
+    "برق آفتابی هدایت نور یزد": {
+        "power_range": (380, 480),
+        "default_power": 430,
+        "length_mm": 1956,
+        "width_mm": 992,
+        "thickness_mm": 30,
+        "area": 1.94,
+        "efficiency": 20.5,
+        "temp_coefficient": -0.38,
+        "noct": 46,
+        "low_light_loss": 0.045,
+        "origin": "ایرانی"
+    },
+    "الکترونیک سازان سمنان": {
+        "power_range": (380, 480),
+        "default_power": 430,
+        "length_mm": 1956,
+        "width_mm": 992,
+        "thickness_mm": 30,
+        "area": 1.94,
+        "efficiency": 20.5,
+        "temp_coefficient": -0.38,
+        "noct": 46,
+        "low_light_loss": 0.045,
+        "origin": "ایرانی"
+    },
+}
+
+# ترکیب همه پنل‌ها
+ALL_PANELS = {**FOREIGN_PANELS, **IRANIAN_PANELS}
+
+# ================== اینورترها ==================
+INVERTERS = {
+    "Growatt": {
+        "models": {3: "MIN 3000TL-X", 5: "MIN 5000TL-X", 6: "MIN 6000TL-X", 8: "MOD 8KTL3-X", 10: "MOD 10KTL3-X", 15: "MOD 15KTL3-X", 20: "MOD 20KTL3-X"},
+        "warranty": 5, "origin": "چین", "price_per_kw": 1_800_000,
+    },
+    "Huawei": {
+        "models": {3: "SUN2000-3KTL", 5: "SUN2000-5KTL", 6: "SUN2000-6KTL", 8: "SUN2000-8KTL", 10: "SUN2000-10KTL", 15: "SUN2000-15KTL", 20: "SUN2000-20KTL"},
+        "warranty": 5, "origin": "چین", "price_per_kw": 2_200_000,
+    },
+    "Sungrow": {
+        "models": {3: "SG3.0RS", 5: "SG5.0RS", 6: "SG6.0RS", 8: "SG8.0RT", 10: "SG10RT", 15: "SG15RT", 20: "SG20RT"},
+        "warranty": 5, "origin": "چین", "price_per_kw": 2_000_000,
+    },
+    "Fronius": {
+        "models": {3: "Primo 3.0", 5: "Primo 5.0", 6: "Primo 6.0", 8: "Symo 8.2", 10: "Symo 10.0", 15: "Symo 15.0", 20: "Symo 20.0"},
+        "warranty": 7, "origin": "اتریش", "price_per_kw": 3_500_000,
+    },
+}
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .geo import place_label
+from .stages import graph
+
+# ================== مقایسه چند محل ==================
+# طراحی سیستم (پنل، اینورتر، هزینه، تعرفه) برای همه نقاط یکسان است و فقط lat/lon فرق می‌کند؛ پس مراحل
+# capacity/design/tariff یک بار حساب می‌شوند و برای هر نقطه فقط irradiance → production → income →
+# metrics روی استخر نخ محدود COMPARE_WORKERS اجرا می‌شود. دریافت PVGIS در نخ‌ها هم‌زمان است (سقف
+# هم‌زمانی و ادغام درخواست‌های خود کلاینت هم برقرار است) و نتیجه هر نقطه به محض آماده شدن برمی‌گردد.
+
+COMPARE_WORKERS = 4
+MAX_SITES = 12
+
+
+def parse_points(text):
+    """هر خط یا بخش جداشده با «;»: «lat,lon» یا «نام,lat,lon» → [(نام یا None، lat، lon), ...]"""
+    points = []
+    for part in text.replace("\n", ";").split(";"):
+        fields = [f.strip() for f in part.replace("،", ",").split(",")]
+        if not any(fields):
+            continue
+        if len(fields) not in (2, 3):
+            raise ValueError(f"«{part.strip()}»: هر نقطه باید به شکل lat,lon یا نام,lat,lon باشد")
+        try:
+            lat, lon = float(fields[-2]), float(fields[-1])
+        except ValueError:
+            raise ValueError(f"«{part.strip()}»: عرض و طول جغرافیایی باید عدد باشند") from None
+        points.append((fields[0] if len(fields) == 3 else None, lat, lon))
+    return points
+
+
+def evaluate_site(name, lat, lon, params):
+    """یک ردیف جدول مقایسه؛ خطای هر نقطه در ستون error برمی‌گردد تا بقیه نقاط ادامه دهند."""
+    row = {'name': name or place_label(lat, lon), 'lat': lat, 'lon': lon}
+    try:
+        stages = graph.resolve("production", "income", "metrics", **{**params, 'lat': lat, 'lon': lon})
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+        return row
+    production, cashflow, metrics = stages['production'], stages['income'], stages['metrics']
+    capacity_kw = graph.get("capacity", **params).capacity_kw
+    row.update(
+        yearly_production=production.yearly,
+        specific_yield=production.yearly / capacity_kw if capacity_kw else None,
+        first_year_income=float(cashflow.yearly_income[0]),
+        total_income=metrics.total_income,
+        profit=metrics.profit,
+        payback_years=metrics.payback_years,
+        npv=metrics.npv,
+        irr=metrics.irr,
+        source=production.source,
+    )
+    return row
+
+
+def compare_sites(points, params, workers=COMPARE_WORKERS):
+    """(اندیس نقطه، ردیف) به ترتیب آماده شدن؛ params همان ورودی‌های گراف مراحل بدون lat/lon است."""
+    if not points:
+        return
+    # مراحل مشترک پیش از شروع نخ‌ها یک بار ساخته می‌شوند
+    graph.resolve("design", "tariff", **params)
+    with ThreadPoolExecutor(max_workers=min(workers, len(points))) as pool:
+        futures = {pool.submit(evaluate_site, name, lat, lon, params): i for i, (name, lat, lon) in enumerate(points)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,96 @@
+import numpy as np
+
+from .metrics import payback_years_batch
+
+# ================== شاخص‌های مالی ==================
+# همه توابع روی آرایه (..., Y) درآمد سالانه کار می‌کنند؛ هزینه اولیه در سال صفر پرداخت می‌شود.
+# IRR با نیوتن محافظت‌شده (Newton + bisection) برای همه ردیف‌ها هم‌زمان حل می‌شود.
+
+DISCOUNT_RATE = 0.35   # نرخ تنزیل اسمی (تورم ۳۰٪ + بازده واقعی)
+IRR_MIN = -0.99        # بازه جست‌وجوی IRR
+IRR_MAX = 1e3
+
+
+def _discount_factors(rate, years):
+    rate = np.asarray(rate, dtype=float)[..., None]
+    return (1 + rate) ** -np.arange(1, years + 1)
+
+
+def npv(yearly_incomes, initial_cost, rate=DISCOUNT_RATE):
+    yearly_incomes = np.asarray(yearly_incomes, dtype=float)
+    return (yearly_incomes * _discount_factors(rate, yearly_incomes.shape[-1])).sum(axis=-1) - initial_cost
+
+
+def discounted_payback(yearly_incomes, initial_cost, rate=DISCOUNT_RATE):
+    yearly_incomes = np.asarray(yearly_incomes, dtype=float)
+    return payback_years_batch(yearly_incomes * _discount_factors(rate, yearly_incomes.shape[-1]), initial_cost)
+
+
+def lcoe(yearly_production, initial_cost, rate=DISCOUNT_RATE, annual_om_cost=0.0):
+    """هزینه تراز شده هر kWh (تومان): ارزش فعلی هزینه‌ها ÷ ارزش فعلی انرژی."""
+    yearly_production = np.asarray(yearly_production, dtype=float)
+    factors = _discount_factors(rate, yearly_production.shape[-1])
+    costs = initial_cost + annual_om_cost * factors.sum(axis=-1)
+    energy = (yearly_production * factors).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(energy > 0, costs / energy, np.nan)
+
+
+def _npv_and_derivative(rate, incomes, initial_cost):
+    t = np.arange(1, incomes.shape[-1] + 1)
+    factors = (1 + rate[..., None]) ** -t
+    value = (incomes * factors).sum(axis=-1) - initial_cost
+    derivative = -(incomes * t * factors / (1 + rate[..., None])).sum(axis=-1)
+    return value, derivative
+
+
+def irr(yearly_incomes, initial_cost, tol=1e-10, max_iter=50, bisect_steps=12):
+    """نرخ بازده داخلی هر ردیف؛ ردیف‌هایی که NPV در بازه جست‌وجو تغییر علامت نمی‌دهد NaN می‌شوند.
+
+    فرض جریان نقدی متعارف (یک پرداخت اولیه و سپس درآمد) است، پس NPV نسبت به نرخ نزولی است.
+    ابتدا چند گام دوبخشی روی log(1 + r) بازه را تنگ می‌کند و سپس نیوتن (محدود به بازه) دقیق می‌کند.
+    """
+    incomes = np.atleast_2d(np.asarray(yearly_incomes, dtype=float))
+    cost = np.broadcast_to(np.asarray(initial_cost, dtype=float), incomes.shape[:-1]).astype(float)
+    n = incomes.shape[0]
+
+    x_lo = np.full(n, np.log(1 + IRR_MIN))
+    x_hi = np.full(n, np.log(1 + IRR_MAX))
+    f_lo, _ = _npv_and_derivative(np.expm1(x_lo), incomes, cost)
+    f_hi, _ = _npv_and_derivative(np.expm1(x_hi), incomes, cost)
+    valid = (f_lo >= 0) & (f_hi <= 0)
+
+    for _ in range(bisect_steps):
+        mid = (x_lo + x_hi) / 2
+        f, _ = _npv_and_derivative(np.expm1(mid), incomes, cost)
+        x_lo = np.where(f > 0, mid, x_lo)
+        x_hi = np.where(f > 0, x_hi, mid)
+
+    lo, hi = np.expm1(x_lo), np.expm1(x_hi)
+    rate = np.where(valid, (lo + hi) / 2, np.nan)
+    active = valid.copy()
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        f, df = _npv_and_derivative(np.where(active, rate, 0.0), incomes, cost)
+        lo = np.where(active & (f > 0), rate, lo)
+        hi = np.where(active & (f < 0), rate, hi)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = rate - f / df
+        converged = active & ((np.abs(newton - rate) <= tol * np.maximum(1, np.abs(rate))) | (f == 0))
+        # اگر گام نیوتن از بازه بیرون بزند، دوبخشی
+        inside = (newton >= lo) & (newton <= hi)
+        step = np.where(inside | converged, newton, (lo + hi) / 2)
+        rate = np.where(active, step, rate)
+        active &= ~converged
+
+    return rate if np.ndim(yearly_incomes) > 1 else rate[0]
+
+
+def financial_metrics(yearly_incomes, yearly_production, initial_cost, rate=DISCOUNT_RATE, annual_om_cost=0.0):
+    return {
+        'npv': npv(yearly_incomes, initial_cost, rate),
+        'irr': irr(yearly_incomes, initial_cost),
+        'discounted_payback': discounted_payback(yearly_incomes, initial_cost, rate),
+        'lcoe': lcoe(yearly_production, initial_cost, rate, annual_om_cost),
+    }
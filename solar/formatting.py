@@ -0,0 +1,30 @@
+import numpy as np
+
+# ================== تابع تبدیل اعداد به فارسی ==================
+PERSIAN_DIGITS = str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹')
+
+
+def to_persian_number(number):
+    if isinstance(number, (int, float)):
+        number = f"{number:,.0f}" if isinstance(number, int) or number == int(number) else f"{number:,.2f}"
+    
+    return str(number).translate(PERSIAN_DIGITS)
+
+
+def persian_numbers(values, decimals=0):
+    """نسخه ستونی to_persian_number: آرایه اعداد → فهرست رشته‌ها با جداکننده هزارگان و ارقام فارسی.
+
+    کل ستون یک رشته می‌شود و با یک translate روی همان جدول PERSIAN_DIGITS تبدیل می‌شود.
+    """
+    values = np.asarray(values, dtype=float).ravel().tolist()
+    if not values:
+        return []
+    text = "\n".join(map(f"{{:,.{decimals}f}}".format, values))
+    return text.translate(PERSIAN_DIGITS).split("\n")
+
+
+def format_currency(amount):
+    if abs(amount) >= 1_000_000_000:
+        return f"{to_persian_number(round(amount/1_000_000_000, 2))} میلیارد"
+    else:
+        return f"{to_persian_number(int(amount/1_000_000))} میلیون"
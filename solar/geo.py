@@ -0,0 +1,148 @@
+import csv
+import math
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from .formatting import to_persian_number
+
+# ================== نام مکان و نمایه مکانی ==================
+# فهرست آفلاین شهرها و روستاهای ایران (places/iran.csv) یک بار خوانده و در یک شبکه مکانی با خانه‌های
+# CELL_DEG درجه‌ای نمایه می‌شود. نزدیک‌ترین نقطه با گشتن حلقه‌به‌حلقه خانه‌های اطراف پیدا می‌شود و
+# جست‌وجو وقتی تمام می‌شود که حلقه بعدی نتواند نقطه نزدیک‌تری داشته باشد (چند ده میکروثانیه).
+# فایل‌های بیشتر با SOLAR_GAZETTEER (جداشده با os.pathsep) اضافه می‌شوند: CSV با همین ستون‌ها یا
+# IR.txt سایت GeoNames (همه آبادی‌ها و روستاها).
+
+GAZETTEER_PATHS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "places", "iran.csv")] + [
+    p for p in os.environ.get("SOLAR_GAZETTEER", "").split(os.pathsep) if p
+]
+CELL_DEG = 0.25
+PLACE_MAX_KM = 60.0
+PLACE_RADIUS_KM = {"city": 8.0, "village": 2.0}   # تا این فاصله خود مکان نام برده می‌شود
+EARTH_RADIUS_KM = 6371.0
+
+
+def distance_km(lat, lon, lats, lons):
+    """فاصله تقریبی (equirectangular) از یک نقطه تا آرایه‌ای از نقاط؛ برای چند صد کیلومتر کافی است."""
+    lat_rad = np.radians(lats)
+    dlat = lat_rad - math.radians(lat)
+    dlon = np.radians(np.asarray(lons) - lon) * np.cos((lat_rad + math.radians(lat)) / 2)
+    return EARTH_RADIUS_KM * np.hypot(dlat, dlon)
+
+
+class GridIndex:
+    def __init__(self, coords, cell_deg=CELL_DEG):
+        self.coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        self.cell_deg = cell_deg
+        cells = np.floor(self.coords / cell_deg).astype(int)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        self._cells = {}
+        for i in order:
+            self._cells.setdefault((cells[i, 0], cells[i, 1]), []).append(i)
+        self._cells = {k: np.array(v) for k, v in self._cells.items()}
+        # کمترین طول یک درجه (km) در محدوده نقاط، برای حد پایین فاصله حلقه‌ها
+        max_lat = np.abs(self.coords[:, 0]).max() + cell_deg if len(self.coords) else 0.0
+        self._km_per_cell = cell_deg * math.radians(1) * EARTH_RADIUS_KM * math.cos(math.radians(min(max_lat, 89.0)))
+        self._max_ring = int(np.ptp(cells, axis=0).max()) + 1 if len(cells) else 0
+
+    def __len__(self):
+        return len(self.coords)
+
+    def _ring(self, ci, cj, r):
+        if r == 0:
+            cell = self._cells.get((ci, cj))
+            return [cell] if cell is not None else []
+        found = []
+        for di in range(-r, r + 1):
+            step = 1 if abs(di) == r else 2 * r
+            for dj in range(-r, r + 1, step):
+                cell = self._cells.get((ci + di, cj + dj))
+                if cell is not None:
+                    found.append(cell)
+        return found
+
+    def nearest(self, lat, lon, max_km=math.inf):
+        """(اندیس، فاصله km) نزدیک‌ترین نقطه در شعاع max_km یا None."""
+        ci, cj = math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+        best, best_km = None, math.inf
+        for r in range(self._max_ring + 1):
+            found = self._ring(ci, cj, r)
+            if found:
+                candidates = np.concatenate(found) if len(found) > 1 else found[0]
+                d = distance_km(lat, lon, self.coords[candidates, 0], self.coords[candidates, 1])
+                k = int(np.argmin(d))
+                if d[k] < best_km:
+                    best, best_km = int(candidates[k]), float(d[k])
+            # هر نقطه در حلقه r+1 دست‌کم r خانه دورتر است
+            reach = r * self._km_per_cell
+            if best_km <= reach or reach > max_km:
+                break
+        if best is None or best_km > max_km:
+            return None
+        return best, best_km
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    province: str
+    lat: float
+    lon: float
+    kind: str = "city"   # city / village
+
+
+def _read_csv(f):
+    for row in csv.DictReader(f):
+        yield Place(row['name'], row.get('province', ""), float(row['lat']), float(row['lon']), row.get('kind') or "city")
+
+
+def _read_geonames(f):
+    # geonameid, name, asciiname, alternatenames, lat, lon, feature class, feature code, ..., population (۱۵)
+    for line in f:
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) < 15 or fields[6] != "P":
+            continue
+        city = fields[7].startswith(("PPLA", "PPLC")) or int(fields[14] or 0) >= 10_000
+        yield Place(fields[1], "", float(fields[4]), float(fields[5]), "city" if city else "village")
+
+
+class Gazetteer:
+    def __init__(self, places, cell_deg=CELL_DEG):
+        self.places = list(places)
+        self.index = GridIndex([(p.lat, p.lon) for p in self.places], cell_deg)
+
+    @classmethod
+    def from_files(cls, paths):
+        places = []
+        for path in paths:
+            with open(path, encoding="utf-8-sig") as f:
+                places.extend(_read_geonames(f) if path.lower().endswith(".txt") else _read_csv(f))
+        return cls(places)
+
+    def nearest(self, lat, lon, max_km=PLACE_MAX_KM):
+        """(Place، فاصله km) یا None."""
+        found = self.index.nearest(lat, lon, max_km)
+        return (self.places[found[0]], found[1]) if found else None
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(paths=tuple(GAZETTEER_PATHS)):
+    return Gazetteer.from_files(paths)
+
+
+def nearest_place(lat, lon, max_km=PLACE_MAX_KM):
+    return load_gazetteer().nearest(lat, lon, max_km)
+
+
+def place_label(lat, lon, max_km=PLACE_MAX_KM):
+    """«شیراز (فارس)» یا «۱۲ کیلومتری کاشان (اصفهان)»؛ دورتر از max_km: «موقعیت انتخابی»."""
+    found = nearest_place(lat, lon, max_km)
+    if found is None:
+        return "موقعیت انتخابی"
+    place, km = found
+    province = f" ({place.province})" if place.province and place.province != place.name else ""
+    if km <= PLACE_RADIUS_KM.get(place.kind, 0.0):
+        return f"{place.name}{province}"
+    return f"{to_persian_number(f'{km:.0f}')} کیلومتری {place.name}{province}"
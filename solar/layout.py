@@ -0,0 +1,146 @@
+import math
+
+import numpy as np
+
+# ================== چیدمان هندسی پنل روی بام ==================
+# بام تخت با محور y رو به جنوب؛ ردیف‌ها شرقی-غربی چیده می‌شوند. فاصله ردیف‌ها از سایه ردیف جلو
+# در ظهر انقلاب زمستانی (کمترین ارتفاع خورشید ظهر) به دست می‌آید. هر دو حالت عمودی (طول پنل
+# در جهت شیب) و افقی امتحان می‌شود و حالت با پنل بیشتر برمی‌گردد. بام مستطیلی با فرمول بسته و
+# بام چندضلعی با پیمایش افقی (scanline) هر ردیف حل می‌شود؛ هر دو در حد میلی‌ثانیه‌اند.
+
+SETBACK = 0.5            # فاصله از لبه بام (m)
+COLUMN_GAP = 0.02        # فاصله بست بین پنل‌های کنار هم (m)
+WINTER_DECLINATION = 23.44
+MIN_SUN_ALTITUDE = 10.0  # برای عرض‌های بالا فاصله ردیف بی‌نهایت نشود
+ORIENTATIONS = ("portrait", "landscape")
+
+
+def winter_noon_altitude(lat):
+    return max(90 - abs(lat) - WINTER_DECLINATION, MIN_SUN_ALTITUDE)
+
+
+def row_geometry(panel_data, tilt, lat, orientation):
+    """ابعاد جای پای یک پنل (عرض شرقی-غربی، عمق شمالی-جنوبی) و فاصله ردیف‌ها (m)."""
+    length, width = panel_data['length_mm'] / 1000, panel_data['width_mm'] / 1000
+    slope_side, across = (length, width) if orientation == "portrait" else (width, length)
+    tilt_rad = math.radians(tilt)
+    depth = slope_side * math.cos(tilt_rad)
+    shadow = slope_side * math.sin(tilt_rad) / math.tan(math.radians(winter_noon_altitude(lat)))
+    return {
+        'orientation': orientation,
+        'panel_width': across,
+        'panel_depth': depth,
+        'row_gap': max(shadow, COLUMN_GAP),
+        'row_pitch': depth + max(shadow, COLUMN_GAP),
+    }
+
+
+def _rectangle_positions(width, depth, setback, geometry):
+    usable_w, usable_d = width - 2 * setback, depth - 2 * setback
+    pw, pd, pitch = geometry['panel_width'], geometry['panel_depth'], geometry['row_pitch']
+    if usable_w < pw or usable_d < pd:
+        return np.empty((0, 4))
+    cols = int((usable_w + COLUMN_GAP) // (pw + COLUMN_GAP))
+    rows = int((usable_d - pd) // pitch) + 1
+    x = setback + np.arange(cols) * (pw + COLUMN_GAP)
+    y = setback + np.arange(rows) * pitch
+    xx, yy = np.meshgrid(x, y)
+    return np.column_stack([xx.ravel(), yy.ravel(), np.full(xx.size, pw), np.full(xx.size, pd)])
+
+
+def _chords(polygon, y):
+    """بازه‌های x داخل چندضلعی روی خط افقی y."""
+    x0, y0 = polygon[:, 0], polygon[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    crosses = (y0 <= y) != (y1 <= y)
+    xs = np.sort(x0[crosses] + (y - y0[crosses]) * (x1[crosses] - x0[crosses]) / (y1[crosses] - y0[crosses]))
+    return list(zip(xs[::2], xs[1::2]))
+
+
+def _intersect(a, b):
+    out = []
+    for lo_a, hi_a in a:
+        for lo_b, hi_b in b:
+            lo, hi = max(lo_a, lo_b), min(hi_a, hi_b)
+            if hi > lo:
+                out.append((lo, hi))
+    return out
+
+
+def _polygon_positions(polygon, setback, geometry, offsets=4):
+    pw, pd, pitch = geometry['panel_width'], geometry['panel_depth'], geometry['row_pitch']
+    y_min, y_max = polygon[:, 1].min() + setback, polygon[:, 1].max() - setback
+    inner = polygon[(polygon[:, 1] > y_min) & (polygon[:, 1] < y_max), 1]
+    best = np.empty((0, 4))
+    # چند شروع مختلف برای ردیف اول؛ بیشترین تعداد انتخاب می‌شود
+    for k in range(offsets):
+        positions = []
+        y = y_min + pitch * k / offsets
+        while y + pd <= y_max + 1e-9:
+            # خط‌های نمونه: لبه‌های نوار ردیف (با حاشیه) و رأس‌های بین آن‌ها
+            samples = [y - setback, y + pd + setback, *inner[(inner > y - setback) & (inner < y + pd + setback)]]
+            free = _chords(polygon, samples[0])
+            for s in samples[1:]:
+                free = _intersect(free, _chords(polygon, s))
+            for lo, hi in free:
+                lo, hi = lo + setback, hi - setback
+                n = int((hi - lo + COLUMN_GAP) // (pw + COLUMN_GAP)) if hi - lo >= pw else 0
+                positions.extend((lo + i * (pw + COLUMN_GAP), y, pw, pd) for i in range(n))
+            y += pitch
+        if len(positions) > len(best):
+            best = np.array(positions)
+    return best
+
+
+def layout_panels(panel_data, tilt, lat, width=None, depth=None, polygon=None, setback=SETBACK,
+                  orientations=ORIENTATIONS):
+    """چیدمان پنل روی بام مستطیلی (width × depth) یا چندضلعی [(x, y), ...] بر حسب متر.
+
+    positions آرایه (N, 4) از x, y, عرض و عمق جای پای هر پنل است.
+    """
+    rectangle = polygon is None
+    if not rectangle:
+        polygon = np.asarray(polygon, dtype=float)
+        polygon = polygon - polygon.min(axis=0)
+        roof_area = 0.5 * abs(np.dot(polygon[:, 0], np.roll(polygon[:, 1], 1))
+                              - np.dot(polygon[:, 1], np.roll(polygon[:, 0], 1)))
+    else:
+        polygon = np.array([(0, 0), (width, 0), (width, depth), (0, depth)], dtype=float)
+        roof_area = width * depth
+
+    best = None
+    for orientation in orientations:
+        geometry = row_geometry(panel_data, tilt, lat, orientation)
+        if rectangle:
+            positions = _rectangle_positions(width, depth, setback, geometry)
+        else:
+            positions = _polygon_positions(polygon, setback, geometry)
+        if best is None or len(positions) > best['count']:
+            best = {**geometry, 'count': len(positions), 'positions': positions}
+    best.update(roof=polygon, roof_area=roof_area, tilt=tilt)
+    return best
+
+
+def parse_polygon(text):
+    """«x,y; x,y; ...» (متر) → لیست رأس‌ها."""
+    points = [tuple(float(v) for v in part.split(",")) for part in text.replace("\n", ";").split(";") if part.strip()]
+    if len(points) < 3 or any(len(p) != 2 for p in points):
+        raise ValueError("حداقل سه رأس به شکل x,y لازم است")
+    return points
+
+
+def layout_svg(layout, size=360):
+    """پیش‌نمایش SVG چیدمان؛ بالای تصویر شمال است."""
+    roof = layout['roof']
+    extent = max(roof[:, 0].max(), roof[:, 1].max(), 1e-9)
+    scale = size / extent
+    w, h = roof[:, 0].max() * scale, roof[:, 1].max() * scale
+    points = " ".join(f"{x * scale:.1f},{y * scale:.1f}" for x, y in roof)
+    panels = "".join(
+        f'<rect x="{x * scale:.1f}" y="{y * scale:.1f}" width="{pw * scale:.1f}" height="{pd * scale:.1f}" '
+        f'fill="#1E3A8A" stroke="#93C5FD" stroke-width="0.5"/>'
+        for x, y, pw, pd in layout['positions']
+    )
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="-2 -2 {w + 4:.1f} {h + 4:.1f}" '
+            f'width="{w + 4:.0f}" height="{h + 4:.0f}">'
+            f'<polygon points="{points}" fill="#E5E7EB" stroke="#374151" stroke-width="1"/>{panels}</svg>')
@@ -0,0 +1,29 @@
+import numpy as np
+
+# ================== بازگشت سرمایه ==================
+def calculate_roi(yearly_incomes, initial_cost):
+    cumulative = 0
+    for year_idx, income in enumerate(yearly_incomes, start=1):
+        cumulative += income
+        if cumulative >= initial_cost:
+            remaining = initial_cost - (cumulative - income)
+            month_fraction = (remaining / income) * 12 if income > 0 else 0
+            return year_idx - 1 + (month_fraction / 12)
+    return None
+
+
+def payback_years_batch(yearly_incomes, initial_cost):
+    """نسخه برداری calculate_roi برای آرایه (N, Y)؛ مسیرهای بدون بازگشت NaN می‌شوند."""
+    yearly_incomes = np.asarray(yearly_incomes, dtype=float)
+    initial_cost = np.asarray(initial_cost, dtype=float)[..., None]
+    cumulative = np.cumsum(yearly_incomes, axis=-1)
+    reached = cumulative >= initial_cost
+    year_idx = np.argmax(reached, axis=-1)
+    found = reached.any(axis=-1)
+
+    income = np.take_along_axis(yearly_incomes, year_idx[..., None], axis=-1)[..., 0]
+    before = np.take_along_axis(cumulative, year_idx[..., None], axis=-1)[..., 0] - income
+    remaining = initial_cost[..., 0] - before
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(income > 0, remaining / income, 0.0)
+    return np.where(found, year_idx + fraction, np.nan)
@@ -0,0 +1,95 @@
+import numpy as np
+
+from .cashflow import DEGRADATION, compute_cashflow
+from .finance import DISCOUNT_RATE, irr, npv
+from .metrics import payback_years_batch
+from .months import MONTHS_ORDER
+
+# ================== تحلیل ریسک مونت‌کارلو ==================
+# هر مسیر: تورم سالانه متغیر، نرخ افت پنل، تغییرات سال‌به‌سال تابش (SD_m از PVGIS) و توقف
+# تصادفی نیروگاه. همه مسیرها در دسته‌های چندهزارتایی و یکجا از موتور جریان نقدی عبور می‌کنند.
+
+INFLATION_SD = 0.08            # انحراف معیار تورم سالانه
+INFLATION_FLOOR = 0.0
+DEGRADATION_SD = 0.002
+IRRADIANCE_REL_SD = 0.06       # وقتی منبع داده SD_m ندارد
+DOWNTIME_PROBABILITY = 0.05    # احتمال یک توقف در هر سال
+DOWNTIME_MEAN_MONTHS = 1.0     # میانگین طول هر توقف (نمایی)
+BATCH_SIZE = 5000
+
+
+def _inflation_rates(rng, n, contract_years, mean, sd, factors):
+    annual = np.maximum(rng.normal(mean, sd, (n, contract_years)), INFLATION_FLOOR)
+    monthly = np.repeat((1 + annual) ** (1 / 12), 12, axis=1)
+    # ضریب ماه صفر برابر ۱ است (همان k1 = (1 + i)^0 در فرمول ساتبا)
+    k1 = np.cumprod(monthly, axis=1) / monthly[:, :1]
+    return factors * k1
+
+
+def _production_factors(rng, n, contract_years, relative_sd, downtime_probability, downtime_mean):
+    irradiance = np.maximum(rng.normal(1.0, relative_sd, (n, contract_years, 12)), 0.0)
+    outage = rng.random((n, contract_years)) < downtime_probability
+    lost_months = np.minimum(rng.exponential(downtime_mean, (n, contract_years)), 12.0) * outage
+    availability = 1 - lost_months / 12
+    return irradiance * availability[..., None]
+
+
+def simulate(production, initial_cost, tariff, n_paths=20_000, seed=None,
+             inflation_mean=None, inflation_sd=INFLATION_SD,
+             degradation_mean=DEGRADATION, degradation_sd=DEGRADATION_SD, irradiance_sd=None,
+             downtime_probability=DOWNTIME_PROBABILITY, downtime_mean_months=DOWNTIME_MEAN_MONTHS,
+             discount_rate=DISCOUNT_RATE, batch_size=BATCH_SIZE, bins=40):
+    """irradiance_sd: انحراف معیار نسبی تابش سال‌به‌سال؛ None از SD_m منبع (یا IRRADIANCE_REL_SD)، ۰ خاموش.
+
+    با همه انحراف معیارها و احتمال توقف صفر، هر مسیر همان جریان نقدی قطعی project_cashflow است
+    (برای تعرفه بدون پله تورمی).
+    """
+    rng = np.random.default_rng(seed)
+    # تورم تصادفی جایگزین مسیر تورم جدول تعرفه (و پله‌های تورمی آن) می‌شود
+    inflation_mean = tariff.annual_inflation if inflation_mean is None else inflation_mean
+    monthly = production.as_array()
+    if irradiance_sd is not None:
+        relative_sd = irradiance_sd
+    elif production.monthly_sd:
+        sd = np.array([production.monthly_sd.get(m, 0.0) for m in MONTHS_ORDER])
+        relative_sd = np.divide(sd, monthly, out=np.zeros(12), where=monthly > 0)
+    else:
+        relative_sd = IRRADIANCE_REL_SD
+
+    years = tariff.contract_years
+    profit = np.empty(n_paths)
+    payback = np.empty(n_paths)
+    npvs = np.empty(n_paths)
+    irrs = np.empty(n_paths)
+    yearly_income = np.empty((n_paths, years))
+    for start in range(0, n_paths, batch_size):
+        n = min(batch_size, n_paths - start)
+        rates = _inflation_rates(rng, n, years, inflation_mean, inflation_sd, tariff.rate_factors())
+        degradation = np.maximum(rng.normal(degradation_mean, degradation_sd, n), 0.0)
+        factors = _production_factors(rng, n, years, relative_sd, downtime_probability, downtime_mean_months)
+        cashflow = compute_cashflow(monthly, rates, degradation=degradation, production_factors=factors)
+        sl = slice(start, start + n)
+        yearly_income[sl] = cashflow['yearly_income']
+        profit[sl] = cashflow['total_income'] - initial_cost
+        payback[sl] = payback_years_batch(cashflow['yearly_income'], initial_cost)
+        npvs[sl] = npv(cashflow['yearly_income'], initial_cost, discount_rate)
+        irrs[sl] = irr(cashflow['yearly_income'], initial_cost)
+
+    percentiles = (10, 50, 90)
+    paid = payback[~np.isnan(payback)]
+    profit_hist, profit_edges = np.histogram(profit, bins=bins)
+    payback_hist, payback_edges = np.histogram(paid, bins=bins, range=(0, years)) if paid.size else (None, None)
+    return {
+        'n_paths': n_paths,
+        'profit': dict(zip(('p10', 'p50', 'p90'), np.percentile(profit, percentiles).tolist())),
+        # بدون بازگشت در مدت قرارداد = بی‌نهایت؛ پس صدک‌ها روی همه مسیرها گرفته می‌شوند
+        'payback': dict(zip(('p10', 'p50', 'p90'),
+                            np.percentile(np.where(np.isnan(payback), np.inf, payback), percentiles).tolist())),
+        'npv': dict(zip(('p10', 'p50', 'p90'), np.percentile(npvs, percentiles).tolist())),
+        'irr': dict(zip(('p10', 'p50', 'p90'), np.nanpercentile(irrs, percentiles).tolist())),
+        'payback_probability': paid.size / n_paths,
+        'loss_probability': float((profit < 0).mean()),
+        'yearly_income_p50': np.percentile(yearly_income, 50, axis=0),
+        'profit_histogram': (profit_hist, profit_edges),
+        'payback_histogram': (payback_hist, payback_edges),
+    }
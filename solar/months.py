@@ -0,0 +1,7 @@
+# ================== ماه‌های شمسی ==================
+MONTHS_ORDER = ["فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور",
+                "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند"]
+
+# ماه شمسی متناظر هر ماه میلادی (همان نگاشت تقریبی خروجی PVGIS: ژانویه ≈ دی)
+MILADI_TO_SHAMSI_NAME = {1: "دی", 2: "بهمن", 3: "اسفند", 4: "فروردین", 5: "اردیبهشت", 6: "خرداد",
+                         7: "تیر", 8: "مرداد", 9: "شهریور", 10: "مهر", 11: "آبان", 12: "آذر"}
@@ -0,0 +1,212 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .cashflow import compute_cashflow
+from .catalog import ALL_PANELS, INVERTERS
+from .finance import DISCOUNT_RATE, irr, npv
+from .metrics import payback_years_batch
+from .months import MILADI_TO_SHAMSI_NAME, MONTHS_ORDER
+from .pipeline import design_system
+from .schedules import tariff_for
+from .shading import shaded_poa
+from .production import (
+    CLEARSKY_INDEX, REFERENCE_PANEL, clear_day_weather, panel_model, plane_of_array, pv_output, site_weather,
+)
+
+# ================== بهینه‌ساز جهت، پنل و اینورتر ==================
+# تابش صفحه برای هر جهت (زاویه × آزیموت) فقط یک بار حساب می‌شود. چون درآمد نسبت به تولید خطی
+# است، جریان نقدی فقط برای هر جهت و به ازای ۱ kWp ساخته می‌شود و سپس برای همه طراحی‌ها
+# (پنل × توان × برند اینورتر) با ضرب در ظرفیت مؤثر (پس از بریدگی اینورتر) مقیاس می‌گیرد؛
+# اثر دما و نور کم هر مدل پنل یک ضریب ماهانه برای هر جهت است. شاخص‌ها یکجا روی کل جدول حساب می‌شوند.
+
+TILT_MIN, TILT_MAX = 10, 45          # همان بازه ورودی زاویه در صفحه
+TILTS = tuple(range(TILT_MIN, TILT_MAX + 1, 5))
+AZIMUTHS = tuple(range(-90, 91, 15))   # روش PVGIS: ۰ جنوب، ۹۰- شرق، ۹۰ غرب
+POWER_STEP = 5
+RANK_KEYS = ('profit', 'payback_years', 'npv', 'irr')
+
+# ترتیب ماه‌های میلادی (۰..۱۱) متناظر با فروردین..اسفند
+_SHAMSI_ORDER = np.array([
+    next(i - 1 for i, name in MILADI_TO_SHAMSI_NAME.items() if name == m) for m in MONTHS_ORDER
+])
+
+
+@lru_cache(maxsize=4)
+def _orientation_poa(lat, lon, tilts, azimuths, horizon):
+    # تابش صفحه همه جهت‌ها (O, 8760)؛ با horizon ماسک سایه یک بار برای همه جهت‌ها ساخته می‌شود
+    weather = site_weather(lat, lon)
+    planes = [plane_of_array(weather, tilt, 180 + azimuth) for tilt in tilts for azimuth in azimuths]
+    if horizon:
+        poa = shaded_poa({k: np.stack([p[k] for p in planes]) for k in ("poa_direct", "poa_diffuse")},
+                         weather, horizon)
+    else:
+        poa = np.stack([p['poa_global'] for p in planes])
+    poa.setflags(write=False)
+    return poa
+
+
+@lru_cache(maxsize=64)
+def orientation_yields(lat, lon, tilts=TILTS, azimuths=AZIMUTHS, horizon=None, panel=None):
+    """تولید ویژه ماهانه (kWh/kWp) هر جهت: آرایه (T, A, 12) به ترتیب فروردین..اسفند.
+
+    horizon سایه افق (shading.Horizon) و panel مدل دمایی پنل (production.PanelModel) است.
+    """
+    lat, lon = round(lat, 2), round(lon, 2)
+    weather = site_weather(lat, lon)
+    hourly = pv_output(_orientation_poa(lat, lon, tuple(tilts), tuple(azimuths), horizon or None), weather,
+                       panel=panel)
+    month_starts = np.flatnonzero(np.diff(weather['month'], prepend=0))
+    monthly = np.add.reduceat(hourly, month_starts, axis=-1)[:, _SHAMSI_ORDER]
+    return monthly.reshape(len(tilts), len(azimuths), 12)
+
+
+@lru_cache(maxsize=32)
+def _clear_day_profiles(lat, lon, tilts, azimuths):
+    # خروجی روز صاف هر جهت، نزولی مرتب، با جمع تجمعی وزن‌دار (وزن = شاخص آسمان صاف ماه)
+    weather = clear_day_weather(round(lat, 2), round(lon, 2))
+    poa = np.stack([
+        plane_of_array(weather, tilt, 180 + azimuth)['poa_global']
+        for tilt in tilts for azimuth in azimuths
+    ])
+    clear = pv_output(poa, weather)
+    order = np.argsort(-clear, axis=1)
+    values = np.take_along_axis(clear, order, axis=1)
+    weights = CLEARSKY_INDEX[weather['month'] - 1][order]
+    return values, np.cumsum(weights * values, axis=1), np.cumsum(weights, axis=1)
+
+
+def panel_gains(lat, lon, panel, tilts=TILTS, azimuths=AZIMUTHS, horizon=None):
+    """نسبت تولید ماهانه پنل به پنل مرجع برای هر جهت: آرایه (T, A, 12)."""
+    own = orientation_yields(lat, lon, tilts, azimuths, horizon, panel)
+    reference = orientation_yields(lat, lon, tilts, azimuths, horizon, REFERENCE_PANEL)
+    return np.divide(own, reference, out=np.ones_like(own), where=reference > 0)
+
+
+def clipping_fractions(lat, lon, dc_ac_ratios, tilts=TILTS, azimuths=AZIMUTHS):
+    """سهم سالانه انرژی بریده‌شده برای هر جهت × نسبت DC/AC: آرایه (T × A, R).
+
+    همان مدل production.clipping_losses، با جست‌وجوی دودویی روی پروفیل مرتب به جای پیمایش ساعتی.
+    """
+    tilts, azimuths = tuple(tilts), tuple(azimuths)
+    values, cum_wx, cum_w = _clear_day_profiles(lat, lon, tilts, azimuths)
+    yearly = orientation_yields(lat, lon, tilts, azimuths).reshape(-1, 12).sum(axis=-1)
+    caps = 1 / np.asarray(dc_ac_ratios, dtype=float)
+    lost = np.zeros((len(values), len(caps)))
+    for o in range(len(values)):
+        n = np.searchsorted(-values[o], -caps, side="left")
+        above = n > 0
+        lost[o, above] = cum_wx[o, n[above] - 1] - caps[above] * cum_w[o, n[above] - 1]
+    return np.minimum(lost / yearly[:, None], 1.0)
+
+
+def candidate_designs(roof_area, panels=None, inverter_brands=None, power_step=POWER_STEP):
+    designs = []
+    for panel_name in panels or ALL_PANELS:
+        low, high = ALL_PANELS[panel_name]['power_range']
+        for power in range(low, high + 1, power_step):
+            for brand in inverter_brands or INVERTERS:
+                design = design_system(roof_area, panel_name, power, brand)
+                if design.capacity_kw > 0 and design.inverter:
+                    designs.append(design)
+    return designs
+
+
+def optimize(site, roof_area, tariff=None, discount_rate=DISCOUNT_RATE, panels=None,
+             inverter_brands=None, tilts=TILTS, azimuths=AZIMUTHS, power_step=POWER_STEP,
+             rank_by='profit', limit=20, schedule=None):
+    """جدول رتبه‌بندی‌شده ترکیب‌ها؛ payback_years صعودی و بقیه کلیدها نزولی مرتب می‌شوند.
+
+    بدون tariff، تعرفه هر طراحی از باند ظرفیت آن در جدول schedule می‌آید.
+    """
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by باید یکی از {RANK_KEYS} باشد")
+    designs = candidate_designs(roof_area, panels, inverter_brands, power_step)
+    if not designs:
+        return []
+
+    tilts, azimuths = tuple(tilts), tuple(azimuths)
+    base = (orientation_yields(site.lat, site.lon, tilts, azimuths, site.horizon).reshape(-1, 12)
+            * (1 - site.shading_loss))
+    models = [panel_model(ALL_PANELS[d.panel_name]) for d in designs]
+    unique_models = list(dict.fromkeys(models))
+    model_idx = np.array([unique_models.index(m) for m in models])
+    # تولید هر kWp برای هر مدل پنل × جهت: (M, O, 12)
+    per_kwp = np.stack([
+        base * panel_gains(site.lat, site.lon, m, tilts, azimuths, site.horizon).reshape(-1, 12)
+        for m in unique_models
+    ])
+    tariffs = [tariff or tariff_for(d.capacity_kw, schedule) for d in designs]
+    unique_tariffs = list(dict.fromkeys(tariffs))
+    tariff_idx = np.array([unique_tariffs.index(t) for t in tariffs])
+    # طول قرارداد هر تعرفه می‌تواند فرق کند؛ درآمد سال‌های پس از پایان قرارداد صفر گذاشته می‌شود که
+    # در سود، بازگشت سرمایه، NPV و IRR اثری ندارد
+    contract_years = max(t.contract_years for t in unique_tariffs)
+    # جریان نقدی هر kWp برای هر تعرفه × مدل پنل × جهت: (G, M, O, Y)
+    flows = [compute_cashflow(per_kwp.reshape(-1, 12), t.rate_vector()) for t in unique_tariffs]
+    income_per_kwp = np.stack([
+        np.pad(f['yearly_income'], ((0, 0), (0, contract_years - t.contract_years)))
+        .reshape(len(unique_models), -1, contract_years)
+        for f, t in zip(flows, unique_tariffs)
+    ])[tariff_idx, model_idx]
+
+    # (D, O): طراحی × جهت
+    n_orient = len(tilts) * len(azimuths)
+    cost = np.array([d.initial_cost for d in designs])
+    ratios, ratio_idx = np.unique([round(d.capacity_kw / d.inverter['size_kw'], 3) for d in designs],
+                                  return_inverse=True)
+    clipping = clipping_fractions(site.lat, site.lon, ratios, tilts, azimuths)[:, ratio_idx].T
+    # ظرفیت مؤثر: kWp پس از کسر بریدگی اینورتر
+    capacity = np.array([d.capacity_kw for d in designs])[:, None] * (1 - clipping)
+    yearly_income = capacity[..., None] * income_per_kwp
+    cost_grid = np.broadcast_to(cost[:, None], yearly_income.shape[:-1])
+    flat_income = yearly_income.reshape(-1, contract_years)
+    flat_cost = cost_grid.reshape(-1)
+
+    # سود و NPV نسبت به ظرفیت خطی‌اند؛ IRR گران است و جز برای رتبه‌بندی فقط برای ردیف‌های خروجی حل می‌شود
+    table = {
+        'profit': (capacity * income_per_kwp.sum(axis=-1) - cost[:, None]).reshape(-1),
+        'payback_years': payback_years_batch(flat_income, flat_cost),
+        'npv': (capacity * npv(income_per_kwp, 0.0, discount_rate) - cost[:, None]).reshape(-1),
+    }
+    if rank_by == 'irr':
+        # در هر جهت، تعرفه و مدل پنل، IRR با هزینه هر کیلووات مؤثر نزولی است؛ پس فقط ارزان‌ترین طراحی‌ها نامزدند
+        specific_cost = cost[:, None] / capacity
+        group = tariff_idx * len(unique_models) + model_idx
+        candidates = []
+        for g in np.unique(group):
+            members = np.flatnonzero(group == g)
+            cheapest = members[np.argsort(specific_cost[members], axis=0, kind="stable")[:limit]]
+            candidates.append((cheapest * n_orient + np.arange(n_orient)).reshape(-1))
+        candidates = np.concatenate(candidates)
+        table['irr'] = np.full(flat_cost.shape, np.nan)
+        table['irr'][candidates] = irr(flat_income[candidates], flat_cost[candidates])
+    values = table[rank_by]
+    if rank_by == 'payback_years':
+        order = np.argsort(np.where(np.isnan(values), np.inf, values), kind="stable")[:limit]
+    else:
+        order = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind="stable")[:limit]
+    if rank_by != 'irr':
+        table['irr'] = np.full(flat_cost.shape, np.nan)
+        table['irr'][order] = irr(flat_income[order], flat_cost[order])
+
+    yearly_per_kwp = per_kwp.sum(axis=-1)
+    rows = []
+    for idx in order:
+        d, o = divmod(int(idx), n_orient)
+        design = designs[d]
+        rows.append({
+            'panel': design.panel_name,
+            'panel_power': design.panel_power,
+            'panel_count': design.panel_count,
+            'capacity_kw': design.capacity_kw,
+            'inverter': design.inverter['brand'],
+            'inverter_model': design.inverter['model'],
+            'tilt': tilts[o // len(azimuths)],
+            'azimuth': azimuths[o % len(azimuths)],
+            'yearly_production': float(capacity[d, o] * yearly_per_kwp[model_idx[d], o]),
+            'clipping_loss': float(clipping[d, o]),
+            'initial_cost': design.initial_cost,
+            **{k: (None if np.isnan(v[idx]) else float(v[idx])) for k, v in table.items()},
+        })
+    return rows
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+# ================== زمان‌سنجی مراحل ==================
+# with span("production"): ...
+# در حالت غیرفعال span یک context manager خالی و مشترک برمی‌گرداند (یک فراخوانی تابع، بدون تخصیص).
+# زمان‌های هر اجرای اسکریپت جدا (به ازای هر thread/نشست) و شمارنده‌های تجمعی در سطح پروسه
+# نگه داشته می‌شوند و با قالب متنی Prometheus قابل خروجی گرفتن هستند.
+
+ENABLED = os.environ.get("SOLAR_PROFILE", "") not in ("", "0")
+METRICS_FILE = os.environ.get("SOLAR_METRICS_FILE")
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Recorder:
+    def __init__(self, enabled=ENABLED):
+        self.default_enabled = enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.totals = {}     # stage → [تعداد، مجموع ثانیه]
+        self.counters = {}
+
+    @property
+    def enabled(self):
+        return getattr(self._local, "enabled", self.default_enabled)
+
+    def start_run(self, enabled=None):
+        self._local.enabled = self.default_enabled if enabled is None else enabled
+        self._local.spans = []
+        if self._local.enabled:
+            self.count("reruns")
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        spans = getattr(self._local, "spans", None)
+        if spans is not None:
+            spans.append((name, seconds))
+        with self._lock:
+            total = self.totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def run_spans(self):
+        return list(getattr(self._local, "spans", []))
+
+    def prometheus(self, gauges=None):
+        lines = [
+            "# HELP solar_stage_seconds_total Cumulative time spent in each stage.",
+            "# TYPE solar_stage_seconds_total counter",
+        ]
+        with self._lock:
+            totals = {k: list(v) for k, v in self.totals.items()}
+            counters = dict(self.counters)
+        lines += [f'solar_stage_seconds_total{{stage="{k}"}} {v[1]:.6f}' for k, v in sorted(totals.items())]
+        lines += [
+            "# HELP solar_stage_calls_total Number of times each stage ran.",
+            "# TYPE solar_stage_calls_total counter",
+        ]
+        lines += [f'solar_stage_calls_total{{stage="{k}"}} {v[0]}' for k, v in sorted(totals.items())]
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE solar_{name}_total counter", f"solar_{name}_total {value}"]
+        for name, value in sorted((gauges or {}).items()):
+            lines += [f"# TYPE solar_{name} gauge", f"solar_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path=METRICS_FILE, gauges=None):
+        """خروجی برای textfile collector در node_exporter (نوشتن اتمیک)."""
+        if not path:
+            return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus(gauges))
+        os.replace(tmp, path)
+
+
+recorder = Recorder()
+span = recorder.span
@@ -0,0 +1,245 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from .cashflow import compute_cashflow, inflation_path, monthly_production_array, rate_factors
+from .catalog import ALL_PANELS
+from .finance import DISCOUNT_RATE, financial_metrics
+from .metrics import calculate_roi
+from .production import PanelModel, panel_model
+from .shading import Horizon
+from .sizing import count_panels, get_suitable_inverter
+from .tariff import COST_PER_WATT, monthly_inflation_rate
+
+# ================== API هسته: محل → تولید → طراحی → جریان نقدی → شاخص‌ها ==================
+
+
+@dataclass(frozen=True)
+class Site:
+    lat: float
+    lon: float
+    tilt: float = 35
+    shading_loss: float = 0.0
+    azimuth: float = 0.0   # جهت پنل به روش PVGIS: ۰ جنوب، ۹۰- شرق، ۹۰ غرب
+    horizon: Horizon | None = None   # پروفیل افق و موانع؛ سایه ساعت‌به‌ساعت علاوه بر shading_loss
+
+
+@dataclass(frozen=True)
+class SystemDesign:
+    panel_name: str
+    panel_power: int
+    panel_count: int
+    capacity_kw: float
+    panel_area: float
+    inverter: dict | None
+    panel_cost: float
+    inverter_cost: float
+
+    @property
+    def initial_cost(self) -> float:
+        return self.panel_cost + self.inverter_cost
+
+
+@dataclass(frozen=True)
+class Production:
+    yearly: float
+    monthly: dict[str, float]
+    source: str
+    monthly_sd: dict[str, float] | None = None
+    clipping_loss: float = 0.0   # سهم انرژی سالانه بریده‌شده توسط اینورتر
+    shading_loss: float = 0.0    # سهم انرژی سالانه از دست رفته در سایه (ثابت و افق)
+    panel_factor: float = 1.0    # نسبت تولید سالانه پنل انتخابی به پنل مرجع (دما و نور کم)
+
+    def as_array(self) -> np.ndarray:
+        return monthly_production_array(self.monthly, self.yearly)
+
+
+@dataclass(frozen=True)
+class CashFlow:
+    monthly_production: np.ndarray
+    monthly_rate: np.ndarray
+    monthly_income: np.ndarray
+    yearly_production: np.ndarray
+    yearly_income: np.ndarray
+
+    @property
+    def total_income(self) -> float:
+        return float(self.yearly_income.sum())
+
+
+@dataclass(frozen=True)
+class Metrics:
+    initial_cost: float
+    total_income: float
+    profit: float
+    payback_years: float | None
+    npv: float | None = None
+    irr: float | None = None
+    discounted_payback_years: float | None = None
+    lcoe: float | None = None
+
+
+@dataclass(frozen=True)
+class Evaluation:
+    site: Site
+    design: SystemDesign
+    production: Production
+    cashflow: CashFlow
+    metrics: Metrics
+
+
+@dataclass(frozen=True)
+class Tariff:
+    contract_years: int
+    annual_inflation: float
+    k3: float
+    k4: float
+    t_base: float
+    k2: float = 1.0
+    steps: tuple = ()            # ((after_year, rate_multiplier, annual_inflation | None), ...)
+    schedule: str | None = None  # «name@vN» جدول تعرفه مبدأ
+
+    @property
+    def monthly_inflation(self) -> float:
+        return monthly_inflation_rate(self.annual_inflation)
+
+    def rate_factors(self) -> np.ndarray:
+        """ضرایب ثابت نرخ هر ماه (بدون تورم)؛ برای مسیرهای تورم تصادفی."""
+        return _compiled(self)[0]
+
+    def rate_vector(self) -> np.ndarray:
+        """نرخ خرید هر ماه قرارداد (تومان/kWh)؛ یک بار برای هر تعرفه ساخته و کش می‌شود."""
+        return _compiled(self)[1]
+
+
+@lru_cache(maxsize=256)
+def _compiled(tariff: Tariff):
+    factors = rate_factors(tariff.contract_years, tariff.t_base, tariff.k2, tariff.k3, tariff.k4, tariff.steps)
+    rates = factors * inflation_path(tariff.contract_years, tariff.monthly_inflation, tariff.steps)
+    factors.setflags(write=False)
+    rates.setflags(write=False)
+    return factors, rates
+
+
+def design_system(roof_area: float, panel_name: str, panel_power: int | None = None,
+                  inverter_brand: str | None = None, cost_per_watt: float = COST_PER_WATT,
+                  panel_count: int | None = None) -> SystemDesign:
+    """panel_count (مثلاً از layout_panels) جایگزین تخمین مساحتی تعداد پنل می‌شود."""
+    panel_data = ALL_PANELS[panel_name]
+    panel_power = panel_power or panel_data['default_power']
+    if panel_count is None:
+        panel_count = count_panels(roof_area, panel_data)
+    capacity_kw = round((panel_count * panel_power) / 1000, 2)
+    inverter = get_suitable_inverter(capacity_kw, inverter_brand)
+    return SystemDesign(
+        panel_name=panel_name,
+        panel_power=panel_power,
+        panel_count=panel_count,
+        capacity_kw=capacity_kw,
+        panel_area=round(panel_count * panel_data['area'], 2),
+        inverter=inverter,
+        panel_cost=capacity_kw * 1000 * cost_per_watt,
+        inverter_cost=inverter['price'] if inverter else 0,
+    )
+
+
+def estimate_production(site: Site, capacity_kw: float, use_pvgis: bool = True,
+                        source=None, ac_capacity_kw: float | None = None,
+                        panel: PanelModel | None = None) -> Production:
+    """تولید سالانه و ماهانه پس از کسر سایه (ثابت و پروفیل افق) و بریدگی اینورتر (اگر ac_capacity_kw داده شود).
+
+    با panel، تولید منبع (که برای پنل مرجع است) با ضریب ماهانه دما و نور کم همان پنل اصلاح می‌شود.
+
+    source تابع (lat, lon, capacity_kw, tilt) → dict است.
+    """
+    if source is None:
+        from .sources import get_production
+
+        result = get_production(site.lat, site.lon, capacity_kw, site.tilt, use_pvgis=use_pvgis,
+                                aspect=site.azimuth)
+    else:
+        result = source(site.lat, site.lon, capacity_kw, site.tilt)
+    factors = dict.fromkeys(result['monthly'], 1 - site.shading_loss)
+    total = sum(result['monthly'].values())
+    panel_factor = 1.0
+    if panel is not None:
+        from .production import panel_factors
+
+        gains = panel_factors(round(site.lat, 2), round(site.lon, 2), site.tilt, 180 + site.azimuth, panel)
+        if total:
+            panel_factor = sum(v * gains.get(m, 1.0) for m, v in result['monthly'].items()) / total
+        factors = {m: f * gains.get(m, 1.0) for m, f in factors.items()}
+    horizon_loss = 0.0
+    if site.horizon:
+        from .production import shading_losses
+
+        shaded = shading_losses(round(site.lat, 2), round(site.lon, 2), site.tilt, 180 + site.azimuth, site.horizon)
+        if total:
+            horizon_loss = sum(v * shaded.get(m, 0.0) for m, v in result['monthly'].items()) / total
+        factors = {m: f * (1 - shaded.get(m, 0.0)) for m, f in factors.items()}
+    clipping_loss = 0.0
+    if ac_capacity_kw and capacity_kw > 0:
+        from .production import clipping_losses
+
+        clipped = clipping_losses(round(site.lat, 2), round(site.lon, 2), site.tilt, 180 + site.azimuth,
+                                  round(capacity_kw / ac_capacity_kw, 3))
+        if total:
+            clipping_loss = sum(v * clipped.get(m, 0.0) for m, v in result['monthly'].items()) / total
+        factors = {m: f * (1 - clipped.get(m, 0.0)) for m, f in factors.items()}
+    monthly = {m: v * factors[m] for m, v in result['monthly'].items()}
+    monthly_sd = result.get('monthly_sd')
+    return Production(
+        yearly=(result['yearly'] * panel_factor * (1 - site.shading_loss) * (1 - horizon_loss)
+                * (1 - clipping_loss)),
+        monthly=monthly,
+        source=result['source'],
+        monthly_sd={m: v * factors.get(m, 1.0) for m, v in monthly_sd.items()} if monthly_sd else None,
+        clipping_loss=clipping_loss,
+        shading_loss=1 - (1 - site.shading_loss) * (1 - horizon_loss),
+        panel_factor=panel_factor,
+    )
+
+
+def project_cashflow(production: Production, tariff: Tariff) -> CashFlow:
+    cashflow = compute_cashflow(production.as_array(), tariff.rate_vector())
+    return CashFlow(**{k: v for k, v in cashflow.items() if k != 'total_income'})
+
+
+def _optional(value) -> float | None:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def evaluate_metrics(cashflow: CashFlow, initial_cost: float, discount_rate: float = DISCOUNT_RATE) -> Metrics:
+    total_income = cashflow.total_income
+    finance = financial_metrics(cashflow.yearly_income, cashflow.yearly_production, initial_cost, discount_rate)
+    return Metrics(
+        initial_cost=initial_cost,
+        total_income=total_income,
+        profit=total_income - initial_cost,
+        payback_years=calculate_roi(cashflow.yearly_income.tolist(), initial_cost),
+        npv=float(finance['npv']),
+        irr=_optional(finance['irr']),
+        discounted_payback_years=_optional(finance['discounted_payback']),
+        lcoe=_optional(finance['lcoe']),
+    )
+
+
+def evaluate(site: Site, roof_area: float, panel_name: str, panel_power: int | None = None,
+             inverter_brand: str = "Growatt", tariff: Tariff | None = None, use_pvgis: bool = True,
+             source=None, discount_rate: float = DISCOUNT_RATE, panel_count: int | None = None,
+             schedule: str | None = None) -> Evaluation:
+    """بدون tariff، تعرفه از جدول schedule (پیش‌فرض آخرین نسخه ساتبا) برای ظرفیت طرح ساخته می‌شود."""
+    design = design_system(roof_area, panel_name, panel_power, inverter_brand, panel_count=panel_count)
+    if tariff is None:
+        from .schedules import tariff_for
+
+        tariff = tariff_for(design.capacity_kw, schedule)
+    ac_capacity_kw = design.inverter['size_kw'] if design.inverter else None
+    production = estimate_production(site, design.capacity_kw, use_pvgis, source, ac_capacity_kw,
+                                     panel_model(ALL_PANELS[panel_name]))
+    cashflow = project_cashflow(production, tariff)
+    metrics = evaluate_metrics(cashflow, design.initial_cost, discount_rate)
+    return Evaluation(site, design, production, cashflow, metrics)
+
@@ -0,0 +1,226 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from .months import MILADI_TO_SHAMSI_NAME
+
+# ================== موتور تولید ساعتی (pvlib) ==================
+# شبیه‌سازی ۸۷۶۰ ساعته بدون اینترنت: موقعیت خورشید → آسمان صاف (Ineichen) با ضریب ابرناکی
+# ماهانه → تفکیک Erbs → تابش صفحه مایل (Hay-Davies) → دمای سلول (SAPM) → PVWatts.
+# همه مراحل روی آرایه‌های یک‌ساله انجام می‌شوند؛ pvlib و pandas فقط هنگام اجرا import می‌شوند.
+# اگر در انبار TMY (solar.tmy) ایستگاهی نزدیک نقطه باشد، تابش، دما و باد از همان خوانده می‌شود.
+# مدل پنل (PanelModel): دمای سلول NOCT با بازده واقعی پنل، ضریب دمایی و افت بازده در تابش کم؛
+# اثر آن نسبت به پنل مرجع (REFERENCE_PANEL) به صورت ضریب ماهانه روی هر منبع داده اعمال می‌شود.
+
+SIM_YEAR = 2023           # سال غیرکبیسه → دقیقاً ۸۷۶۰ ساعت
+SYSTEM_LOSS = 0.14        # همان loss=14 درخواست PVGIS
+GAMMA_PDC = -0.004        # ضریب دمایی توان (1/°C)
+ALBEDO = 0.2
+WIND_SPEED = 2.0          # m/s
+
+# شاخص آسمان صاف ماهانه (ژانویه..دسامبر) برای اقلیم ایران
+CLEARSKY_INDEX = np.array([0.70, 0.72, 0.74, 0.76, 0.82, 0.90, 0.90, 0.91, 0.90, 0.85, 0.76, 0.70])
+
+# پارامترهای SAPM برای ماژول شیشه-پلیمر روی سازه باز
+SAPM_A, SAPM_B, SAPM_DT = -3.56, -0.075, 3.0
+
+
+@dataclass(frozen=True)
+class PanelModel:
+    temp_coefficient: float = -0.40   # %/°C
+    noct: float = 45.0                # °C
+    efficiency: float = 20.0          # %
+    low_light_loss: float = 0.03      # افت نسبی بازده در ۲۰۰ W/m²
+
+
+# پنل سیلیکونی عمومی که داده PVGIS و مدل پیش‌فرض نماینده آن‌اند
+REFERENCE_PANEL = PanelModel()
+
+
+def panel_model(panel_data):
+    """PanelModel از مشخصات کاتالوگ؛ کلیدهای ناموجود از پنل مرجع می‌آیند."""
+    return PanelModel(
+        temp_coefficient=panel_data.get('temp_coefficient', REFERENCE_PANEL.temp_coefficient),
+        noct=panel_data.get('noct', REFERENCE_PANEL.noct),
+        efficiency=panel_data.get('efficiency', REFERENCE_PANEL.efficiency),
+        low_light_loss=panel_data.get('low_light_loss', REFERENCE_PANEL.low_light_loss),
+    )
+
+
+def _air_temperature(lat, month, solar_hour):
+    # اقلیم تقریبی ایران: میانگین سالانه با عرض جغرافیایی کم می‌شود،
+    # بیشینه فصلی اواسط ژوئیه و بیشینه روزانه حدود ساعت ۱۵.
+    annual_mean = 27 - 0.9 * (lat - 27)
+    seasonal = -12 * np.cos(2 * np.pi * (month - 1.5) / 12)
+    diurnal = 6 * np.cos(2 * np.pi * (solar_hour - 15) / 24)
+    return annual_mean + seasonal + diurnal
+
+
+@lru_cache(maxsize=64)
+def site_weather(lat, lon):
+    """سری ساعتی تابش و دمای یک سال نمونه برای یک نقطه (با کش)."""
+    import pandas as pd
+    import pvlib
+
+    times = pd.date_range(f"{SIM_YEAR}-01-01 00:30", periods=8760, freq="h", tz="UTC")
+    location = pvlib.location.Location(lat, lon)
+    solpos = location.get_solarposition(times)
+    clearsky = location.get_clearsky(times, model="ineichen", solar_position=solpos)
+
+    month = times.month.to_numpy()
+    zenith = solpos["apparent_zenith"].to_numpy()
+    doy = times.dayofyear.to_numpy()
+    weather = {
+        'month': month,
+        'doy': doy,
+        'zenith': zenith,
+        'solar_azimuth': solpos["azimuth"].to_numpy(),
+        'clearsky_ghi': clearsky["ghi"].to_numpy(),
+        'dni_extra': np.asarray(pvlib.irradiance.get_extra_radiation(doy)),
+        'source': None,
+    }
+
+    from .tmy import tmy_weather
+
+    tmy = tmy_weather(lat, lon)
+    if tmy is not None:
+        # نمای float32 فایل memory-map؛ محاسبات pvlib خودشان به float64 می‌برند
+        weather.update(tmy['columns'], source=f"TMY {tmy['name']}")
+        return weather
+
+    ghi = weather['clearsky_ghi'] * CLEARSKY_INDEX[month - 1]
+    split = pvlib.irradiance.erbs(ghi, zenith, doy)
+    solar_hour = (times.hour.to_numpy() + 0.5 + lon / 15) % 24
+    weather.update(
+        ghi=ghi,
+        dni=np.asarray(split["dni"]),
+        dhi=np.asarray(split["dhi"]),
+        temp_air=_air_temperature(lat, month, solar_hour),
+        wind_speed=np.full(8760, WIND_SPEED),
+    )
+    return weather
+
+
+def plane_of_array(weather, tilt, azimuth=180):
+    import pvlib
+
+    poa = pvlib.irradiance.get_total_irradiance(
+        tilt, azimuth, weather['zenith'], weather['solar_azimuth'],
+        weather['dni'], weather['ghi'], weather['dhi'],
+        dni_extra=weather['dni_extra'], model="haydavies", albedo=ALBEDO,
+    )
+    return {k: np.nan_to_num(np.asarray(poa[k])) for k in ("poa_global", "poa_direct", "poa_diffuse")}
+
+
+def pv_output(poa_global, weather, capacity_kw=1.0, gamma_pdc=GAMMA_PDC, panel=None):
+    """انرژی خروجی AC هر ساعت (kWh) از تابش صفحه و دمای هوا؛ با panel مدل دمایی و نور کم آن پنل."""
+    import pvlib
+
+    if panel is None:
+        temp_cell = pvlib.temperature.sapm_cell(
+            poa_global, weather['temp_air'], weather['wind_speed'], SAPM_A, SAPM_B, SAPM_DT,
+        )
+        dc = pvlib.pvsystem.pvwatts_dc(poa_global, temp_cell, capacity_kw * 1000, gamma_pdc)
+        return np.asarray(dc) * (1 - SYSTEM_LOSS) / 1000
+
+    temp_cell = pvlib.temperature.noct_sam(
+        poa_global, weather['temp_air'], weather['wind_speed'], panel.noct, panel.efficiency / 100,
+    )
+    dc = pvlib.pvsystem.pvwatts_dc(poa_global, temp_cell, capacity_kw * 1000, panel.temp_coefficient / 100)
+    # بازده نسبی لگاریتمی: ۱ در ۱۰۰۰ W/m² و 1 - low_light_loss در ۲۰۰ W/m²
+    relative = 1 + panel.low_light_loss / np.log(5) * np.log(np.maximum(poa_global, 1.0) / 1000)
+    return np.asarray(dc) * np.clip(relative, 0.0, None) * (1 - SYSTEM_LOSS) / 1000
+
+
+def simulate_hourly(lat, lon, tilt=35, azimuth=180, capacity_kw=1.0, horizon=None, panel=None):
+    weather = site_weather(round(lat, 2), round(lon, 2))
+    poa = plane_of_array(weather, tilt, azimuth)
+    if horizon:
+        from .shading import shaded_poa
+
+        return pv_output(shaded_poa(poa, weather, horizon), weather, capacity_kw, panel=panel)
+    return pv_output(poa['poa_global'], weather, capacity_kw, panel=panel)
+
+
+def monthly_totals(hourly, month):
+    sums = np.bincount(month - 1, weights=hourly, minlength=12)
+    return {MILADI_TO_SHAMSI_NAME[i + 1]: float(sums[i]) for i in range(12)}
+
+
+@lru_cache(maxsize=256)
+def specific_hourly(lat, lon, tilt, azimuth, horizon=None, panel=None):
+    """خروجی ساعتی یک kWp (قبل از محدودیت اینورتر)؛ آرایه فقط‌خواندنی و کش‌شده."""
+    hourly = simulate_hourly(lat, lon, tilt, azimuth, horizon=horizon, panel=panel)
+    hourly.setflags(write=False)
+    return hourly
+
+
+@lru_cache(maxsize=256)
+def _specific_production(lat, lon, tilt, azimuth):
+    weather = site_weather(lat, lon)
+    hourly = specific_hourly(lat, lon, tilt, azimuth)
+    return float(hourly.sum()), monthly_totals(hourly, weather['month']), weather['source']
+
+
+@lru_cache(maxsize=64)
+def clear_day_weather(lat, lon):
+    """همان سری site_weather با تابش آسمان صاف (روزهای کاملاً صاف)."""
+    import pvlib
+
+    weather = site_weather(lat, lon)
+    ghi = weather['clearsky_ghi']
+    split = pvlib.irradiance.erbs(ghi, weather['zenith'], weather['doy'])
+    return {**weather, 'ghi': ghi, 'dni': np.asarray(split["dni"]), 'dhi': np.asarray(split["dhi"])}
+
+
+@lru_cache(maxsize=1024)
+def clipping_losses(lat, lon, tilt, azimuth, dc_ac_ratio):
+    """سهم انرژی بریده‌شده هر ماه وقتی توان AC اینورتر = ظرفیت DC ÷ dc_ac_ratio.
+
+    سری میانگین ماهانه قله‌ها را صاف می‌کند؛ پس هر ماه ترکیبی از روزهای کاملاً صاف (به نسبت
+    شاخص آسمان صاف) و روزهای ابری بدون بریدگی فرض می‌شود. قله‌های کوتاه‌تر از یک ساعت دیده نمی‌شوند.
+    """
+    lat, lon = round(lat, 2), round(lon, 2)
+    weather = clear_day_weather(lat, lon)
+    clear = pv_output(plane_of_array(weather, tilt, azimuth)['poa_global'], weather)
+    # خروجی AC هر kWp DC (با تلفات سیستم) در برابر سقف 1/dc_ac_ratio
+    clipped = np.maximum(clear - 1 / dc_ac_ratio, 0.0) * CLEARSKY_INDEX[weather['month'] - 1]
+    produced = np.bincount(weather['month'] - 1, weights=specific_hourly(lat, lon, tilt, azimuth), minlength=12)
+    lost = np.bincount(weather['month'] - 1, weights=clipped, minlength=12)
+    fractions = np.divide(lost, produced, out=np.zeros(12), where=produced > 0)
+    return {MILADI_TO_SHAMSI_NAME[i + 1]: float(min(f, 1.0)) for i, f in enumerate(fractions)}
+
+
+@lru_cache(maxsize=256)
+def shading_losses(lat, lon, tilt, azimuth, horizon):
+    """سهم تولید هر ماه که پشت پروفیل افق (Horizon) از دست می‌رود."""
+    lat, lon = round(lat, 2), round(lon, 2)
+    month = site_weather(lat, lon)['month'] - 1
+    open_sky = np.bincount(month, weights=specific_hourly(lat, lon, tilt, azimuth), minlength=12)
+    shaded = np.bincount(month, weights=specific_hourly(lat, lon, tilt, azimuth, horizon), minlength=12)
+    fractions = 1 - np.divide(shaded, open_sky, out=np.ones(12), where=open_sky > 0)
+    return {MILADI_TO_SHAMSI_NAME[i + 1]: float(np.clip(f, 0.0, 1.0)) for i, f in enumerate(fractions)}
+
+
+@lru_cache(maxsize=512)
+def panel_factors(lat, lon, tilt, azimuth, panel):
+    """نسبت تولید هر ماه پنل (PanelModel) به پنل مرجع در همان نقطه و جهت."""
+    lat, lon = round(lat, 2), round(lon, 2)
+    weather = site_weather(lat, lon)
+    poa = plane_of_array(weather, tilt, azimuth)['poa_global']
+    month = weather['month'] - 1
+    own = np.bincount(month, weights=pv_output(poa, weather, panel=panel), minlength=12)
+    reference = np.bincount(month, weights=pv_output(poa, weather, panel=REFERENCE_PANEL), minlength=12)
+    ratio = np.divide(own, reference, out=np.ones(12), where=reference > 0)
+    return {MILADI_TO_SHAMSI_NAME[i + 1]: float(r) for i, r in enumerate(ratio)}
+
+
+def calculate_production(lat, lon, capacity_kw, tilt=35, azimuth=180):
+    yearly, monthly, weather_source = _specific_production(round(lat, 2), round(lon, 2), tilt, azimuth)
+    return {
+        'success': True,
+        'yearly': yearly * capacity_kw,
+        'monthly': {m: v * capacity_kw for m, v in monthly.items()},
+        'source': f"{weather_source} (pvlib)" if weather_source else 'محاسبه محلی (pvlib)',
+    }
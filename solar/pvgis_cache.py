@@ -0,0 +1,202 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from .geo import EARTH_RADIUS_KM, distance_km
+
+# ================== کش دیسکی PVGIS ==================
+# خروجی PVGIS نسبت به peakpower خطی است؛ پس فقط تولید ویژه (به ازای هر kWp) ذخیره می‌شود
+# و کلید آن خانه شبکه lat/lon و زاویه نصب است. فایل SQLite بین همه پروسه‌های سرور مشترک است.
+# اگر خانه خودش در کش نباشد، نزدیک‌ترین خانه محاسبه‌شده با همان زاویه تا شعاع REUSE_DISTANCE_KM
+# به جای درخواست تازه به کار می‌رود (دقت مکانی داده تابش PVGIS حدود ۵ کیلومتر است).
+
+DEFAULT_PATH = os.environ.get(
+    "SOLAR_PVGIS_CACHE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "pvgis.sqlite3"),
+)
+GRID_STEP = 0.01          # حدود ۱ کیلومتر
+TTL_SECONDS = 30 * 86400  # داده اقلیمی PVGIS به‌ندرت تغییر می‌کند
+MAX_ENTRIES = 50_000
+REUSE_DISTANCE_KM = float(os.environ.get("SOLAR_REUSE_KM", 3.0))   # ۰: خاموش
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pvgis (
+    lat_cell REAL NOT NULL,
+    lon_cell REAL NOT NULL,
+    tilt REAL NOT NULL,
+    aspect REAL NOT NULL,
+    record TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (lat_cell, lon_cell, tilt, aspect)
+);
+CREATE INDEX IF NOT EXISTS pvgis_accessed ON pvgis (accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), ('reused', 0);
+"""
+
+
+def snap(value, step=GRID_STEP):
+    return round(round(value / step) * step, 6)
+
+
+def scale_record(record, peak_power_kw):
+    """رکورد به ازای هر kWp را به ظرفیت درخواستی تبدیل می‌کند."""
+    result = {
+        'success': True,
+        'yearly': record['yearly'] * peak_power_kw,
+        'monthly': {m: v * peak_power_kw for m, v in record['monthly'].items()},
+        'source': record.get('source', 'PVGIS'),
+    }
+    if 'monthly_sd' in record:
+        result['monthly_sd'] = {m: v * peak_power_kw for m, v in record['monthly_sd'].items()}
+    return result
+
+
+class PVGISCache:
+    def __init__(self, path=DEFAULT_PATH, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES, grid_step=GRID_STEP):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.grid_step = grid_step
+        self.hits = 0
+        self.misses = 0
+        self.reused = 0
+        self._local = threading.local()
+        self._puts = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def cell(self, lat, lon):
+        return snap(lat, self.grid_step), snap(lon, self.grid_step)
+
+    def _count(self, name):
+        setattr(self, name, getattr(self, name) + 1)
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name=?", (name,))
+
+    def get(self, lat, lon, tilt, aspect=0, count_miss=True):
+        lat_cell, lon_cell = self.cell(lat, lon)
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT record FROM pvgis WHERE lat_cell=? AND lon_cell=? AND tilt=? AND aspect=? AND created_at>=?",
+            (lat_cell, lon_cell, tilt, aspect, now - self.ttl),
+        ).fetchone()
+        if row is None:
+            if count_miss:
+                self._count("misses")
+            return None
+        with conn:
+            self.hits += 1
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name='hits'")
+            conn.execute(
+                "UPDATE pvgis SET accessed_at=? WHERE lat_cell=? AND lon_cell=? AND tilt=? AND aspect=?",
+                (now, lat_cell, lon_cell, tilt, aspect),
+            )
+        return json.loads(row[0])
+
+    def lookup(self, lat, lon, tilt, aspect=0, max_km=REUSE_DISTANCE_KM):
+        """get و اگر خانه خودش نبود nearest؛ miss فقط وقتی ثبت می‌شود که هیچ‌کدام جواب ندهند."""
+        record = self.get(lat, lon, tilt, aspect, count_miss=False) or self.nearest(lat, lon, tilt, aspect, max_km)
+        if record is None:
+            self._count("misses")
+        return record
+
+    def nearest(self, lat, lon, tilt, aspect=0, max_km=REUSE_DISTANCE_KM):
+        """رکورد نزدیک‌ترین خانه ذخیره‌شده با همین زاویه تا شعاع max_km (با منبع «سایت همسایه») یا None."""
+        if max_km <= 0:
+            return None
+        dlat = max_km / (math.radians(1) * EARTH_RADIUS_KM)
+        dlon = dlat / max(math.cos(math.radians(abs(lat) + dlat)), 1e-6)
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT lat_cell, lon_cell, record FROM pvgis WHERE lat_cell BETWEEN ? AND ?"
+            " AND lon_cell BETWEEN ? AND ? AND tilt=? AND aspect=? AND created_at>=?",
+            (lat - dlat, lat + dlat, lon - dlon, lon + dlon, tilt, aspect, time.time() - self.ttl),
+        ).fetchall()
+        if not rows:
+            return None
+        cells = np.array([r[:2] for r in rows])
+        distance = distance_km(lat, lon, cells[:, 0], cells[:, 1])
+        i = int(np.argmin(distance))
+        if distance[i] > max_km:
+            return None
+        with conn:
+            self.reused += 1
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name='reused'")
+            conn.execute(
+                "UPDATE pvgis SET accessed_at=? WHERE lat_cell=? AND lon_cell=? AND tilt=? AND aspect=?",
+                (time.time(), rows[i][0], rows[i][1], tilt, aspect),
+            )
+        record = json.loads(rows[i][2])
+        record['source'] = f"{record.get('source', 'PVGIS')} (سایت همسایه، {distance[i]:.1f} km)"
+        return record
+
+    def put(self, lat, lon, tilt, record, aspect=0):
+        lat_cell, lon_cell = self.cell(lat, lon)
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pvgis VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (lat_cell, lon_cell, tilt, aspect, json.dumps(record, ensure_ascii=False), now, now),
+            )
+        self._puts += 1
+        if self._puts % 100 == 1:
+            self.evict()
+
+    def evict(self):
+        """حذف رکوردهای منقضی و سپس قدیمی‌ترین دسترسی‌ها تا سقف max_entries."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM pvgis WHERE created_at < ?", (time.time() - self.ttl,))
+            conn.execute(
+                "DELETE FROM pvgis WHERE rowid IN ("
+                " SELECT rowid FROM pvgis ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM pvgis")
+            conn.execute("UPDATE counters SET value = 0")
+        self.hits = self.misses = self.reused = 0
+
+    def stats(self):
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries = conn.execute("SELECT COUNT(*) FROM pvgis").fetchone()[0]
+        # پاسخ از سایت همسایه هم درخواستی است که به PVGIS نرسیده
+        answered = counters['hits'] + counters['reused']
+        total = answered + counters['misses']
+        return {
+            'entries': entries,
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'reused': counters['reused'],
+            'hit_rate': answered / total if total else 0.0,
+            'process_hits': self.hits,
+            'process_misses': self.misses,
+            'process_reused': self.reused,
+        }
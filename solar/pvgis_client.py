@@ -0,0 +1,184 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .months import MILADI_TO_SHAMSI_NAME
+
+# ================== کلاینت PVGIS ==================
+# یک Session مشترک با استخر اتصال، سقف درخواست هم‌زمان، تلاش مجدد با backoff نمایی،
+# قطع‌کن مدار (circuit breaker) برای زمان از دسترس خارج بودن سرویس، و ادغام درخواست‌های
+# یکسان در حال اجرا (single-flight). آدرس سرویس برای تست با سرور محلی قابل تغییر است.
+
+PVGIS_URL = os.environ.get("PVGIS_URL", "https://re.jrc.ec.europa.eu/api/v5_2/PVcalc")
+
+
+class PVGISError(Exception):
+    pass
+
+
+class CircuitOpenError(PVGISError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probe = None   # شناسه رشته درخواست آزمایشی در حال اجرا در حالت half-open
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        # در حالت half-open فقط یک درخواست آزمایشی عبور می‌کند و بقیه تا پایان آن فوراً رد می‌شوند؛
+        # نتیجه آن مدار را می‌بندد یا دوباره باز می‌کند
+        with self._lock:
+            state = self.state
+            if state == "half-open" and self._probe is None:
+                self._probe = threading.get_ident()
+                return True
+            return state == "closed"
+
+    def release(self):
+        """پایان درخواست این رشته بدون نتیجه (مثلاً خطای ورودی)؛ جای آزمایش بعدی آزاد می‌شود."""
+        with self._lock:
+            if self._probe == threading.get_ident():
+                self._probe = None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe = None
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+def parse_response(data):
+    """پاسخ JSON سرویس PVcalc را به رکورد تولید (نام ماه شمسی → kWh) تبدیل می‌کند."""
+    monthly_production = {}
+    monthly_sd = {}
+    for month_data in data['outputs']['monthly']['fixed']:
+        month_name = MILADI_TO_SHAMSI_NAME[month_data['month']]
+        monthly_production[month_name] = month_data['E_m']
+        # انحراف معیار سال‌به‌سال تولید ماه (kWh)
+        if 'SD_m' in month_data:
+            monthly_sd[month_name] = month_data['SD_m']
+    yearly = data['outputs']['totals']['fixed']['E_y']
+    record = {'yearly': yearly, 'monthly': monthly_production, 'source': 'PVGIS'}
+    if monthly_sd:
+        record['monthly_sd'] = monthly_sd
+    return record
+
+
+class PVGISClient:
+    def __init__(self, base_url=PVGIS_URL, timeout=(3.05, 20), max_concurrency=4, retries=2,
+                 backoff=0.5, max_backoff=8.0, breaker=None, pool_size=8):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.coalesced = 0
+
+    def fetch_per_kwp(self, lat, lon, tilt, aspect=0):
+        """تولید به ازای ۱ kWp؛ درخواست‌های هم‌زمان برای یک نقطه فقط یک بار ارسال می‌شوند."""
+        key = (lat, lon, tilt, aspect)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            record = self._fetch(lat, lon, tilt, aspect)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(record)
+            return record
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _fetch(self, lat, lon, tilt, aspect):
+        if not self.breaker.allow():
+            raise CircuitOpenError("PVGIS در دسترس نیست (مدار باز)")
+        try:
+            return self._request(lat, lon, tilt, aspect)
+        finally:
+            self.breaker.release()
+
+    def _request(self, lat, lon, tilt, aspect):
+        params = {
+            "lat": lat, "lon": lon, "peakpower": 1,
+            "loss": 14, "mountingplace": "building", "angle": tilt,
+            "aspect": aspect, "outputformat": "json", "pvcalculation": 1,
+        }
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+            try:
+                with self._semaphore:
+                    self.requests_sent += 1
+                    response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = PVGISError(f"خطای ارتباط با PVGIS: {e}")
+                continue
+
+            if response.status_code == 200:
+                try:
+                    record = parse_response(response.json())
+                except (ValueError, KeyError, TypeError) as e:
+                    error = PVGISError(f"پاسخ نامعتبر PVGIS: {e}")
+                    continue
+                self.breaker.record_success()
+                return record
+
+            error = PVGISError(f"PVGIS HTTP {response.status_code}")
+            if 400 <= response.status_code < 500 and response.status_code != 429:
+                # خطای ورودی (مثلاً نقطه روی دریا) نشانه خرابی سرویس نیست
+                raise error
+
+        self.breaker.record_failure()
+        raise error
+
+    def close(self):
+        self.session.close()
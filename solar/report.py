@@ -0,0 +1,254 @@
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from .formatting import format_currency, persian_numbers, to_persian_number
+from .months import MONTHS_ORDER
+
+# ================== جدول ماهانه و خروجی گزارش ==================
+# جدول ماه‌به‌ماه کل قرارداد (تولید، نرخ، درآمد، جریان نقدی تجمعی) مستقیماً از آرایه‌های جریان نقدی سناریو
+# ساخته می‌شود و ستون‌ها یک‌جا به متن فارسی تبدیل می‌شوند. گزارش Excel و PDF (با فونت خود برنامه) هر
+# سناریو فقط یک بار ساخته و با کلید سناریو در EXPORT_DIR نگه داشته می‌شود؛ چون کلید هش ورودی‌ها و نسخه
+# مدل است، فایل ذخیره‌شده همیشه با نتیجه یکی است. REPORT_VERSION با تغییر قالب گزارش بالا می‌رود.
+# Excel با xlsxwriter (برگه‌های راست‌به‌چپ، اعداد به شکل عدد) و PDF با fpdf2 ساخته می‌شود؛ متن PDF پیش از
+# نوشتن با arabic-reshaper شکل‌دهی و با الگوریتم دوسویه fpdf2 به ترتیب نمایشی چیده می‌شود و زیرمجموعه فونت
+# همراه نقشه ToUnicode جاسازی می‌شود تا متن قابل جست‌وجو و کپی باشد.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_PATH = os.path.join(ROOT, "IRANYekanX-Bold.ttf")
+EXPORT_DIR = os.environ.get("SOLAR_EXPORT_DIR", os.path.join(ROOT, ".cache", "exports"))
+REPORT_VERSION = 2
+FONT_NAME = "IRANYekanX"
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+# کلید → (سرستون، نوع ستون XLSX text/int/float/auto، پهنای XLSX، پهنای PDF به pt)
+DETAIL_COLUMNS = {
+    'year': ("سال", "int", 6, 40),
+    'month': ("ماه", "text", 12, 65),
+    'production': ("تولید (kWh)", "int", 14, 75),
+    'rate': ("نرخ (تومان/kWh)", "int", 16, 85),
+    'income': ("درآمد (تومان)", "int", 18, 105),
+    'cumulative_cash': ("جریان نقدی تجمعی (تومان)", "int", 24, 125),
+}
+YEARLY_COLUMNS = {
+    'year': ("سال", "int", 6, 60),
+    'production': ("تولید (kWh)", "int", 14, 120),
+    'income': ("درآمد (تومان)", "int", 18, 150),
+    'cumulative_cash': ("جریان نقدی تجمعی (تومان)", "int", 24, 165),
+}
+
+
+def monthly_detail(scenario):
+    """ستون‌های ماه‌به‌ماه کل قرارداد (۱۲ × سال‌ها ردیف)."""
+    cashflow = scenario.cashflow
+    months = len(cashflow.monthly_income)
+    return {
+        'year': np.arange(months) // 12 + 1,
+        'month': np.array(MONTHS_ORDER * (months // 12)),
+        'production': cashflow.monthly_production,
+        'rate': cashflow.monthly_rate,
+        'income': cashflow.monthly_income,
+        'cumulative_cash': np.cumsum(cashflow.monthly_income) - scenario.metrics.initial_cost,
+    }
+
+
+def yearly_detail(scenario):
+    cashflow = scenario.cashflow
+    return {
+        'year': np.arange(1, len(cashflow.yearly_income) + 1),
+        'production': cashflow.yearly_production,
+        'income': cashflow.yearly_income,
+        'cumulative_cash': np.cumsum(cashflow.yearly_income) - scenario.metrics.initial_cost,
+    }
+
+
+def format_columns(detail, columns=DETAIL_COLUMNS):
+    """{سرستون: فهرست متن فارسی}؛ هر ستون عددی با یک فراخوانی persian_numbers تبدیل می‌شود."""
+    return {title: persian_numbers(detail[key]) if kind != "text" else detail[key].tolist()
+            for key, (title, kind, _, _) in columns.items()}
+
+
+def summary_items(scenario):
+    """[(عنوان، مقدار عددی یا متن، واحد), ...] برای سربرگ گزارش."""
+    design, production, metrics = scenario.design, scenario.production, scenario.metrics
+    inverter = design.inverter or {}
+    return [
+        ("محل", scenario.label, ""),
+        ("مختصات", f"{scenario.inputs['lat']:.4f}, {scenario.inputs['lon']:.4f}", ""),
+        ("ظرفیت", design.capacity_kw, "kW"),
+        ("پنل", f"{design.panel_count} × {design.panel_name} ({design.panel_power}W)", ""),
+        ("اینورتر", inverter.get('model', "—"), ""),
+        ("جدول تعرفه", scenario.inputs.get('schedule') or "پیش‌فرض", ""),
+        ("هزینه احداث", metrics.initial_cost, "تومان"),
+        ("تولید سالانه", production.yearly, "kWh"),
+        ("منبع داده", production.source, ""),
+        ("درآمد کل قرارداد", metrics.total_income, "تومان"),
+        ("سود خالص", metrics.profit, "تومان"),
+        ("بازگشت سرمایه", metrics.payback_years, "سال"),
+        ("ارزش فعلی خالص (NPV)", metrics.npv, "تومان"),
+        ("نرخ بازده داخلی (IRR)", None if metrics.irr is None else metrics.irr * 100, "٪"),
+        ("هزینه تراز شده برق (LCOE)", metrics.lcoe, "تومان/kWh"),
+        ("کلید سناریو", scenario.key, ""),
+    ]
+
+
+def _rows(detail, columns):
+    return zip(*(detail[key].tolist() for key in columns))
+
+
+# نوع ستون → قالب عدد XLSX؛ ستون auto (مقدار خلاصه) عدد را با قالب float و متن را بدون قالب می‌نویسد
+NUMBER_FORMATS = {"text": None, "int": "#,##0", "float": "#,##0.00", "auto": "#,##0.00"}
+SUMMARY_COLUMNS = [("شاخص", "text", 26), ("مقدار", "auto", 40), ("واحد", "text", 12)]
+
+
+def _write_sheet(workbook, name, columns, rows, formats):
+    sheet = workbook.add_worksheet(name[:31])
+    sheet.right_to_left()
+    sheet.freeze_panes(1, 0)
+    for c, (title, kind, width) in enumerate(columns):
+        sheet.set_column(c, c, width, formats[kind])
+        sheet.write_string(0, c, title, formats["header"])
+    kinds = [kind for _, kind, _ in columns]
+    for r, row in enumerate(rows, start=1):
+        for c, (value, kind) in enumerate(zip(row, kinds)):
+            if value is None or value != value:   # None و NaN خانه خالی می‌شوند
+                sheet.write_blank(r, c, None, formats[kind])
+            elif isinstance(value, str):
+                sheet.write_string(r, c, value, formats["text"])
+            else:
+                sheet.write_number(r, c, value, formats[kind])
+
+
+def write_report_xlsx(scenario, f):
+    import xlsxwriter
+
+    # ردیف‌ها به ترتیب نوشته می‌شوند، پس هر ردیف پس از نوشتن از حافظه بیرون می‌رود
+    workbook = xlsxwriter.Workbook(f, {'constant_memory': True})
+    formats = {kind: workbook.add_format({'font_name': FONT_NAME, **({'num_format': fmt} if fmt else {})})
+               for kind, fmt in NUMBER_FORMATS.items()}
+    formats["header"] = workbook.add_format({'font_name': FONT_NAME, 'bold': True, 'bg_color': "#FFE0B2"})
+    summary = [(title, "—" if value is None else value, unit) for title, value, unit in summary_items(scenario)]
+    _write_sheet(workbook, "خلاصه", SUMMARY_COLUMNS, summary, formats)
+    _write_sheet(workbook, "سالانه", [spec[:3] for spec in YEARLY_COLUMNS.values()],
+                 _rows(yearly_detail(scenario), YEARLY_COLUMNS), formats)
+    _write_sheet(workbook, "ماهانه", [spec[:3] for spec in DETAIL_COLUMNS.values()],
+                 _rows(monthly_detail(scenario), DETAIL_COLUMNS), formats)
+    workbook.close()
+
+
+def _summary_text(value, unit):
+    if value is None:
+        return "—"
+    if isinstance(value, str):
+        return value
+    if unit == "تومان":
+        return f"{format_currency(value)} تومان"
+    return f"{to_persian_number(round(value, 2))} {unit}"
+
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89   # A4 (pt)
+MARGIN = 50
+ROW_HEIGHT = 15
+FONT_SIZE = 9
+# نویسه‌هایی که فونت برنامه گلیف ندارد → نزدیک‌ترین نویسه موجود
+_FALLBACK = str.maketrans("—–", "--")
+_MIRROR = str.maketrans("()[]«»<>", ")(][»«><")
+# عدد تنها (بیشتر خانه‌های جدول) در هر جهتی همان ترتیب منطقی را دارد و از الگوریتم دوسویه نمی‌گذرد
+_NUMBER = re.compile(r"^-?[0-9۰-۹][0-9۰-۹,.]*$")
+
+
+@lru_cache(maxsize=4096)
+def _visual(text):
+    """متن منطقی → شکل‌های ارائه به ترتیب نمایشی؛ پرانتزهای بخش راست‌به‌چپ قرینه می‌شوند."""
+    import arabic_reshaper
+    from fpdf.bidi import BidiParagraph
+
+    text = str(text)
+    if _NUMBER.match(text):
+        return text
+    chars = BidiParagraph(arabic_reshaper.reshape(text.translate(_FALLBACK))).reorder_resolved_levels()
+    return "".join(c.character.translate(_MIRROR) if c.embedding_level % 2 else c.character for c in chars)
+
+
+def _line(pdf, y, text, size, align="R"):
+    """یک خط متن بین دو حاشیه صفحه؛ y لبه بالای خط است."""
+    pdf.set_font_size(size)
+    pdf.set_xy(MARGIN, y)
+    pdf.cell(PAGE_WIDTH - 2 * MARGIN, size * 1.5, _visual(text), align=align)
+
+
+def _table(pdf, top, columns, rows):
+    """جدول راست‌به‌چپ از لبه راست صفحه (ستون اول در راست)؛ y پایین آخرین ردیف برمی‌گردد."""
+    widths = [width for _, _, _, width in columns.values()][::-1]
+    left = PAGE_WIDTH - MARGIN - sum(widths)
+    pdf.set_font_size(FONT_SIZE)
+    y = top
+    for i, cells in enumerate([[title for title, _, _, _ in columns.values()], *rows]):
+        pdf.set_xy(left, y)
+        for width, text in zip(widths, reversed(cells)):
+            pdf.cell(width, ROW_HEIGHT, _visual(text), border="B", align="C", fill=i == 0)
+        y += ROW_HEIGHT
+    return y
+
+
+def write_report_pdf(scenario, f):
+    from fpdf import FPDF
+
+    pdf = FPDF(unit="pt", format="A4")
+    pdf.set_auto_page_break(False)
+    pdf.set_margins(MARGIN, MARGIN)
+    pdf.add_font(FONT_NAME, fname=FONT_PATH)
+    pdf.set_font(FONT_NAME, size=FONT_SIZE)
+    pdf.set_fill_color(224)
+    pdf.set_draw_color(191)
+    pdf.set_line_width(0.4)
+
+    def new_page():
+        pdf.add_page()
+        _line(pdf, PAGE_HEIGHT - MARGIN / 2 - 8, f"صفحه {to_persian_number(pdf.page_no())}", 8, align="C")
+
+    new_page()
+    y = MARGIN
+    _line(pdf, y, f"گزارش نیروگاه خورشیدی — {scenario.label}", 16)
+    created = time.strftime("%Y-%m-%d %H:%M", time.localtime(scenario.created_at or time.time()))
+    _line(pdf, y + 4, to_persian_number(created), 9, align="L")
+    y += 36
+    for title, value, unit in summary_items(scenario):
+        _line(pdf, y, f"{title}: {_summary_text(value, unit)}", 10)
+        y += 16
+
+    y += 12
+    _line(pdf, y, "جدول سالانه", 12)
+    yearly = format_columns(yearly_detail(scenario), YEARLY_COLUMNS)
+    _table(pdf, y + 22, YEARLY_COLUMNS, zip(*yearly.values()))
+
+    monthly = list(zip(*format_columns(monthly_detail(scenario)).values()))
+    per_page = int((PAGE_HEIGHT - 2 * MARGIN - 30) // ROW_HEIGHT) - 1
+    for start in range(0, len(monthly), per_page):
+        new_page()
+        _line(pdf, MARGIN, "جدول ماهانه", 12)
+        _table(pdf, MARGIN + 22, DETAIL_COLUMNS, monthly[start:start + per_page])
+    f.write(pdf.output())
+
+
+WRITERS = {"xlsx": write_report_xlsx, "pdf": write_report_pdf}
+
+
+def export_report(scenario, fmt):
+    """bytes گزارش xlsx یا pdf؛ برای هر سناریو فقط بار اول ساخته می‌شود."""
+    path = os.path.join(EXPORT_DIR, f"{scenario.key}-r{REPORT_VERSION}.{fmt}")
+    if not os.path.exists(path):
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            WRITERS[fmt](scenario, f)
+        os.replace(tmp, path)
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,191 @@
+import dataclasses
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from .pipeline import CashFlow, Metrics, Production, SystemDesign
+from .shading import Horizon
+
+# ================== انبار سناریوها ==================
+# هر محاسبه با هش ورودی‌هایش (همان ورودی‌های گراف مراحل، به شکل JSON مرتب) کلید می‌خورد و نتیجه کامل
+# آن (طراحی، تولید ماهانه، جریان نقدی ماهانه و سالانه، شاخص‌ها) در SQLite ذخیره می‌شود: آرایه‌ها به شکل
+# npz فشرده و بقیه به شکل JSON. ورودی یکسان همیشه همان کلید را می‌دهد، پس ?scenario=<کلید> در نشانی
+# صفحه نتیجه را بدون محاسبه دوباره باز می‌کند و سناریوهای ذخیره‌شده کنار هم مقایسه می‌شوند.
+# MODEL_VERSION با هر تغییر مدل محاسبه بالا می‌رود تا کلیدهای قدیمی دیگر استفاده نشوند؛ نسخه مدل در خود
+# ردیف هم ذخیره می‌شود و ردیفی با نسخه دیگر (یا ساختار قدیمی) هنگام خواندن کهنه حساب و حذف می‌شود.
+
+DEFAULT_PATH = os.environ.get(
+    "SOLAR_SCENARIO_STORE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "scenarios.sqlite3"),
+)
+MODEL_VERSION = 1
+MAX_ENTRIES = 5_000
+KEY_LENGTH = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    key TEXT PRIMARY KEY,
+    label TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    arrays BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scenarios_accessed ON scenarios (accessed_at);
+"""
+_ARRAYS = ("monthly_production", "monthly_rate", "monthly_income", "yearly_production", "yearly_income")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} قابل ذخیره نیست")
+
+
+def scenario_inputs(params):
+    """ورودی‌های گراف مراحل → dict قابل JSON (افق به شکل فهرست نقاط و موانع)."""
+    inputs = dict(params)
+    horizon = inputs.get('horizon')
+    if isinstance(horizon, Horizon):
+        inputs['horizon'] = {'points': [list(p) for p in horizon.points],
+                             'obstacles': [list(o) for o in horizon.obstacles]} if horizon else None
+    return inputs
+
+
+def inputs_horizon(inputs):
+    """عکس scenario_inputs برای افق: Horizon یا None."""
+    horizon = inputs.get('horizon')
+    if not horizon:
+        return None
+    return Horizon(tuple(map(tuple, horizon['points'])), tuple(map(tuple, horizon['obstacles'])))
+
+
+def scenario_key(inputs):
+    payload = json.dumps({'model': MODEL_VERSION, **inputs}, sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:KEY_LENGTH]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    key: str
+    inputs: dict
+    label: str
+    design: SystemDesign
+    production: Production
+    cashflow: CashFlow
+    metrics: Metrics
+    created_at: float = 0.0
+
+    def summary(self) -> dict:
+        """یک ردیف جدول مقایسه سناریوها."""
+        return {
+            'key': self.key, 'label': self.label, 'created_at': self.created_at,
+            'capacity_kw': self.design.capacity_kw, 'panel_name': self.design.panel_name,
+            'yearly_production': self.production.yearly, **dataclasses.asdict(self.metrics),
+        }
+
+
+def _pack(scenario):
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **{name: getattr(scenario.cashflow, name) for name in _ARRAYS})
+    meta = {
+        'model': MODEL_VERSION,
+        'inputs': scenario.inputs,
+        'design': dataclasses.asdict(scenario.design),
+        'production': dataclasses.asdict(scenario.production),
+        'metrics': dataclasses.asdict(scenario.metrics),
+    }
+    return json.dumps(meta, ensure_ascii=False, default=_json_default), buffer.getvalue()
+
+
+def _unpack(key, label, meta, arrays, created_at):
+    """Scenario یا None برای ردیف کهنه (نسخه مدل دیگر یا ساختار ناسازگار)."""
+    meta = json.loads(meta)
+    if meta.get('model') != MODEL_VERSION:
+        return None
+    try:
+        with np.load(io.BytesIO(arrays), allow_pickle=False) as data:
+            cashflow = CashFlow(**{name: data[name] for name in _ARRAYS})
+        return Scenario(key, meta['inputs'], label, SystemDesign(**meta['design']), Production(**meta['production']),
+                        cashflow, Metrics(**meta['metrics']), created_at)
+    except (KeyError, TypeError):
+        return None
+
+
+class ScenarioStore:
+    def __init__(self, path=DEFAULT_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def put(self, scenario):
+        meta, arrays = _pack(scenario)
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO scenarios VALUES (?, ?, ?, ?, ?, ?)",
+                         (scenario.key, scenario.label, meta, arrays, scenario.created_at or now, now))
+        self._puts += 1
+        if self._puts % 100 == 1:
+            self.evict()
+        return scenario.key
+
+    def get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT key, label, meta, arrays, created_at FROM scenarios WHERE key=?",
+                           (key,)).fetchone()
+        if row is None:
+            return None
+        scenario = _unpack(*row)
+        with conn:
+            if scenario is None:
+                conn.execute("DELETE FROM scenarios WHERE key=?", (key,))
+            else:
+                conn.execute("UPDATE scenarios SET accessed_at=? WHERE key=?", (time.time(), key))
+        return scenario
+
+    def recent(self, limit=50):
+        """[(کلید، برچسب، زمان ساخت), ...] از تازه‌ترین دسترسی."""
+        return self._conn().execute(
+            "SELECT key, label, created_at FROM scenarios ORDER BY accessed_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def evict(self):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM scenarios WHERE key IN ("
+                " SELECT key FROM scenarios ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM scenarios WHERE key=?", (key,))
+
+
+@lru_cache(maxsize=None)
+def default_store():
+    return ScenarioStore()
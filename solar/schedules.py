@@ -0,0 +1,112 @@
+import glob
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+# ================== جدول‌های تعرفه ==================
+# هر نسخه از هر تعرفه یک فایل JSON با نام <name>-v<version>.json در solar/tariffs/ (و به‌صورت
+# اختیاری پوشه SOLAR_TARIFF_DIR) است:
+#   t_base, k2, annual_inflation, contract_years
+#   k_bands: [{"max_kw": 20, "k3": ..., "k4": ...}, ..., {"max_kw": null, ...}] ضریب‌ها بر اساس ظرفیت
+#   steps:   [{"after_year": 10, "rate_multiplier": 0.7, "annual_inflation": 0.15}, ...] تغییر پله‌ای
+# جدول به Tariff (dataclass تغییرناپذیر) تبدیل می‌شود و بردار نرخ ماهانه آن یک بار ساخته و کش می‌شود.
+
+TARIFF_DIRS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "tariffs")]
+if os.environ.get("SOLAR_TARIFF_DIR"):
+    TARIFF_DIRS.append(os.environ["SOLAR_TARIFF_DIR"])
+DEFAULT_SCHEDULE = "satba"
+_FILE_RE = re.compile(r"^(?P<name>.+)-v(?P<version>\d+)\.json$")
+
+
+@dataclass(frozen=True)
+class TariffSchedule:
+    name: str
+    version: int
+    title: str
+    t_base: float
+    k2: float
+    k_bands: tuple
+    annual_inflation: float
+    contract_years: int
+    steps: tuple = ()
+    effective_from: str | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    def band(self, capacity_kw):
+        for band in self.k_bands:
+            if band['max_kw'] is None or capacity_kw <= band['max_kw']:
+                return band
+        return self.k_bands[-1]
+
+
+def available_schedules():
+    """{name: [نسخه‌ها به ترتیب صعودی]}"""
+    found = {}
+    for directory in TARIFF_DIRS:
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            match = _FILE_RE.match(os.path.basename(path))
+            if match:
+                found.setdefault(match['name'], set()).add(int(match['version']))
+    return {name: sorted(versions) for name, versions in sorted(found.items())}
+
+
+def _parse(data):
+    return TariffSchedule(
+        name=data['name'],
+        version=int(data['version']),
+        title=data.get('title', data['name']),
+        t_base=float(data['t_base']),
+        k2=float(data.get('k2', 1.0)),
+        k_bands=tuple(
+            {'max_kw': band.get('max_kw'), 'k3': float(band.get('k3', 1.0)), 'k4': float(band.get('k4', 1.0))}
+            for band in data['k_bands']
+        ),
+        annual_inflation=float(data['annual_inflation']),
+        contract_years=int(data['contract_years']),
+        steps=tuple(sorted(
+            (int(step['after_year']), float(step.get('rate_multiplier', 1.0)), step.get('annual_inflation'))
+            for step in data.get('steps', [])
+        )),
+        effective_from=data.get('effective_from'),
+    )
+
+
+@lru_cache(maxsize=None)
+def load_schedule(name=DEFAULT_SCHEDULE, version=None):
+    """آخرین نسخه (یا نسخه داده‌شده) تعرفه name؛ «name@vN» هم پذیرفته می‌شود."""
+    if version is None and "@v" in name:
+        name, version = name.split("@v")
+    versions = available_schedules().get(name)
+    if not versions:
+        raise ValueError(f"جدول تعرفه {name} پیدا نشد")
+    version = versions[-1] if version is None else int(version)
+    for directory in reversed(TARIFF_DIRS):
+        path = os.path.join(directory, f"{name}-v{version}.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return _parse(json.load(f))
+    raise ValueError(f"نسخه {version} از جدول تعرفه {name} پیدا نشد")
+
+
+def tariff_for(capacity_kw, schedule=None):
+    """Tariff ضریب‌دار برای ظرفیت داده‌شده از جدول schedule (نام، «name@vN» یا TariffSchedule)."""
+    from .pipeline import Tariff
+
+    if not isinstance(schedule, TariffSchedule):
+        schedule = load_schedule(schedule or DEFAULT_SCHEDULE)
+    band = schedule.band(capacity_kw)
+    return Tariff(
+        contract_years=schedule.contract_years,
+        annual_inflation=schedule.annual_inflation,
+        k3=band['k3'],
+        k4=band['k4'],
+        t_base=schedule.t_base,
+        k2=schedule.k2,
+        steps=schedule.steps,
+        schedule=schedule.key,
+    )
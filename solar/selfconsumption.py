@@ -0,0 +1,182 @@
+import csv
+import io
+from dataclasses import dataclass
+
+import numpy as np
+
+from .cashflow import DEGRADATION, degradation_vector
+from .months import MILADI_TO_SHAMSI_NAME, MONTHS_ORDER
+from .tariff import RETAIL_ESCALATION, RETAIL_PRICE
+
+# ================== مصرف خودی و خالص‌سنجی ساعتی ==================
+# تولید ساعتی (شکل پروفیل pvlib، هم‌اندازه با تولید ماهانه منبع داده) با پروفیل بار ۸۷۶۰ ساعته
+# مقایسه می‌شود: برق مصرف‌شده در محل با تعرفه مصرف صرفه‌جویی و مازاد با نرخ ساتبا فروخته می‌شود.
+# همه سال‌های قرارداد آرایه (Y, 8760) هستند؛ باتری چون حالت شارژ دارد ساعت‌به‌ساعت ولی برای
+# همه سال‌ها هم‌زمان شبیه‌سازی می‌شود. سری‌ها به وقت UTC (همان سری تابش) هستند.
+
+HOURS = 8760
+IRAN_UTC_OFFSET = 3.5
+BATTERY_COST_PER_KWH = 12_000_000   # تومان
+ARCHETYPES = {
+    "household": "خانگی",
+    "commercial": "تجاری/اداری",
+    "industrial": "صنعتی دوشیفت",
+}
+DEFAULT_CONSUMPTION = {"household": 4_000, "commercial": 25_000, "industrial": 120_000}   # kWh/سال
+
+# ماه میلادی هر ساعت سال نمونه (۲۰۲۳، غیرکبیسه)
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+HOUR_MONTH = np.repeat(np.arange(1, 13), _DAYS_IN_MONTH * 24)
+# اندیس فروردین..اسفند هر ساعت
+HOUR_SHAMSI_MONTH = np.array([MONTHS_ORDER.index(MILADI_TO_SHAMSI_NAME[m]) for m in range(1, 13)])[HOUR_MONTH - 1]
+_MONTH_STARTS = np.concatenate([[0], np.cumsum(_DAYS_IN_MONTH * 24)[:-1]])
+# ماه میلادی (۰..۱۱) متناظر با فروردین..اسفند
+_SHAMSI_ORDER = np.array([HOUR_MONTH[HOUR_SHAMSI_MONTH == k][0] - 1 for k in range(12)])
+
+
+@dataclass(frozen=True)
+class Battery:
+    capacity_kwh: float
+    power_kw: float
+    round_trip_efficiency: float = 0.9
+    min_soc: float = 0.1
+
+    @property
+    def cost(self) -> float:
+        return self.capacity_kwh * BATTERY_COST_PER_KWH
+
+
+def _local_time():
+    utc = np.arange(HOURS) + 0.5
+    local = utc + IRAN_UTC_OFFSET
+    day = (local // 24).astype(int)
+    # ۱ ژانویه ۲۰۲۳ یکشنبه بود؛ جمعه (weekday=4) تعطیل، پنجشنبه نیمه‌تعطیل
+    weekday = (day + 6) % 7
+    return local % 24, weekday, HOUR_MONTH
+
+
+def archetype_profile(name, annual_kwh=None):
+    """پروفیل بار ساعتی نمونه (kWh) که جمع سالانه آن annual_kwh است."""
+    hour, weekday, month = _local_time()
+    summer = np.isin(month, (6, 7, 8, 9))
+    if name == "household":
+        shape = (0.5 + 0.6 * np.exp(-((hour - 8) / 1.5) ** 2) + 1.2 * np.exp(-((hour - 21) / 2.0) ** 2)
+                 + np.where(summer, 0.8 * np.exp(-((hour - 15) / 3.0) ** 2), 0.0))
+        shape = shape * np.where(weekday == 4, 1.15, 1.0)
+    elif name == "commercial":
+        open_hours = (hour >= 8) & (hour < 17)
+        level = np.select([weekday == 4, weekday == 3], [0.0, 0.5], 1.0)
+        shape = 0.15 + open_hours * level * np.where(summer, 1.4, 1.0)
+    elif name == "industrial":
+        shifts = (hour >= 6) & (hour < 22)
+        shape = np.where(shifts, 1.0, 0.35) * np.where(weekday == 4, 0.4, 1.0)
+    else:
+        raise ValueError(f"پروفیل ناشناخته: {name}")
+    annual_kwh = DEFAULT_CONSUMPTION[name] if annual_kwh is None else annual_kwh
+    return shape / shape.sum() * annual_kwh
+
+
+def load_profile_csv(source):
+    """CSV با ۸۷۶۰ (یا ۸۷۸۴) ردیف مصرف ساعتی kWh به وقت محلی از ۱ ژانویه؛ آخرین ستون عددی خوانده می‌شود."""
+    if isinstance(source, bytes):
+        source = io.StringIO(source.decode("utf-8-sig"))
+    values = []
+    for row in csv.reader(source):
+        for cell in reversed(row):
+            try:
+                values.append(float(cell))
+                break
+            except ValueError:
+                continue
+    if len(values) == HOURS + 24:
+        del values[59 * 24:60 * 24]   # ۲۹ فوریه
+    if len(values) != HOURS:
+        raise ValueError(f"پروفیل بار باید {HOURS} مقدار ساعتی داشته باشد ({len(values)} خوانده شد)")
+    local = np.asarray(values)
+    # هر ساعت UTC نیمی از دو ساعت محلی را پوشش می‌دهد (اختلاف ۳:۳۰)
+    return 0.5 * (np.roll(local, -3) + np.roll(local, -4))
+
+
+def hourly_production(production, lat, lon, tilt=35, azimuth=180, horizon=None, panel=None):
+    """تولید ماهانه Production را با شکل ساعتی pvlib (سایه افق horizon و مدل دمایی panel) به سری ۸۷۶۰ ساعته تبدیل می‌کند."""
+    from .production import specific_hourly
+
+    shape = np.asarray(specific_hourly(round(lat, 2), round(lon, 2), tilt, azimuth, horizon or None, panel))
+    model_monthly = np.bincount(HOUR_SHAMSI_MONTH, weights=shape, minlength=12)
+    target = production.as_array()
+    scale = np.divide(target, model_monthly, out=np.zeros(12), where=model_monthly > 0)
+    return shape * scale[HOUR_SHAMSI_MONTH]
+
+
+def _dispatch(net, battery):
+    """شارژ با مازاد و دشارژ برای کمبود؛ net = تولید − مصرف با شکل (Y, 8760)."""
+    efficiency = np.sqrt(battery.round_trip_efficiency)
+    floor = battery.min_soc * battery.capacity_kwh
+    soc = np.full(net.shape[0], floor)
+    flow = np.zeros_like(net)   # مثبت: شارژ از تولید، منفی: تحویل به مصرف
+    for h in range(net.shape[1]):
+        surplus = net[:, h]
+        charge = np.minimum(np.clip(surplus, 0, battery.power_kw), (battery.capacity_kwh - soc) / efficiency)
+        discharge = np.minimum(np.clip(-surplus, 0, battery.power_kw), (soc - floor) * efficiency)
+        soc += charge * efficiency - discharge / efficiency
+        flow[:, h] = charge - discharge
+    return flow
+
+
+def _monthly(hourly):
+    """(Y, 8760) → (Y × 12) به ترتیب فروردین..اسفند هر سال."""
+    return np.add.reduceat(hourly, _MONTH_STARTS, axis=-1)[:, _SHAMSI_ORDER].reshape(-1)
+
+
+def simulate_self_consumption(production_hourly, load_hourly, tariff, battery=None,
+                              retail_price=RETAIL_PRICE, retail_escalation=RETAIL_ESCALATION,
+                              degradation=DEGRADATION, load_growth=0.0):
+    years = tariff.contract_years
+    production = production_hourly[None, :] * degradation_vector(years, degradation)[:, None]
+    load = load_hourly[None, :] * ((1 + load_growth) ** np.arange(years))[:, None]
+
+    self_consumed = np.minimum(production, load)
+    if battery is not None and battery.capacity_kwh > 0:
+        flow = _dispatch(production - load, battery)
+        from_battery = np.clip(-flow, 0, None)
+        self_consumed = self_consumed + from_battery
+        exported = production - np.minimum(production, load) - np.clip(flow, 0, None)
+    else:
+        exported = production - self_consumed
+    imported = load - self_consumed
+
+    monthly_rate = tariff.rate_vector()
+    retail_monthly = (1 + retail_escalation) ** (1 / 12) - 1
+    monthly_retail = retail_price * (1 + retail_monthly) ** np.arange(years * 12)
+    monthly_export = _monthly(exported)
+    monthly_self = _monthly(self_consumed)
+    export_income = monthly_export * monthly_rate
+    savings = monthly_self * monthly_retail
+
+    def yearly(monthly):
+        return monthly.reshape(years, 12).sum(axis=-1)
+
+    total_production = production.sum()
+    total_load = load.sum()
+    return {
+        'monthly_production': _monthly(production),
+        'monthly_rate': monthly_rate,
+        'monthly_income': export_income + savings,
+        'yearly_production': yearly(_monthly(production)),
+        'yearly_income': yearly(export_income + savings),
+        'yearly_self_consumed': yearly(monthly_self),
+        'yearly_exported': yearly(monthly_export),
+        'yearly_imported': yearly(_monthly(imported)),
+        'yearly_export_income': yearly(export_income),
+        'yearly_savings': yearly(savings),
+        'self_consumption_ratio': float(self_consumed.sum() / total_production) if total_production else 0.0,
+        'self_sufficiency_ratio': float(self_consumed.sum() / total_load) if total_load else 0.0,
+    }
+
+
+def to_cashflow(result):
+    """خروجی simulate_self_consumption → CashFlow برای evaluate_metrics."""
+    from .pipeline import CashFlow
+
+    return CashFlow(**{k: result[k] for k in (
+        'monthly_production', 'monthly_rate', 'monthly_income', 'yearly_production', 'yearly_income')})
@@ -0,0 +1,91 @@
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+# ================== سایه افق و موانع ==================
+# پروفیل افق: ارتفاع زاویه‌ای افق (درجه) بر حسب آزیموت (درجه از شمال، ساعتگرد؛ ۱۸۰ جنوب) که بین
+# نقاط داده‌شده به‌صورت دوره‌ای درون‌یابی می‌شود. هر مانع (آزیموت مرکز، پهنای زاویه‌ای، ارتفاع از
+# سطح پنل، فاصله) ارتفاع atan(ارتفاع/فاصله) را در بازه خودش به پروفیل اضافه می‌کند. پروفیل با دقت
+# یک درجه (۳۶۰ مقدار) ساخته و کش می‌شود. در هر ساعت که ارتفاع خورشید زیر افق باشد تابش مستقیم
+# صفحه حذف می‌شود و تابش پخشی به نسبت دید آسمان (ایزوتروپ) کم می‌شود.
+
+AZIMUTH_STEPS = 360
+
+
+@dataclass(frozen=True)
+class Horizon:
+    points: tuple = ()      # ((آزیموت، ارتفاع افق), ...) درجه
+    obstacles: tuple = ()   # ((آزیموت مرکز، پهنا به درجه، ارتفاع m، فاصله m), ...)
+
+    def elevations(self) -> np.ndarray:
+        """ارتفاع افق برای آزیموت‌های ۰..۳۵۹ (فقط‌خواندنی)."""
+        return _elevations(self)
+
+    @property
+    def sky_view_factor(self) -> float:
+        """سهم آسمان دیده‌شده برای تابش پخشی ایزوتروپ."""
+        return float(1 - np.mean(np.sin(np.radians(self.elevations())) ** 2))
+
+    def __bool__(self):
+        return bool(self.points or self.obstacles)
+
+
+@lru_cache(maxsize=64)
+def _elevations(horizon):
+    azimuths = np.arange(AZIMUTH_STEPS, dtype=float)
+    profile = np.zeros(AZIMUTH_STEPS)
+    if horizon.points:
+        az, elevation = np.array(sorted(horizon.points), dtype=float).T
+        profile = np.interp(azimuths, az % 360, elevation, period=360)
+    for azimuth, width, height, distance in horizon.obstacles:
+        inside = np.abs((azimuths - azimuth + 180) % 360 - 180) <= width / 2
+        profile[inside] = np.maximum(profile[inside], math.degrees(math.atan2(height, distance)))
+    profile = np.clip(profile, 0, 90)
+    profile.setflags(write=False)
+    return profile
+
+
+def beam_blocked(weather, horizon):
+    """ساعت‌هایی که خورشید پشت افق است: آرایه bool (8760)."""
+    index = np.rint(weather['solar_azimuth']).astype(int) % AZIMUTH_STEPS
+    return 90 - weather['zenith'] < horizon.elevations()[index]
+
+
+def shaded_poa(poa, weather, horizon):
+    """poa_global پس از سایه؛ poa خروجی production.plane_of_array (یک یا چند جهت) است."""
+    visible = ~beam_blocked(weather, horizon)
+    return poa['poa_direct'] * visible + poa['poa_diffuse'] * horizon.sky_view_factor
+
+
+def _pairs(text, size):
+    rows = [tuple(float(v) for v in part.replace("،", ",").split(","))
+            for part in text.replace("\n", ";").split(";") if part.strip()]
+    if any(len(r) != size for r in rows):
+        raise ValueError(f"هر مورد باید {size} عدد جداشده با ویرگول داشته باشد")
+    return tuple(rows)
+
+
+def parse_horizon(points_text="", obstacles_text=""):
+    """«آزیموت,ارتفاع; ...» و «آزیموت,پهنا,ارتفاع,فاصله; ...» → Horizon"""
+    return Horizon(_pairs(points_text, 2), _pairs(obstacles_text, 4))
+
+
+def load_horizon_csv(source):
+    """CSV/متن با دو ستون عددی اول آزیموت (از شمال) و ارتفاع افق؛ سطرهای غیرعددی رد می‌شوند."""
+    if isinstance(source, bytes):
+        source = source.decode("utf-8-sig")
+    points = []
+    for line in source.splitlines():
+        values = []
+        for cell in line.replace("\t", ",").replace(";", ",").split(","):
+            try:
+                values.append(float(cell))
+            except ValueError:
+                continue
+        if len(values) >= 2:
+            points.append((values[0], values[1]))
+    if len(points) < 2:
+        raise ValueError("حداقل دو نقطه آزیموت,ارتفاع لازم است")
+    return tuple(points)
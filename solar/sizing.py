@@ -0,0 +1,89 @@
+import math
+from collections import Counter
+from functools import lru_cache
+
+from .catalog import INVERTERS
+
+# ================== چیدمان پنل ==================
+USABLE_ROOF_FRACTION = 0.75
+
+
+def count_panels(roof_area, panel_data):
+    usable_area = roof_area * USABLE_ROOF_FRACTION
+    return math.floor(usable_area / panel_data['area'])
+
+
+# ================== انتخاب اینورتر ==================
+# ترکیب ارزان‌ترین مدل‌ها (در صورت نیاز چند دستگاه) با برنامه‌ریزی پویا روی توان AC کل، به طوری
+# که نسبت DC/AC در بازه مجاز بماند. اگر هیچ ترکیبی در بازه نباشد (مثلاً سیستم کوچک‌تر از
+# کوچک‌ترین مدل)، ارزان‌ترین ترکیب با نسبت کمتر از بازه انتخاب می‌شود. سقف تعداد دستگاه MAX_UNITS است،
+# مگر این‌که سیستم آن‌قدر بزرگ باشد که با این تعداد از بزرگ‌ترین مدل هم پوشش داده نشود.
+DC_AC_RATIO_RANGE = (0.9, 1.3)
+MAX_UNITS = 20
+_RESOLUTION = 0.1   # kW
+
+
+def _models(brands):
+    return [(brand, size, name, size * INVERTERS[brand]["price_per_kw"])
+            for brand in brands for size, name in INVERTERS[brand]["models"].items()]
+
+
+@lru_cache(maxsize=1024)
+def _cheapest_combination(capacity_kw, brands, ratio_min, ratio_max):
+    models = _models(brands)
+    weights = [round(size / _RESOLUTION) for _, size, _, _ in models]
+    lower = math.ceil(capacity_kw / ratio_max / _RESOLUTION - 1e-9)
+    upper = max(math.floor(capacity_kw / ratio_min / _RESOLUTION + 1e-9), lower)
+    limit = upper + max(weights)
+    max_units = max(MAX_UNITS, math.ceil(upper / max(weights)) + 1)
+
+    # best[s] = (هزینه، تعداد دستگاه) کمینه برای توان AC دقیقاً s؛ choice[s] آخرین مدل اضافه‌شده
+    best = [(0.0, 0)] + [(math.inf, 0)] * limit
+    choice = [-1] * (limit + 1)
+    for total in range(1, limit + 1):
+        for k, w in enumerate(weights):
+            if w <= total and best[total - w][1] < max_units:
+                candidate = (best[total - w][0] + models[k][3], best[total - w][1] + 1)
+                if candidate < best[total]:
+                    best[total], choice[total] = candidate, k
+
+    in_range = [t for t in range(max(lower, 1), upper + 1) if choice[t] >= 0]
+    totals = in_range or [t for t in range(max(lower, 1), limit + 1) if choice[t] >= 0]
+    if not totals:
+        return None
+    total = min(totals, key=lambda t: best[t])
+    picked = []
+    while total > 0:
+        picked.append(choice[total])
+        total -= weights[choice[total]]
+    return tuple(sorted(picked, key=lambda k: -models[k][1]))
+
+
+def size_inverters(capacity_kw, brands, ratio_range=DC_AC_RATIO_RANGE):
+    """ارزان‌ترین ترکیب اینورترهای brands برای ظرفیت DC؛ خروجی هم‌شکل get_suitable_inverter."""
+    brands = tuple(b for b in ([brands] if isinstance(brands, str) else brands) if b in INVERTERS)
+    if not brands or capacity_kw <= 0:
+        return None
+    picked = _cheapest_combination(round(capacity_kw, 3), brands, *ratio_range)
+    if picked is None:
+        return None
+    models = _models(brands)
+    units = [{"brand": models[k][0], "model": models[k][2], "size_kw": models[k][1], "price": models[k][3]}
+             for k in picked]
+    counts = Counter((u["brand"], u["model"]) for u in units)
+    size_kw = sum(u["size_kw"] for u in units)
+    first = INVERTERS[units[0]["brand"]]
+    return {
+        "brand": " + ".join(dict.fromkeys(u["brand"] for u in units)),
+        "model": " + ".join(f"{n} × {model}" if n > 1 else model for (_, model), n in counts.items()),
+        "size_kw": size_kw,
+        "warranty": first["warranty"],
+        "origin": first["origin"],
+        "price": sum(u["price"] for u in units),
+        "units": units,
+        "dc_ac_ratio": capacity_kw / size_kw,
+    }
+
+
+def get_suitable_inverter(capacity_kw, brand):
+    return size_inverters(capacity_kw, brand) if brand in INVERTERS else None
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+
+from .perf import recorder
+
+# ================== گراف مراحل با کش جداگانه ==================
+#   location (lat, lon, tilt, azimuth) → irradiance
+#   panel/roof (roof_area, panel_name, panel_power, panel_count) → capacity → + inverter_brand → inverter
+#   capacity + inverter + cost_per_watt → design
+#   irradiance + capacity (پنل) + inverter + shading_loss + horizon → production (هزینه در آن نیست)
+#   capacity + schedule → tariff ؛ production + tariff → income ؛ income + design + discount_rate → metrics
+# کلید هر مرحله هش ورودی‌های خودش به‌همراه کلید مراحل بالادست است (نه خروجی آن‌ها)، پس در اجرای
+# دوباره اسکریپت فقط مراحلی که یکی از ورودی‌هایشان عوض شده دوباره حساب می‌شوند. هر مرحله LRU خودش
+# را دارد. خروجی‌ها بین اجراها و نشست‌ها مشترک‌اند و نباید تغییر داده شوند. مرحله‌ای که ttl دارد
+# (تابعی از خروجی → ثانیه یا None) خروجی‌های موقت را فقط تا آن مدت نگه می‌دارد؛ مثلاً تابش جایگزین
+# pvlib هنگام قطعی PVGIS تا پس از برگشت سرویس دوباره از PVGIS گرفته شود.
+
+STAGE_CACHE_SIZE = 64
+FALLBACK_TTL = 300   # ثانیه
+
+
+class StageGraph:
+    def __init__(self, maxsize=STAGE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.stages = {}    # name → (fn, inputs, deps, maxsize, ttl)
+        self._caches = {}   # name → OrderedDict(key → (value, زمان انقضا یا None))
+        self._lock = threading.Lock()
+        self.stats = {}     # name → [hits, misses]
+        self.clock = time.monotonic
+
+    def stage(self, name, inputs=(), deps=(), maxsize=None, ttl=None):
+        """ثبت مرحله؛ fn با ورودی‌ها و خروجی مراحل deps به شکل آرگومان نام‌دار فراخوانی می‌شود."""
+        missing = [d for d in deps if d not in self.stages]
+        if missing:
+            raise ValueError(f"مرحله {name} به مراحل ثبت‌نشده وابسته است: {missing}")
+
+        def register(fn):
+            self.stages[name] = (fn, tuple(inputs), tuple(deps), maxsize or self.maxsize, ttl)
+            self._caches[name] = OrderedDict()
+            self.stats[name] = [0, 0]
+            return fn
+        return register
+
+    def _key(self, name, params, keys):
+        if name not in keys:
+            _, inputs, deps, _, _ = self.stages[name]
+            try:
+                values = tuple(params[i] for i in inputs)
+            except KeyError as e:
+                raise TypeError(f"ورودی {e.args[0]} برای مرحله {name} داده نشده است") from None
+            keys[name] = (values, tuple(self._key(d, params, keys) for d in deps))
+        return keys[name]
+
+    def _run(self, name, params, keys, values):
+        """(خروجی، زمان انقضا یا None)؛ خروجی ساخته‌شده از خروجی موقت تا همان زمان منقضی می‌شود."""
+        if name in values:
+            return values[name]
+        fn, inputs, deps, maxsize, ttl = self.stages[name]
+        key = self._key(name, params, keys)
+        cache = self._caches[name]
+        with self._lock:
+            entry = cache.get(key)
+            hit = entry is not None and (entry[1] is None or self.clock() < entry[1])
+            if hit:
+                cache.move_to_end(key)
+                self.stats[name][0] += 1
+        if not hit:
+            upstream = {d: self._run(d, params, keys, values) for d in deps}
+            kwargs = {d: value for d, (value, _) in upstream.items()}
+            kwargs.update((i, params[i]) for i in inputs)
+            value = fn(**kwargs)
+            seconds = ttl(value) if ttl else None
+            expiries = [expires for _, expires in upstream.values() if expires is not None]
+            if seconds is not None:
+                expiries.append(self.clock() + seconds)
+            entry = (value, min(expiries, default=None))
+            with self._lock:
+                cache[key] = entry
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+                self.stats[name][1] += 1
+        recorder.count(f"stage_{'hits' if hit else 'misses'}")
+        values[name] = entry
+        return entry
+
+    def get(self, name, **params):
+        """خروجی مرحله name؛ ورودی‌های اضافی نادیده گرفته می‌شوند."""
+        return self._run(name, params, {}, {})[0]
+
+    def resolve(self, *names, **params):
+        """چند مرحله با یک بار محاسبه کلیدها → {name: خروجی}"""
+        keys, values = {}, {}
+        return {name: self._run(name, params, keys, values)[0] for name in names}
+
+    def clear(self):
+        with self._lock:
+            for cache in self._caches.values():
+                cache.clear()
+
+
+graph = StageGraph()
+
+
+@graph.stage("irradiance", inputs=("lat", "lon", "tilt", "azimuth", "use_pvgis"),
+             ttl=lambda result: FALLBACK_TTL if result.get('fallback') else None)
+def irradiance(lat, lon, tilt, azimuth, use_pvgis):
+    """تولید ماهانه به ازای هر kWp (قبل از سایه و اینورتر)."""
+    from .sources import get_production
+
+    return get_production(lat, lon, 1.0, tilt, use_pvgis=use_pvgis, aspect=azimuth)
+
+
+@graph.stage("capacity", inputs=("roof_area", "panel_name", "panel_power", "panel_count"))
+def capacity(roof_area, panel_name, panel_power, panel_count):
+    from .pipeline import design_system
+
+    return design_system(roof_area, panel_name, panel_power, panel_count=panel_count)
+
+
+@graph.stage("inverter", inputs=("inverter_brand",), deps=("capacity",))
+def inverter(inverter_brand, capacity):
+    from .sizing import get_suitable_inverter
+
+    return get_suitable_inverter(capacity.capacity_kw, inverter_brand)
+
+
+@graph.stage("design", inputs=("cost_per_watt",), deps=("capacity", "inverter"))
+def design(cost_per_watt, capacity, inverter):
+    return replace(capacity, inverter=inverter, panel_cost=capacity.capacity_kw * 1000 * cost_per_watt,
+                   inverter_cost=inverter['price'] if inverter else 0)
+
+
+@graph.stage("production", inputs=("lat", "lon", "tilt", "azimuth", "shading_loss", "horizon"),
+             deps=("irradiance", "capacity", "inverter"))
+def production(lat, lon, tilt, azimuth, shading_loss, horizon, irradiance, capacity, inverter):
+    from .catalog import ALL_PANELS
+    from .pipeline import Site, estimate_production
+    from .production import panel_model
+    from .pvgis_cache import scale_record
+
+    def source(lat, lon, capacity_kw, tilt):
+        return scale_record(irradiance, capacity_kw)
+
+    ac_capacity_kw = inverter['size_kw'] if inverter else None
+    return estimate_production(Site(lat, lon, tilt, shading_loss, azimuth, horizon), capacity.capacity_kw,
+                               source=source, ac_capacity_kw=ac_capacity_kw,
+                               panel=panel_model(ALL_PANELS[capacity.panel_name]))
+
+
+@graph.stage("tariff", inputs=("schedule",), deps=("capacity",))
+def tariff(schedule, capacity):
+    from .schedules import tariff_for
+
+    return tariff_for(capacity.capacity_kw, schedule)
+
+
+@graph.stage("income", deps=("production", "tariff"))
+def income(production, tariff):
+    from .pipeline import project_cashflow
+
+    return project_cashflow(production, tariff)
+
+
+@graph.stage("metrics", inputs=("discount_rate",), deps=("income", "design"))
+def metrics(discount_rate, income, design):
+    from .pipeline import evaluate_metrics
+
+    return evaluate_metrics(income, design.initial_cost, discount_rate)
+
@@ -0,0 +1,24 @@
+from .schedules import load_schedule
+
+# ================== مقادیر ثابت قرارداد ==================
+# نرخ پایه، ضریب‌ها، تورم و مدت قرارداد فقط در جدول‌های تعرفه (solar/tariffs/) تعریف می‌شوند.
+COST_PER_WATT = 35000
+
+
+def monthly_inflation_rate(annual_inflation):
+    return (1 + annual_inflation) ** (1/12) - 1
+
+
+# ================== فرمول ساتبا - ماهانه ==================
+def calculate_satba_rate_monthly(month_index, monthly_inflation, k3, k4, k2=1.0, t_base=None):
+    """بدون t_base نرخ پایه آخرین نسخه جدول پیش‌فرض به کار می‌رود."""
+    if t_base is None:
+        t_base = load_schedule().t_base
+    k1 = (1 + monthly_inflation) ** month_index
+    B = t_base * k1 * k2 * k3 * k4
+    return B
+
+
+# ================== تعرفه برق مصرفی (مصرف خودی) ==================
+RETAIL_PRICE = 1500        # میانگین تعرفه پلکانی (تومان/kWh)
+RETAIL_ESCALATION = 0.25   # رشد سالانه تعرفه مصرف
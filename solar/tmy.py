@@ -0,0 +1,238 @@
+import argparse
+import json
+import math
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from .geo import distance_km
+
+# ================== داده اقلیمی TMY بدون اینترنت ==================
+# python -m solar.tmy ingest tehran.epw shiraz_tmy.csv isfahan_tmy.json
+# python -m solar.tmy list
+#
+# فایل‌های سال نمونه اقلیمی (EPW و خروجی TMY سایت PVGIS به شکل CSV یا JSON) خط‌به‌خط خوانده و به
+# ۸۷۶۰ ساعت UTC یک سال غیرکبیسه تبدیل می‌شوند؛ هر سایت یک فایل .npy (float32) با شکل
+# (ستون، ۸۷۶۰) است که هر ستون پشت‌سرهم ذخیره شده و با memory-map بدون کپی خوانده می‌شود.
+# index.json مختصات سایت‌ها را نگه می‌دارد. موتور ساعتی (site_weather) برای هر نقطه نزدیک‌ترین
+# ایستگاه تا شعاع MAX_DISTANCE_KM را به جای آسمان صاف مصنوعی به کار می‌برد.
+
+DEFAULT_PATH = os.environ.get(
+    "SOLAR_WEATHER_STORE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build", "weather"),
+)
+COLUMNS = ("ghi", "dni", "dhi", "temp_air", "wind_speed")
+HOURS = 8760
+MAX_DISTANCE_KM = 50.0
+
+# ستون‌های TMY در PVGIS
+_PVGIS_COLUMNS = {"G(h)": "ghi", "Gb(n)": "dni", "Gd(h)": "dhi", "T2m": "temp_air", "WS10m": "wind_speed"}
+# شماره ستون‌ها در سطرهای داده EPW و مقدار «گم‌شده» هر کدام
+_EPW_COLUMNS = {"ghi": (13, 9999), "dni": (14, 9999), "dhi": (15, 9999), "temp_air": (6, 99.9), "wind_speed": (21, 999)}
+
+
+def site_key(lat, lon):
+    return f"{lat:.2f}_{lon:.2f}"
+
+
+def _fill_missing(column):
+    """مقادیر گم‌شده (nan) با درون‌یابی خطی پر می‌شوند."""
+    missing = np.isnan(column)
+    if missing.any() and not missing.all():
+        index = np.arange(len(column))
+        column[missing] = np.interp(index[missing], index[~missing], column[~missing])
+    return column
+
+
+def _to_utc(local, utc_offset):
+    """سری ساعتی به وقت محلی → UTC؛ اختلاف کسری (مثل ۳:۳۰) بین دو ساعت مجاور تقسیم می‌شود."""
+    whole = math.floor(utc_offset)
+    frac = utc_offset - whole
+    shifted = np.roll(local, -whole, axis=-1)
+    if frac:
+        shifted = (1 - frac) * shifted + frac * np.roll(local, -(whole + 1), axis=-1)
+    return shifted
+
+
+def _finish(data, rows, leap_day, lat, lon, source, name, utc_offset=0.0):
+    if rows == HOURS + 24 and leap_day is not None:
+        data = np.delete(data[:, :rows], np.s_[leap_day:leap_day + 24], axis=1)
+    elif rows == HOURS:
+        data = data[:, :rows]
+    else:
+        raise ValueError(f"فایل TMY باید {HOURS} ردیف ساعتی داشته باشد ({rows} خوانده شد)")
+    for column in data:
+        _fill_missing(column)
+    if utc_offset:
+        data = _to_utc(data, utc_offset)
+    data[:3] = np.clip(data[:3], 0, None)
+    return {'lat': lat, 'lon': lon, 'source': source, 'name': name, 'data': data.astype(np.float32)}
+
+
+def read_epw(lines):
+    """EPW (وقت استاندارد محلی، ساعت ۱ = بازه ۰۰:۰۰ تا ۰۱:۰۰)."""
+    lines = iter(lines)
+    location = next(lines).strip().split(",")
+    name = location[1].strip()
+    lat, lon, utc_offset = float(location[6]), float(location[7]), float(location[8])
+    for _ in range(7):
+        next(lines)
+    data = np.full((len(COLUMNS), HOURS + 24), np.nan)
+    rows, leap_day = 0, None
+    for line in lines:
+        fields = line.split(",")
+        if len(fields) < 22 or rows >= HOURS + 24:
+            continue
+        if fields[1] == "2" and fields[2] == "29" and leap_day is None:
+            leap_day = rows
+        for c, column in enumerate(COLUMNS):
+            index, missing = _EPW_COLUMNS[column]
+            value = float(fields[index])
+            data[c, rows] = np.nan if value >= missing else value
+        rows += 1
+    return _finish(data, rows, leap_day, lat, lon, "EPW", name, utc_offset)
+
+
+def read_pvgis_csv(lines):
+    """خروجی CSV ابزار TMY سایت PVGIS (زمان UTC)."""
+    lat = lon = None
+    header = None
+    data = np.full((len(COLUMNS), HOURS + 24), np.nan)
+    rows, leap_day = 0, None
+    for line in lines:
+        line = line.strip()
+        if header is None:
+            if line.startswith("Latitude"):
+                lat = float(line.split(":")[1])
+            elif line.startswith("Longitude"):
+                lon = float(line.split(":")[1])
+            elif line.startswith("time(UTC)"):
+                names = line.split(",")
+                header = [names.index(k) for k in _PVGIS_COLUMNS]
+            continue
+        if not line[:1].isdigit():
+            break   # پانویس توضیح ستون‌ها
+        if rows >= HOURS + 24:
+            continue
+        fields = line.split(",")
+        if fields[0][4:8] == "0229" and leap_day is None:
+            leap_day = rows
+        data[:, rows] = [float(fields[i]) for i in header]
+        rows += 1
+    if header is None or lat is None or lon is None:
+        raise ValueError("سرستون یا مختصات فایل TMY سایت PVGIS پیدا نشد")
+    return _finish(data, rows, leap_day, lat, lon, "PVGIS TMY", f"{lat:.2f}, {lon:.2f}")
+
+
+def read_pvgis_json(f):
+    """خروجی JSON ابزار TMY سایت PVGIS."""
+    payload = json.load(f)
+    location = payload['inputs']['location']
+    hourly = payload['outputs']['tmy_hourly']
+    data = np.full((len(COLUMNS), HOURS + 24), np.nan)
+    leap_day = None
+    for rows, record in enumerate(hourly[:HOURS + 24]):
+        if record['time(UTC)'][4:8] == "0229" and leap_day is None:
+            leap_day = rows
+        data[:, rows] = [record[k] for k in _PVGIS_COLUMNS]
+    lat, lon = float(location['latitude']), float(location['longitude'])
+    return _finish(data, min(len(hourly), HOURS + 24), leap_day, lat, lon, "PVGIS TMY", f"{lat:.2f}, {lon:.2f}")
+
+
+def read_tmy(path):
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        if path.lower().endswith(".epw"):
+            return read_epw(f)
+        if path.lower().endswith(".json"):
+            return read_pvgis_json(f)
+        return read_pvgis_csv(f)
+
+
+class WeatherStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        index_path = os.path.join(path, "index.json")
+        self.index = {}
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        self._refresh()
+
+    def _refresh(self):
+        self._coords = np.array([(s['lat'], s['lon']) for s in self.index.values()]).reshape(-1, 2)
+        self._keys = list(self.index)
+
+    def put(self, record):
+        """ذخیره اتمیک یک سایت؛ کلید سایت برمی‌گردد."""
+        os.makedirs(self.path, exist_ok=True)
+        key = site_key(record['lat'], record['lon'])
+        tmp = os.path.join(self.path, f"{key}.tmp.npy")
+        np.save(tmp, np.ascontiguousarray(record['data'], dtype=np.float32))
+        os.replace(tmp, os.path.join(self.path, f"{key}.npy"))
+        self.index[key] = {k: record[k] for k in ('lat', 'lon', 'source', 'name')}
+        tmp = os.path.join(self.path, "index.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, os.path.join(self.path, "index.json"))
+        self._refresh()
+        return key
+
+    def nearest(self, lat, lon, max_distance_km=MAX_DISTANCE_KM):
+        """کلید نزدیک‌ترین ایستگاه در شعاع max_distance_km یا None."""
+        if not self._keys:
+            return None
+        distance = distance_km(lat, lon, self._coords[:, 0], self._coords[:, 1])
+        i = int(np.argmin(distance))
+        return self._keys[i] if distance[i] <= max_distance_km else None
+
+    def columns(self, key):
+        """{ستون: آرایه float32 فقط‌خواندنی} به شکل نمای memory-map (بدون کپی)."""
+        data = np.load(os.path.join(self.path, f"{key}.npy"), mmap_mode="r")
+        return dict(zip(COLUMNS, data))
+
+
+@lru_cache(maxsize=4)
+def load_weather_store(path=DEFAULT_PATH):
+    if not os.path.exists(os.path.join(path, "index.json")):
+        return None
+    return WeatherStore(path)
+
+
+def has_tmy(lat, lon):
+    store = load_weather_store()
+    return store is not None and store.nearest(lat, lon) is not None
+
+
+def tmy_weather(lat, lon):
+    """ستون‌های TMY نزدیک‌ترین ایستگاه و مشخصات آن، یا None."""
+    store = load_weather_store()
+    key = store.nearest(lat, lon) if store is not None else None
+    if key is None:
+        return None
+    return {**store.index[key], 'key': key, 'columns': store.columns(key)}
+
+
+def ingest(paths, path=DEFAULT_PATH):
+    store = WeatherStore(path)
+    keys = []
+    for file in paths:
+        record = read_tmy(file)
+        keys.append(store.put(record))
+        print(f"{file} → {keys[-1]} ({record['source']}, {record['name']})")
+    load_weather_store.cache_clear()
+    return keys
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m solar.tmy", description="انبار داده اقلیمی TMY/EPW")
+    parser.add_argument("--store", default=DEFAULT_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("ingest", help="خواندن فایل‌های EPW یا TMY سایت PVGIS").add_argument("files", nargs="+")
+    commands.add_parser("list", help="فهرست سایت‌های ذخیره‌شده")
+    args = parser.parse_args()
+    if args.command == "ingest":
+        ingest(args.files, args.store)
+    else:
+        for key, site in WeatherStore(args.store).index.items():
+            print(f"{key}\t{site['source']}\t{site['name']}")
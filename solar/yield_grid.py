@@ -0,0 +1,150 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from .months import MONTHS_ORDER
+
+# ================== شبکه ملی تولید ویژه ==================
+# مرحله build: تولید ویژه ماهانه (kWh/kWp) برای شبکه lat/lon ایران و همه زوایای مجاز ورودی
+# با موتور pvlib محاسبه و در یک فایل .npy (float32) با ابعاد (lat, lon, tilt, 12) ذخیره می‌شود.
+# زمان اجرا: فایل memory-map می‌شود (بین پروسه‌ها از page cache مشترک) و هر کلیک با درون‌یابی
+# دوخطی در چند میکروثانیه پاسخ داده می‌شود. فایل meta (مرز، گام، زوایا و چکیده sha256 فایل شبکه) پس از
+# جایگزینی شبکه و به شکل اتمی نوشته می‌شود؛ شبکه‌ای که با چکیده meta نخواند (خواندن وسط build یا
+# قطع build بین دو فایل) کنار گذاشته می‌شود و تولید از مدل محلی می‌آید.
+
+DEFAULT_PATH = os.environ.get(
+    "SOLAR_YIELD_GRID",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build", "yield_grid.npy"),
+)
+LAT_RANGE = (25.0, 40.0)
+LON_RANGE = (44.0, 63.5)
+TILTS = tuple(range(10, 46, 5))
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def _checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_meta(path, lat0, lon0, step, tilts=TILTS):
+    """meta شبکه path؛ باید پس از نوشتن کامل فایل شبکه فراخوانی شود."""
+    meta = {'lat0': float(lat0), 'lon0': float(lon0), 'step': step, 'tilts': list(tilts), 'months': MONTHS_ORDER,
+            'sha256': _checksum(path)}
+    tmp = f"{_meta_path(path)}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, _meta_path(path))
+
+
+class YieldGrid:
+    def __init__(self, path=DEFAULT_PATH):
+        with open(_meta_path(path), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get('sha256') != _checksum(path):
+            raise ValueError(f"شبکه تولید ویژه {path} با فایل meta آن نمی‌خواند؛ شبکه را دوباره بسازید")
+        self.lat0, self.lon0, self.step = meta['lat0'], meta['lon0'], meta['step']
+        self.tilts = np.asarray(meta['tilts'], dtype=float)
+        self.data = np.load(path, mmap_mode="r")
+        self.n_lat, self.n_lon = self.data.shape[:2]
+
+    def contains(self, lat, lon):
+        i = (lat - self.lat0) / self.step
+        j = (lon - self.lon0) / self.step
+        return 0 <= i <= self.n_lat - 1 and 0 <= j <= self.n_lon - 1
+
+    def specific_monthly(self, lat, lon, tilt):
+        """تولید ویژه ماهانه (فروردین..اسفند) با درون‌یابی دوخطی؛ خارج از شبکه None."""
+        if not self.contains(lat, lon):
+            return None
+        fi = (lat - self.lat0) / self.step
+        fj = (lon - self.lon0) / self.step
+        i = min(int(fi), self.n_lat - 2)
+        j = min(int(fj), self.n_lon - 2)
+        di, dj = fi - i, fj - j
+
+        k = int(np.clip(np.searchsorted(self.tilts, tilt) - 1, 0, len(self.tilts) - 2))
+        dk = float(np.clip((tilt - self.tilts[k]) / (self.tilts[k + 1] - self.tilts[k]), 0, 1))
+
+        cube = np.asarray(self.data[i:i + 2, j:j + 2, k:k + 2], dtype=float)
+        cube = cube[:, :, 0] * (1 - dk) + cube[:, :, 1] * dk
+        return ((cube[0, 0] * (1 - dj) + cube[0, 1] * dj) * (1 - di)
+                + (cube[1, 0] * (1 - dj) + cube[1, 1] * dj) * di)
+
+    def calculate_production(self, lat, lon, capacity_kw, tilt=35):
+        monthly = self.specific_monthly(lat, lon, tilt)
+        if monthly is None:
+            return {'success': False}
+        return {
+            'success': True,
+            'yearly': float(monthly.sum()) * capacity_kw,
+            'monthly': {m: float(v) * capacity_kw for m, v in zip(MONTHS_ORDER, monthly)},
+            'source': 'شبکه تولید ویژه',
+        }
+
+
+@lru_cache(maxsize=4)
+def load_yield_grid(path=DEFAULT_PATH):
+    if not (os.path.exists(path) and os.path.exists(_meta_path(path))):
+        return None
+    try:
+        return YieldGrid(path)
+    except ValueError:
+        return None
+
+
+# ================== ساخت شبکه ==================
+def _build_row(args):
+    from .production import monthly_totals, plane_of_array, pv_output, site_weather
+
+    lat, lons = args
+    row = np.empty((len(lons), len(TILTS), 12), dtype=np.float32)
+    for j, lon in enumerate(lons):
+        weather = site_weather(round(lat, 4), round(lon, 4))
+        for k, tilt in enumerate(TILTS):
+            hourly = pv_output(plane_of_array(weather, tilt)['poa_global'], weather)
+            monthly = monthly_totals(hourly, weather['month'])
+            row[j, k] = [monthly[m] for m in MONTHS_ORDER]
+        site_weather.cache_clear()
+    return row
+
+
+def build(path=DEFAULT_PATH, step=0.5, workers=None):
+    lats = np.arange(LAT_RANGE[0], LAT_RANGE[1] + step / 2, step)
+    lons = np.arange(LON_RANGE[0], LON_RANGE[1] + step / 2, step)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    grid = np.lib.format.open_memmap(path + ".tmp", mode="w+", dtype=np.float32,
+                                     shape=(len(lats), len(lons), len(TILTS), 12))
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, row in enumerate(pool.map(_build_row, [(float(lat), lons.tolist()) for lat in lats])):
+            grid[i] = row
+            print(f"\r{i + 1}/{len(lats)} ردیف  ({time.time() - start:.0f} s)", end="", flush=True)
+    print()
+    grid.flush()
+    del grid
+    os.replace(path + ".tmp", path)
+    write_meta(path, lats[0], lons[0], step)
+    load_yield_grid.cache_clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ساخت شبکه ملی تولید ویژه (kWh/kWp ماهانه)")
+    parser.add_argument("--out", default=DEFAULT_PATH)
+    parser.add_argument("--step", type=float, default=0.5, help="گام شبکه به درجه")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    build(args.out, args.step, args.workers)
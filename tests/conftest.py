@@ -0,0 +1,5 @@
+import os
+import sys
+
+# تست‌ها بدون نصب بسته، مستقیماً روی بسته solar همین مخزن اجرا می‌شوند
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
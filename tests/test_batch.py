@@ -0,0 +1,48 @@
+import csv
+import sys
+
+import pytest
+
+from solar import batch
+from solar.catalog import ALL_PANELS
+
+PANEL = next(iter(ALL_PANELS))
+FIELDS = ["id", "lat", "lon", "roof_area", "panel", "inverter"]
+
+
+def write_sites(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(dict(zip(FIELDS, row)) for row in rows)
+
+
+def test_malformed_number_is_recorded_not_raised():
+    out = batch.evaluate_row({"id": "x", "lat": "abc", "lon": "51.39", "roof_area": "30", "panel": PANEL,
+                              "inverter": "Growatt"})
+    assert out["error"].startswith("ValueError")
+    assert out["lat"] is None and out["id"] == "x"
+
+
+def test_bad_row_does_not_stop_the_run(tmp_path):
+    sites, results = tmp_path / "sites.csv", tmp_path / "results.csv"
+    write_sites(sites, [
+        ("a", "35.69", "51.39", "30", PANEL, "Growatt"),
+        ("b", "abc", "51.39", "30", PANEL, "Growatt"),
+        ("c", "35.70", "51.40", "oops", PANEL, "Growatt"),
+        ("d", "29.61", "52.53", "40", PANEL, "Growatt"),
+    ])
+    done, errors = batch.run(str(sites), str(results), workers=1, chunk_size=2, progress=False)
+    assert (done, errors) == (4, 2)
+    with open(results, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["id"] for r in rows] == ["a", "b", "c", "d"]
+    assert [bool(r["error"]) for r in rows] == [False, True, True, False]
+    assert float(rows[3]["yearly_production"]) > 0
+
+
+def test_parquet_without_pyarrow_is_a_clear_error(monkeypatch, tmp_path, capsys):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(SystemExit):
+        batch.main([str(tmp_path / "sites.parquet"), "-q"])
+    assert "pip install pyarrow" in capsys.readouterr().err
@@ -0,0 +1,88 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from solar.cashflow import DEGRADATION, compute_cashflow, inflation_path, monthly_production_array, rate_factors
+from solar.months import MONTHS_ORDER
+from solar.pipeline import Production, project_cashflow
+from solar.schedules import tariff_for
+
+MONTHLY = [520, 600, 690, 720, 760, 770, 760, 730, 650, 580, 500, 470]
+
+
+def loop_cashflow(monthly_prod, yearly_production, contract_years, monthly_inflation, k3, k4, t_base):
+    """حلقه سال/ماه نسخه اولیه main.py، مرجع موتور برداری."""
+    incomes, productions = [], []
+    for year in range(1, contract_years + 1):
+        degradation_factor = 1 - ((year - 1) * DEGRADATION)
+        year_income = year_production = 0
+        for month_idx in range(12):
+            global_month = (year - 1) * 12 + month_idx
+            prod = monthly_prod.get(MONTHS_ORDER[month_idx], yearly_production / 12) * degradation_factor
+            rate = t_base * (1 + monthly_inflation) ** global_month * 1.0 * k3 * k4
+            year_income += prod * rate
+            year_production += prod
+        incomes.append(year_income)
+        productions.append(year_production)
+    return np.array(incomes), np.array(productions)
+
+
+def satba_rate(contract_years, monthly_inflation, k3, k4, t_base):
+    return rate_factors(contract_years, t_base, 1.0, k3, k4) * inflation_path(contract_years, monthly_inflation)
+
+
+@pytest.mark.parametrize("contract_years", [1, 10, 20])
+@pytest.mark.parametrize("annual_inflation", [0.0, 0.3])
+@pytest.mark.parametrize("k3, k4", [(1.0, 1.0), (1.2, 0.95)])
+def test_matches_loop(contract_years, annual_inflation, k3, k4):
+    monthly_prod = dict(zip(MONTHS_ORDER, MONTHLY))
+    monthly_inflation = (1 + annual_inflation) ** (1 / 12) - 1
+    expected_income, expected_production = loop_cashflow(monthly_prod, sum(MONTHLY), contract_years,
+                                                         monthly_inflation, k3, k4, 3820)
+
+    result = compute_cashflow(monthly_production_array(monthly_prod, sum(MONTHLY)),
+                              satba_rate(contract_years, monthly_inflation, k3, k4, 3820))
+    np.testing.assert_allclose(result['yearly_income'], expected_income, rtol=1e-12)
+    np.testing.assert_allclose(result['yearly_production'], expected_production, rtol=1e-12)
+    assert result['total_income'] == pytest.approx(expected_income.sum(), rel=1e-12)
+    assert result['monthly_income'].shape == (contract_years * 12,)
+
+
+def test_missing_months_fall_back_to_yearly_average():
+    monthly_prod = {m: v for m, v in zip(MONTHS_ORDER[:6], MONTHLY[:6])}
+    yearly = 8000
+    expected_income, _ = loop_cashflow(monthly_prod, yearly, 20, 0.02, 1.2, 1.0, 3820)
+    result = compute_cashflow(monthly_production_array(monthly_prod, yearly), satba_rate(20, 0.02, 1.2, 1.0, 3820))
+    np.testing.assert_allclose(result['yearly_income'], expected_income, rtol=1e-12)
+
+
+def test_batch_rows_match_single_scenarios():
+    scenarios = np.array([MONTHLY, np.array(MONTHLY) * 0.8, np.array(MONTHLY) * 2.5])
+    rate = satba_rate(20, 0.022, 1.2, 1.0, 3820)
+    batch = compute_cashflow(scenarios, rate)
+    assert batch['yearly_income'].shape == (3, 20)
+    for row, monthly in enumerate(scenarios):
+        single = compute_cashflow(monthly, rate)
+        np.testing.assert_allclose(batch['yearly_income'][row], single['yearly_income'], rtol=1e-12)
+        assert batch['total_income'][row] == pytest.approx(single['total_income'], rel=1e-12)
+
+
+def test_project_cashflow_matches_loop_for_tariff():
+    tariff = tariff_for(5)
+    production = Production(yearly=sum(MONTHLY), monthly=dict(zip(MONTHS_ORDER, MONTHLY)), source="test")
+    cashflow = project_cashflow(production, tariff)
+    expected_income, _ = loop_cashflow(production.monthly, production.yearly, tariff.contract_years,
+                                       tariff.monthly_inflation, tariff.k3, tariff.k4, tariff.t_base)
+    np.testing.assert_allclose(cashflow.yearly_income, expected_income, rtol=1e-9)
+
+
+def test_project_cashflow_uses_tariff_steps_and_k2():
+    production = Production(sum(MONTHLY), dict(zip(MONTHS_ORDER, MONTHLY)), "test")
+    tariff = dataclasses.replace(tariff_for(5), k2=1.1, steps=((10, 0.7, None),))
+    cashflow = project_cashflow(production, tariff)
+    expected = compute_cashflow(production.as_array(), tariff.rate_vector())
+    np.testing.assert_allclose(cashflow.monthly_income, expected['monthly_income'], rtol=1e-12)
+    flat = project_cashflow(production, tariff_for(5))
+    assert cashflow.yearly_income[0] == pytest.approx(1.1 * flat.yearly_income[0])
+    assert cashflow.yearly_income[10] == pytest.approx(1.1 * 0.7 * flat.yearly_income[10])
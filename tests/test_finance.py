@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+import pytest
+
+from solar.finance import discounted_payback, financial_metrics, irr, lcoe, npv
+from solar.metrics import calculate_roi, payback_years_batch
+
+
+def annuity_factor(rate, years):
+    return (1 - (1 + rate) ** -years) / rate
+
+
+def test_npv_known_values():
+    assert npv([110.0], 100, 0.1) == pytest.approx(0.0, abs=1e-9)
+    assert npv([60.0, 60.0], 100, 0.1) == pytest.approx(60 / 1.1 + 60 / 1.21 - 100)
+    assert npv([50.0] * 4, 100, 0.0) == pytest.approx(100.0)
+
+
+def test_irr_known_values():
+    assert irr([110.0], 100) == pytest.approx(0.10, abs=1e-10)
+    # 60x + 60x² = 100، x = 1 / (1 + r)
+    x = (-60 + math.sqrt(60 ** 2 + 4 * 60 * 100)) / (2 * 60)
+    assert irr([60.0, 60.0], 100) == pytest.approx(1 / x - 1, abs=1e-10)
+    for rate in (0.05, 0.15, 0.5, 1.2):
+        cost = annuity_factor(rate, 20)
+        assert irr(np.ones(20), cost) == pytest.approx(rate, abs=1e-9)
+
+
+def test_irr_is_root_of_npv():
+    incomes = np.array([10.0, 25.0, 40.0, 40.0, 35.0, 30.0])
+    rate = irr(incomes, 100)
+    assert npv(incomes, 100, rate) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_irr_nan_without_sign_change():
+    assert np.isnan(irr(np.zeros(20), 100))
+    assert np.isnan(irr(np.full(20, -5.0), 100))
+    # بدون هزینه اولیه NPV در همه نرخ‌ها مثبت است
+    assert np.isnan(irr(np.full(20, 5.0), 0))
+
+
+def test_irr_batch_matches_rows():
+    incomes = np.array([np.ones(20), np.full(20, 2.0), np.zeros(20)])
+    costs = np.array([annuity_factor(0.15, 20), annuity_factor(0.15, 20), 10.0])
+    rates = irr(incomes, costs)
+    assert rates.shape == (3,)
+    assert rates[0] == pytest.approx(0.15, abs=1e-9)
+    assert rates[1] == pytest.approx(irr(incomes[1], costs[1]), abs=1e-12)
+    assert np.isnan(rates[2])
+
+
+def test_discounted_payback_known_values():
+    # درآمد تنزیل‌شده با ۱۰٪: [100، 100]
+    assert discounted_payback([110.0, 121.0], 150, 0.1) == pytest.approx(1.5)
+    assert np.isnan(discounted_payback([110.0, 121.0], 250, 0.1))
+    # با نرخ صفر همان بازگشت ساده است
+    incomes = [30.0, 40.0, 50.0, 60.0]
+    assert discounted_payback(incomes, 100, 0.0) == pytest.approx(calculate_roi(incomes, 100))
+
+
+def test_payback_batch_matches_calculate_roi():
+    rng = np.random.default_rng(0)
+    incomes = rng.uniform(0, 50, (200, 20))
+    costs = rng.uniform(100, 1200, 200)
+    batch = payback_years_batch(incomes, costs)
+    for row, cost, value in zip(incomes, costs, batch):
+        expected = calculate_roi(row.tolist(), cost)
+        if expected is None:
+            assert np.isnan(value)
+        else:
+            assert value == pytest.approx(expected)
+
+
+def test_lcoe():
+    assert lcoe([100.0, 100.0], 1000, 0.0) == pytest.approx(5.0)
+    assert lcoe([100.0], 110, 0.1) == pytest.approx(1.21)
+    assert np.isnan(lcoe([0.0, 0.0], 1000, 0.1))
+
+
+def test_financial_metrics_bundle():
+    metrics = financial_metrics(np.ones(20), np.full(20, 10.0), annuity_factor(0.15, 20), 0.15)
+    assert metrics['npv'] == pytest.approx(0.0, abs=1e-9)
+    assert metrics['irr'] == pytest.approx(0.15, abs=1e-9)
+    assert metrics['discounted_payback'] == pytest.approx(20.0)
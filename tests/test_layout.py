@@ -0,0 +1,78 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from solar.layout import COLUMN_GAP, layout_panels, row_geometry, winter_noon_altitude
+
+# پنل ۲ × ۱ متر؛ با شیب صفر عمق ردیف همان طول پنل و فاصله ردیف‌ها فقط COLUMN_GAP است
+PANEL = {'length_mm': 2000, 'width_mm': 1000}
+LAT = 35.69
+
+
+def rectangle(width, depth):
+    return [(0, 0), (width, 0), (width, depth), (0, depth)]
+
+
+@pytest.mark.parametrize("width, depth, tilt, expected, orientation", [
+    # ۹ × ۹ مفید؛ عمودی: ۸ ستون (۹.۰۲ // ۱.۰۲) × ۴ ردیف ((۹ - ۲) // ۲.۰۲ + ۱)؛ افقی هم ۴ × ۸
+    (10, 10, 0, 32, "portrait"),
+    # ۱۱.۳ × ۶.۷ مفید؛ عمودی ۱۱ × ۳ = ۳۳، افقی ۵ × ۶ = ۳۰
+    (12.3, 7.7, 0, 33, "portrait"),
+    # شیب ۳۰: عمق ۱.۷۳۲، سایه ۱ / tan(۳۰.۸۷°) = ۱.۶۷۳، گام ۳.۴۰۵ → عمودی ۸ × ۳ = ۲۴، افقی ۴ × ۵ = ۲۰
+    (10, 10, 30, 24, "portrait"),
+])
+def test_rectangle_counts(width, depth, tilt, expected, orientation):
+    layout = layout_panels(PANEL, tilt, LAT, width, depth)
+    assert layout['count'] == expected == len(layout['positions'])
+    assert layout['orientation'] == orientation
+    assert layout['roof_area'] == pytest.approx(width * depth)
+
+
+def test_row_pitch_uses_winter_noon_shadow():
+    geometry = row_geometry(PANEL, 30, LAT, "portrait")
+    altitude = math.radians(90 - LAT - 23.44)
+    assert winter_noon_altitude(LAT) == pytest.approx(90 - LAT - 23.44)
+    assert geometry['panel_depth'] == pytest.approx(2 * math.cos(math.radians(30)))
+    assert geometry['row_gap'] == pytest.approx(2 * math.sin(math.radians(30)) / math.tan(altitude))
+
+
+def test_roof_smaller_than_panel_is_empty():
+    assert layout_panels(PANEL, 30, LAT, 1.5, 2.5)['count'] == 0
+
+
+@pytest.mark.parametrize("width, depth, tilt", [(10, 10, 0), (12.3, 7.7, 30), (30, 20, 20)])
+def test_panels_inside_setback_without_overlap(width, depth, tilt):
+    setback = 0.5
+    layout = layout_panels(PANEL, tilt, LAT, width, depth, setback=setback)
+    p = layout['positions']
+    assert (p[:, 0] >= setback - 1e-9).all() and (p[:, 1] >= setback - 1e-9).all()
+    assert (p[:, 0] + p[:, 2] <= width - setback + 1e-9).all()
+    assert (p[:, 1] + p[:, 3] <= depth - setback + 1e-9).all()
+    for a, b in itertools.combinations(p, 2):
+        apart_x = a[0] + a[2] + COLUMN_GAP <= b[0] + 1e-9 or b[0] + b[2] + COLUMN_GAP <= a[0] + 1e-9
+        apart_y = a[1] + a[3] + layout['row_gap'] <= b[1] + 1e-9 or b[1] + b[3] + layout['row_gap'] <= a[1] + 1e-9
+        assert apart_x or apart_y
+
+
+@pytest.mark.parametrize("width, depth, tilt", [(10, 10, 0), (12.3, 7.7, 30), (30, 20, 20), (100, 100, 35)])
+def test_rectangle_polygon_matches_closed_form(width, depth, tilt):
+    closed = layout_panels(PANEL, tilt, LAT, width, depth)
+    scanned = layout_panels(PANEL, tilt, LAT, polygon=rectangle(width, depth))
+    assert scanned['count'] == closed['count']
+    assert scanned['roof_area'] == pytest.approx(closed['roof_area'])
+
+
+def test_count_grows_with_roof():
+    counts = [layout_panels(PANEL, 30, LAT, size, size)['count'] for size in (5, 10, 20, 40)]
+    assert counts == sorted(counts) and counts[0] < counts[-1]
+
+
+def test_l_shaped_roof_fits_fewer_than_its_bounding_box():
+    l_shape = [(0, 0), (20, 0), (20, 8), (8, 8), (8, 20), (0, 20)]
+    count = layout_panels(PANEL, 30, LAT, polygon=l_shape)['count']
+    assert 0 < count < layout_panels(PANEL, 30, LAT, 20, 20)['count']
+    # هر پایه L جدا به‌عنوان مستطیل یک کران پایین است
+    assert count >= layout_panels(PANEL, 30, LAT, 20, 8)['count']
+    assert np.isfinite(layout_panels(PANEL, 30, LAT, polygon=l_shape)['positions']).all()
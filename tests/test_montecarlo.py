@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from solar.months import MONTHS_ORDER
+from solar.montecarlo import simulate
+from solar.pipeline import Production, evaluate_metrics, project_cashflow
+from solar.schedules import tariff_for
+
+MONTHLY = [520, 600, 690, 720, 760, 770, 760, 730, 650, 580, 500, 470]
+PRODUCTION = Production(yearly=sum(MONTHLY), monthly=dict(zip(MONTHS_ORDER, MONTHLY)), source="test",
+                        monthly_sd={m: v * 0.08 for m, v in zip(MONTHS_ORDER, MONTHLY)})
+INITIAL_COST = 150_000_000
+TARIFF = tariff_for(5)
+DISCOUNT_RATE = 0.3
+
+
+def deterministic(**kwargs):
+    options = dict(n_paths=50, seed=1, inflation_sd=0, degradation_sd=0, irradiance_sd=0, downtime_probability=0,
+                   discount_rate=DISCOUNT_RATE)
+    return simulate(PRODUCTION, INITIAL_COST, TARIFF, **{**options, **kwargs})
+
+
+def test_no_noise_matches_deterministic_cashflow():
+    cashflow = project_cashflow(PRODUCTION, TARIFF)
+    metrics = evaluate_metrics(cashflow, INITIAL_COST, DISCOUNT_RATE)
+    risk = deterministic()
+
+    for key in ('p10', 'p50', 'p90'):
+        assert risk['profit'][key] == pytest.approx(metrics.profit, rel=1e-9)
+        assert risk['payback'][key] == pytest.approx(metrics.payback_years, rel=1e-9)
+        assert risk['npv'][key] == pytest.approx(metrics.npv, rel=1e-9)
+        assert risk['irr'][key] == pytest.approx(metrics.irr, rel=1e-6)
+    np.testing.assert_allclose(risk['yearly_income_p50'], cashflow.yearly_income, rtol=1e-9)
+    assert risk['loss_probability'] == 0.0
+    assert risk['payback_probability'] == 1.0
+
+
+def test_no_noise_matches_for_small_batches():
+    assert deterministic(batch_size=7)['profit'] == deterministic()['profit']
+
+
+def test_irradiance_noise_spreads_profit():
+    quiet = deterministic()
+    noisy = deterministic(irradiance_sd=0.1)
+    assert noisy['profit']['p10'] < quiet['profit']['p50'] < noisy['profit']['p90']
+
+
+def test_seed_is_reproducible():
+    a = simulate(PRODUCTION, INITIAL_COST, TARIFF, n_paths=200, seed=7)
+    b = simulate(PRODUCTION, INITIAL_COST, TARIFF, n_paths=200, seed=7)
+    assert a['profit'] == b['profit'] and a['payback'] == b['payback']
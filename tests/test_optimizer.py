@@ -0,0 +1,46 @@
+from dataclasses import replace
+
+import pytest
+
+from solar import optimizer
+from solar.catalog import ALL_PANELS
+from solar.optimizer import TILT_MAX, TILT_MIN, TILTS, optimize
+from solar.pipeline import Site
+from solar.schedules import tariff_for
+
+SITE = Site(35.69, 51.39)
+PANEL = next(iter(ALL_PANELS))
+OPTIONS = dict(panels=[PANEL], inverter_brands=["Growatt"], azimuths=(0,), power_step=20, limit=1000)
+
+
+def key(row):
+    return row['panel_power'], row['tilt'], row['azimuth']
+
+
+def test_tilts_stay_in_ui_range():
+    assert min(TILTS) == TILT_MIN and max(TILTS) == TILT_MAX
+    rows = optimize(SITE, 30, panels=[PANEL], inverter_brands=["Growatt"], power_step=20, limit=50)
+    assert rows and all(TILT_MIN <= r['tilt'] <= TILT_MAX for r in rows)
+
+
+def test_mixed_contract_lengths_use_each_tariff(monkeypatch):
+    short, long = replace(tariff_for(5), contract_years=10), replace(tariff_for(5), contract_years=20)
+    single = {years: {key(r): r for r in optimize(SITE, 30, tariff=t, **OPTIONS)}
+              for years, t in ((10, short), (20, long))}
+    powers = sorted({k[0] for k in single[20]})
+    assert len(powers) > 1
+    threshold = powers[len(powers) // 2]
+    # طراحی‌های کم‌توان‌تر قرارداد ۱۰ ساله و بقیه ۲۰ ساله دارند
+    capacity_by_power = {r['panel_power']: r['capacity_kw'] for r in single[20].values()}
+    cutoff = capacity_by_power[threshold]
+    monkeypatch.setattr(optimizer, "tariff_for", lambda capacity_kw, schedule=None: short if capacity_kw < cutoff else long)
+
+    mixed = optimize(SITE, 30, **OPTIONS)
+    assert {key(r) for r in mixed} == set(single[20])
+    for row in mixed:
+        expected = single[10 if row['capacity_kw'] < cutoff else 20][key(row)]
+        for field in ('profit', 'npv', 'payback_years', 'irr'):
+            if expected[field] is None:
+                assert row[field] is None
+            else:
+                assert row[field] == pytest.approx(expected[field], rel=1e-9)
@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+
+from solar import pvgis_cache
+from solar.pvgis_cache import PVGISCache
+from solar.sources import get_pvgis_data
+
+RECORD = {'yearly': 1600.0, 'monthly': {'فروردین': 150.0}, 'source': 'PVGIS'}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PVGISCache(str(tmp_path / "pvgis.sqlite3"))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(pvgis_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_exact_hit(cache):
+    cache.put(35.69, 51.39, 35, RECORD)
+    assert cache.lookup(35.69, 51.39, 35) == RECORD
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['reused']) == (1, 0, 0)
+    assert stats['hit_rate'] == 1.0
+
+
+def test_neighbour_reuse_is_not_a_miss(cache):
+    cache.put(35.69, 51.39, 35, RECORD)
+    record = cache.lookup(35.70, 51.40, 35, max_km=3)
+    assert record['yearly'] == RECORD['yearly']
+    assert "همسایه" in record['source']
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['reused']) == (0, 0, 1)
+    assert stats['hit_rate'] == 1.0
+
+
+def test_miss_counted_once_when_nothing_near(cache):
+    cache.put(35.69, 51.39, 35, RECORD)
+    assert cache.lookup(36.5, 52.5, 35, max_km=3) is None
+    assert cache.lookup(35.70, 51.40, 20, max_km=3) is None   # زاویه دیگر
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['reused']) == (0, 2, 0)
+    assert stats['process_misses'] == 2
+    assert stats['hit_rate'] == 0.0
+
+
+def test_clear_resets_all_counters(cache):
+    cache.put(35.69, 51.39, 35, RECORD)
+    cache.lookup(35.69, 51.39, 35)
+    cache.lookup(35.70, 51.40, 35)
+    cache.lookup(10.0, 10.0, 35)
+    cache.clear()
+    stats = cache.stats()
+    assert stats['entries'] == 0
+    assert all(stats[k] == 0 for k in ('hits', 'misses', 'reused', 'process_hits', 'process_misses', 'process_reused'))
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = PVGISCache(str(tmp_path / "pvgis.sqlite3"), ttl=100)
+    cache.put(35.69, 51.39, 35, RECORD)
+    clock.now += 99
+    assert cache.get(35.69, 51.39, 35) == RECORD
+    clock.now += 2
+    assert cache.get(35.69, 51.39, 35) is None
+    assert cache.nearest(35.70, 51.40, 35, max_km=3) is None
+    cache.evict()
+    assert cache.stats()['entries'] == 0
+
+
+def test_evict_drops_least_recently_accessed(tmp_path, clock):
+    cache = PVGISCache(str(tmp_path / "pvgis.sqlite3"), max_entries=2)
+    for lat in (30.0, 31.0, 32.0):
+        cache.put(lat, 51.0, 35, RECORD)
+        clock.now += 1
+    cache.get(30.0, 51.0, 35)   # قدیمی‌ترین put تازه‌ترین دسترسی می‌شود
+    cache.evict()
+    assert cache.stats()['entries'] == 2
+    assert cache.get(31.0, 51.0, 35, count_miss=False) is None
+    assert cache.get(30.0, 51.0, 35) == RECORD and cache.get(32.0, 51.0, 35) == RECORD
+
+
+def test_per_kwp_record_is_scaled_to_capacity(cache):
+    record = {**RECORD, 'monthly_sd': {'فروردین': 10.0}}
+    cache.put(35.69, 51.39, 35, record)
+
+    class Offline:
+        def fetch_per_kwp(self, *args):
+            raise AssertionError("درخواست به PVGIS نباید برود")
+
+    result = get_pvgis_data(35.69, 51.39, 4.5, 35, cache=cache, client=Offline())
+    assert result['success']
+    assert result['yearly'] == pytest.approx(4.5 * 1600)
+    assert result['monthly'] == {'فروردین': pytest.approx(4.5 * 150)}
+    assert result['monthly_sd'] == {'فروردین': pytest.approx(4.5 * 10)}
+    assert cache.get(35.69, 51.39, 35) == record   # خود کش همچنان به ازای هر kWp است
+
+
+def test_neighbour_cell_reused_across_grid_boundary(cache):
+    cache.put(35.694, 51.39, 35, RECORD)
+    assert cache.cell(35.694, 51.39) != cache.cell(35.696, 51.39)
+    assert cache.get(35.696, 51.39, 35, count_miss=False) is None
+    record = cache.lookup(35.696, 51.39, 35, max_km=3)
+    assert record['yearly'] == RECORD['yearly'] and "همسایه" in record['source']
+    assert cache.lookup(35.696, 51.39, 35, max_km=0) is None
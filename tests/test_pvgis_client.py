@@ -0,0 +1,180 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.mock_pvgis import MONTHLY_PER_KWP, MockPVGISServer
+from solar.pvgis_client import CircuitBreaker, CircuitOpenError, PVGISClient, PVGISError
+
+
+@pytest.fixture
+def server():
+    with MockPVGISServer() as server:
+        yield server
+
+
+def make_client(server, **kwargs):
+    kwargs.setdefault("backoff", 0.001)
+    kwargs.setdefault("max_backoff", 0.01)
+    return PVGISClient(base_url=server.url, **kwargs)
+
+
+def test_success_parses_response(server):
+    record = make_client(server).fetch_per_kwp(35.69, 51.39, 35)
+    assert record['yearly'] == pytest.approx(sum(MONTHLY_PER_KWP))
+    assert len(record['monthly']) == 12
+    assert server.requests == 1
+
+
+def test_retries_5xx_then_succeeds(server):
+    server.errors = [503, 502]
+    client = make_client(server, retries=2)
+    record = client.fetch_per_kwp(35.69, 51.39, 35)
+    assert record['source'] == 'PVGIS'
+    assert server.requests == 3
+    assert client.breaker.state == "closed" and client.breaker.failures == 0
+
+
+def test_5xx_exhausts_retries(server):
+    server.errors = [500] * 3
+    client = make_client(server, retries=2)
+    with pytest.raises(PVGISError, match="500"):
+        client.fetch_per_kwp(35.69, 51.39, 35)
+    assert server.requests == 3
+    assert client.breaker.failures == 1
+
+
+def test_4xx_is_not_retried(server):
+    server.errors = [400]
+    client = make_client(server, retries=3)
+    with pytest.raises(PVGISError, match="400"):
+        client.fetch_per_kwp(35.69, 51.39, 35)
+    assert server.requests == 1
+    # خطای ورودی مدار را باز نمی‌کند
+    assert client.breaker.failures == 0
+
+
+def test_429_is_retried(server):
+    server.errors = [429]
+    make_client(server, retries=1).fetch_per_kwp(35.69, 51.39, 35)
+    assert server.requests == 2
+
+
+def test_circuit_open_half_open_closed(server):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    client = make_client(server, retries=0, breaker=breaker)
+    server.errors = [500, 500]
+    for _ in range(2):
+        with pytest.raises(PVGISError):
+            client.fetch_per_kwp(35.69, 51.39, 35)
+    assert breaker.state == "open"
+
+    # مدار باز: بدون ارسال درخواست رد می‌شود
+    with pytest.raises(CircuitOpenError):
+        client.fetch_per_kwp(35.69, 51.39, 35)
+    assert server.requests == 2
+
+    time.sleep(0.25)
+    assert breaker.state == "half-open"
+    client.fetch_per_kwp(35.69, 51.39, 35)
+    assert server.requests == 3
+    assert breaker.state == "closed"
+
+
+def test_half_open_failure_reopens(server):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.2)
+    client = make_client(server, retries=0, breaker=breaker)
+    server.errors = [500]
+    with pytest.raises(PVGISError):
+        client.fetch_per_kwp(35.69, 51.39, 35)
+    time.sleep(0.25)
+    assert breaker.state == "half-open"
+    server.errors = [500]
+    with pytest.raises(PVGISError):
+        client.fetch_per_kwp(35.69, 51.39, 35)
+    assert breaker.state == "open"
+
+
+def test_half_open_lets_exactly_one_probe_through():
+    with MockPVGISServer(latency=0.2) as server:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+        client = make_client(server, retries=0, breaker=breaker)
+        server.errors = [500]
+        with pytest.raises(PVGISError):
+            client.fetch_per_kwp(35.69, 51.39, 35)
+        time.sleep(0.15)
+        assert breaker.state == "half-open"
+
+        threads = 8
+        barrier = threading.Barrier(threads)
+        outcomes = [None] * threads
+
+        def fetch(i):
+            barrier.wait()
+            try:
+                client.fetch_per_kwp(35.69, 51.39, 10 + i)   # نقطه‌های متفاوت، بدون ادغام
+                outcomes[i] = "ok"
+            except CircuitOpenError:
+                outcomes[i] = "rejected"
+
+        workers = [threading.Thread(target=fetch, args=(i,)) for i in range(threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        assert server.requests == 2   # شکست اول + یک درخواست آزمایشی
+        assert outcomes.count("ok") == 1 and outcomes.count("rejected") == threads - 1
+        assert breaker.state == "closed"
+
+
+def test_probe_without_verdict_frees_the_slot(server):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    client = make_client(server, retries=0, breaker=breaker)
+    server.errors = [500]
+    with pytest.raises(PVGISError):
+        client.fetch_per_kwp(35.69, 51.39, 35)
+    time.sleep(0.15)
+    server.errors = [400]   # خطای ورودی درباره سلامت سرویس چیزی نمی‌گوید
+    with pytest.raises(PVGISError, match="400"):
+        client.fetch_per_kwp(35.69, 51.39, 35)
+    assert breaker.state == "half-open"
+    client.fetch_per_kwp(35.69, 51.39, 35)
+    assert breaker.state == "closed"
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    with MockPVGISServer(latency=0.3) as server:
+        client = make_client(server)
+        threads = 8
+        barrier = threading.Barrier(threads)
+        results = [None] * threads
+
+        def fetch(i):
+            barrier.wait()
+            results[i] = client.fetch_per_kwp(35.69, 51.39, 35)
+
+        workers = [threading.Thread(target=fetch, args=(i,)) for i in range(threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        assert server.requests == 1
+        assert client.coalesced == threads - 1
+        assert all(r == results[0] for r in results)
+        # پس از پایان، همان نقطه دوباره درخواست می‌شود (نتیجه در کلاینت نگه داشته نمی‌شود)
+        client.fetch_per_kwp(35.69, 51.39, 35)
+        assert server.requests == 2
+
+
+def test_different_points_are_not_coalesced():
+    with MockPVGISServer(latency=0.1) as server:
+        client = make_client(server)
+        workers = [threading.Thread(target=client.fetch_per_kwp, args=(35.69, 51.39, tilt)) for tilt in (20, 30, 40)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        assert server.requests == 3
+        assert client.coalesced == 0
@@ -0,0 +1,68 @@
+import io
+
+import numpy as np
+import pytest
+
+from solar import report
+from solar.formatting import persian_numbers, to_persian_number
+from solar.pipeline import CashFlow, Metrics, Production, SystemDesign
+from solar.scenarios import Scenario, scenario_key
+
+INPUTS = {'lat': 35.69, 'lon': 51.39, 'tilt': 35, 'schedule': "satba@v1"}
+
+
+@pytest.fixture
+def scenario():
+    months = np.arange(1, 25, dtype=float)
+    cashflow = CashFlow(months * 60, months * 4000, months * 240_000,
+                        months.reshape(2, 12).sum(axis=1) * 60, months.reshape(2, 12).sum(axis=1) * 240_000)
+    design = SystemDesign("LONGi", 550, 10, 5.5, 26.0, {'model': "MIN 5000TL-X"}, 90_000_000, 30_000_000)
+    production = Production(7800.0, {'فروردین': 650.0}, "PVGIS")
+    metrics = Metrics(120_000_000, 72_000_000.0, -48_000_000.0, None, npv=-6.1e7, irr=None, lcoe=4100.5)
+    return Scenario(scenario_key(INPUTS), INPUTS, "تهران", design, production, cashflow, metrics, 1_700_000_000.0)
+
+
+def test_xlsx_summary_keeps_numbers_and_text(scenario):
+    openpyxl = pytest.importorskip("openpyxl")
+    buffer = io.BytesIO()
+    report.write_report_xlsx(scenario, buffer)
+    workbook = openpyxl.load_workbook(buffer)
+    assert workbook.sheetnames == ["خلاصه", "سالانه", "ماهانه"]
+    values = {title: value for title, value, _ in workbook["خلاصه"].iter_rows(min_row=2, values_only=True)}
+    assert values["محل"] == "تهران"
+    assert values["ظرفیت"] == 5.5
+    assert values["هزینه احداث"] == 120_000_000
+    assert values["بازگشت سرمایه"] == "—"
+    monthly = workbook["ماهانه"]
+    assert monthly.sheet_view.rightToLeft
+    assert monthly.max_row == 25
+    assert monthly["E2"].value == 240_000 and monthly["E2"].number_format == "#,##0"
+
+
+def test_persian_numbers_matches_single_value_path():
+    values = [0, 7, 1234, 9_876_543]
+    assert persian_numbers(values) == [to_persian_number(v) for v in values]
+    assert persian_numbers(np.array([-1234.5]), decimals=1) == ["-۱,۲۳۴.۵"]
+
+
+def test_pdf_text_is_extractable(scenario):
+    buffer = io.BytesIO()
+    report.write_report_pdf(scenario, buffer)
+    data = buffer.getvalue()
+    assert data.startswith(b"%PDF-") and b"/ToUnicode" in data
+    pypdf = pytest.importorskip("pypdf")
+    text = pypdf.PdfReader(io.BytesIO(data)).pages[0].extract_text()
+    assert "MIN 5000TL-X" in text
+
+
+def test_visual_order_mirrors_brackets_in_rtl_text():
+    assert report._visual("۱۲,۳۴۵") == "۱۲,۳۴۵"
+    visual = report._visual("تولید (kWh)")
+    assert visual.startswith("(kWh) ")
+
+
+def test_export_report_is_written_once(scenario, tmp_path, monkeypatch):
+    monkeypatch.setattr(report, "EXPORT_DIR", str(tmp_path))
+    first = report.export_report(scenario, "xlsx")
+    assert report.export_report(scenario, "xlsx") == first
+    assert [p.name for p in tmp_path.iterdir()] == [f"{scenario.key}-r{report.REPORT_VERSION}.xlsx"]
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pytest
+
+from solar import scenarios
+from solar.pipeline import CashFlow, Metrics, Production, SystemDesign
+from solar.scenarios import Scenario, ScenarioStore, scenario_key
+
+INPUTS = {'lat': 35.69, 'lon': 51.39, 'tilt': 35, 'schedule': "satba@v1"}
+
+
+def make_scenario():
+    months = np.arange(24, dtype=float)
+    cashflow = CashFlow(months, months * 10, months * 100, np.array([66.0, 210.0]), np.array([6600.0, 21000.0]))
+    design = SystemDesign("LONGi", 550, 10, 5.5, 26.0, {'model': "MIN 5000TL-X"}, 90_000_000, 30_000_000)
+    production = Production(7800.0, {'فروردین': 650.0}, "PVGIS")
+    metrics = Metrics(120_000_000, 27_600.0, -119_972_400.0, None, npv=-1.2e8, irr=None)
+    return Scenario(scenario_key(INPUTS), INPUTS, "تهران", design, production, cashflow, metrics, 1_700_000_000.0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ScenarioStore(str(tmp_path / "scenarios.sqlite3"))
+
+
+def rewrite_meta(store, key, change):
+    conn = store._conn()
+    meta = json.loads(conn.execute("SELECT meta FROM scenarios WHERE key=?", (key,)).fetchone()[0])
+    change(meta)
+    with conn:
+        conn.execute("UPDATE scenarios SET meta=? WHERE key=?", (json.dumps(meta, ensure_ascii=False), key))
+
+
+def test_round_trip(store):
+    scenario = make_scenario()
+    store.put(scenario)
+    loaded = store.get(scenario.key)
+    assert loaded.design == scenario.design and loaded.metrics == scenario.metrics
+    assert loaded.production == scenario.production and loaded.inputs == INPUTS
+    np.testing.assert_array_equal(loaded.cashflow.monthly_income, scenario.cashflow.monthly_income)
+
+
+def test_other_model_version_is_stale(store, monkeypatch):
+    scenario = make_scenario()
+    store.put(scenario)
+    monkeypatch.setattr(scenarios, "MODEL_VERSION", scenarios.MODEL_VERSION + 1)
+    assert store.get(scenario.key) is None
+    assert store.recent() == []
+
+
+def test_row_without_model_version_is_stale(store):
+    scenario = make_scenario()
+    store.put(scenario)
+    rewrite_meta(store, scenario.key, lambda meta: meta.pop('model'))
+    assert store.get(scenario.key) is None
+
+
+def test_incompatible_row_is_stale_not_an_error(store):
+    scenario = make_scenario()
+    store.put(scenario)
+    rewrite_meta(store, scenario.key, lambda meta: meta['metrics'].pop('initial_cost'))
+    assert store.get(scenario.key) is None
+    assert store.get("missing") is None
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from solar.cashflow import degradation_vector
+from solar.months import MONTHS_ORDER
+from solar.pipeline import Production, project_cashflow
+from solar.schedules import tariff_for
+from solar.selfconsumption import (
+    HOUR_SHAMSI_MONTH, HOURS, Battery, _dispatch, archetype_profile, simulate_self_consumption,
+)
+
+TARIFF = tariff_for(5)
+
+
+def solar_shape(yearly_kwh=8000.0):
+    hour = np.arange(HOURS) % 24
+    shape = np.clip(np.sin((hour - 2) / 12 * np.pi), 0, None)   # روز از ۲ تا ۱۴ UTC
+    return shape / shape.sum() * yearly_kwh
+
+
+def dispatch_loop(net, battery):
+    """نسخه ساعت‌به‌ساعت یک‌سطری _dispatch به عنوان مرجع."""
+    efficiency = battery.round_trip_efficiency ** 0.5
+    floor = battery.min_soc * battery.capacity_kwh
+    soc, flows = floor, []
+    for surplus in net:
+        charge = min(max(surplus, 0), battery.power_kw, (battery.capacity_kwh - soc) / efficiency)
+        discharge = min(max(-surplus, 0), battery.power_kw, (soc - floor) * efficiency)
+        soc += charge * efficiency - discharge / efficiency
+        assert floor - 1e-9 <= soc <= battery.capacity_kwh + 1e-9
+        flows.append(charge - discharge)
+    return np.array(flows)
+
+
+def test_energy_balance_without_battery():
+    production, load = solar_shape(), archetype_profile("household")
+    result = simulate_self_consumption(production, load, TARIFF)
+    produced = production.sum() * degradation_vector(TARIFF.contract_years)
+    np.testing.assert_allclose(result['yearly_self_consumed'] + result['yearly_exported'], produced)
+    np.testing.assert_allclose(result['yearly_self_consumed'] + result['yearly_imported'], load.sum())
+    assert result['yearly_self_consumed'][0] == pytest.approx(np.minimum(production, load).sum())
+
+
+def test_zero_load_exports_everything_at_satba_rate():
+    production = solar_shape()
+    result = simulate_self_consumption(production, np.zeros(HOURS), TARIFF)
+    monthly = np.bincount(HOUR_SHAMSI_MONTH, weights=production, minlength=12)
+    cashflow = project_cashflow(Production(monthly.sum(), dict(zip(MONTHS_ORDER, monthly)), "test"), TARIFF)
+    np.testing.assert_allclose(result['yearly_income'], cashflow.yearly_income, rtol=1e-9)
+    assert result['self_consumption_ratio'] == 0.0
+    assert result['yearly_savings'].sum() == 0.0
+
+
+def test_savings_use_retail_price():
+    production = solar_shape()
+    load = np.full(HOURS, 10.0)   # مصرف همیشه بیشتر از تولید
+    result = simulate_self_consumption(production, load, TARIFF, retail_price=2000, retail_escalation=0.0)
+    assert result['yearly_exported'].sum() == pytest.approx(0.0)
+    np.testing.assert_allclose(result['yearly_savings'], result['yearly_self_consumed'] * 2000)
+    assert result['self_consumption_ratio'] == pytest.approx(1.0)
+
+
+def test_dispatch_matches_hourly_loop_and_limits():
+    battery = Battery(capacity_kwh=10, power_kw=3, round_trip_efficiency=0.9, min_soc=0.1)
+    net = solar_shape(6000) - archetype_profile("household", 5000)
+    flow = _dispatch(net[None, :], battery)[0]
+    np.testing.assert_allclose(flow, dispatch_loop(net, battery), atol=1e-9)
+    assert np.abs(flow).max() <= battery.power_kw + 1e-9
+    # شارژ فقط از مازاد و دشارژ فقط برای کمبود
+    assert (flow[net <= 0] <= 1e-12).all() and (flow[net >= 0] >= -1e-12).all()
+
+
+def test_battery_raises_self_consumption_and_keeps_balance():
+    production, load = solar_shape(), archetype_profile("household")
+    battery = Battery(capacity_kwh=10, power_kw=3)
+    plain = simulate_self_consumption(production, load, TARIFF)
+    stored = simulate_self_consumption(production, load, TARIFF, battery=battery)
+    assert stored['yearly_self_consumed'][0] > plain['yearly_self_consumed'][0]
+    np.testing.assert_allclose(stored['yearly_self_consumed'] + stored['yearly_imported'], load.sum())
+    # انرژی تحویلی باتری از انرژی شارژشده (با تلفات رفت‌وبرگشت) بیشتر نیست
+    charged = plain['yearly_exported'] - stored['yearly_exported']
+    delivered = stored['yearly_self_consumed'] - plain['yearly_self_consumed']
+    assert (delivered <= charged * battery.round_trip_efficiency + 1e-6).all()
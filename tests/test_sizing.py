@@ -0,0 +1,45 @@
+import pytest
+
+from solar.catalog import INVERTERS
+from solar.sizing import DC_AC_RATIO_RANGE, MAX_UNITS, get_suitable_inverter, size_inverters
+
+CAPACITIES = [3.3, 4.64, 7.5, 12.1, 18.0, 26.4, 55.0, 100.0, 250.0]
+
+
+@pytest.mark.parametrize("brand", list(INVERTERS))
+@pytest.mark.parametrize("capacity_kw", CAPACITIES)
+def test_pick_stays_in_dc_ac_range(brand, capacity_kw):
+    inverter = get_suitable_inverter(capacity_kw, brand)
+    low, high = DC_AC_RATIO_RANGE
+    assert low - 1e-9 <= inverter['dc_ac_ratio'] <= high + 1e-9
+    assert inverter['size_kw'] == pytest.approx(sum(u['size_kw'] for u in inverter['units']))
+    assert inverter['price'] == pytest.approx(sum(u['price'] for u in inverter['units']))
+
+
+def test_pick_is_cheapest_single_unit_when_one_fits():
+    # ۵ kW: یک دستگاه ۵ kW (نسبت ۱) ارزان‌تر از هر ترکیب دیگر داخل بازه است
+    inverter = get_suitable_inverter(5.0, "Growatt")
+    assert [u['size_kw'] for u in inverter['units']] == [5]
+
+
+def test_small_system_falls_back_below_range():
+    # کوچک‌تر از کوچک‌ترین مدل: نسبت زیر بازه ولی اینورتر انتخاب می‌شود
+    inverter = get_suitable_inverter(1.5, "Growatt")
+    assert inverter['size_kw'] == 3
+    assert inverter['dc_ac_ratio'] < DC_AC_RATIO_RANGE[0]
+
+
+@pytest.mark.parametrize("capacity_kw", [600.0, 1222.0])
+def test_large_system_scales_unit_count(capacity_kw):
+    largest = max(INVERTERS["Growatt"]["models"])
+    assert capacity_kw / (MAX_UNITS * largest) > DC_AC_RATIO_RANGE[1]
+    inverter = get_suitable_inverter(capacity_kw, "Growatt")
+    assert inverter is not None
+    assert len(inverter['units']) > MAX_UNITS
+    low, high = DC_AC_RATIO_RANGE
+    assert low - 1e-9 <= inverter['dc_ac_ratio'] <= high + 1e-9
+
+
+def test_unknown_brand_or_empty_system():
+    assert get_suitable_inverter(10.0, "Unknown") is None
+    assert size_inverters(0, "Growatt") is None
@@ -0,0 +1,123 @@
+from collections import Counter
+
+import pytest
+
+from solar import sources, stages
+from solar.stages import StageGraph
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def counting_graph(maxsize=8, ttl=None):
+    """a(x) → b(a, y) → c(b, z)؛ تعداد فراخوانی هر مرحله شمرده می‌شود."""
+    graph = StageGraph(maxsize)
+    graph.clock = Clock()
+    calls = Counter()
+
+    @graph.stage("a", inputs=("x",), ttl=ttl)
+    def a(x):
+        calls["a"] += 1
+        return {'x': x}
+
+    @graph.stage("b", inputs=("y",), deps=("a",))
+    def b(y, a):
+        calls["b"] += 1
+        return (a['x'], y)
+
+    @graph.stage("c", inputs=("z",), deps=("b",))
+    def c(z, b):
+        calls["c"] += 1
+        return (*b, z)
+
+    return graph, calls
+
+
+def test_changing_one_input_recomputes_only_downstream():
+    graph, calls = counting_graph()
+    assert graph.get("c", x=1, y=2, z=3) == (1, 2, 3)
+    assert calls == {"a": 1, "b": 1, "c": 1}
+    graph.get("c", x=1, y=2, z=4)
+    assert calls == {"a": 1, "b": 1, "c": 2}
+    graph.get("c", x=1, y=5, z=4)
+    assert calls == {"a": 1, "b": 2, "c": 3}
+    graph.get("c", x=1, y=2, z=3)
+    assert calls == {"a": 1, "b": 2, "c": 3}
+    assert graph.stats["c"] == [1, 3]
+
+
+def test_resolve_shares_upstream_work():
+    graph, calls = counting_graph()
+    result = graph.resolve("a", "b", "c", x=1, y=2, z=3)
+    assert result == {"a": {'x': 1}, "b": (1, 2), "c": (1, 2, 3)}
+    assert calls == {"a": 1, "b": 1, "c": 1}
+
+
+def test_lru_evicts_least_recently_used():
+    graph, calls = counting_graph(maxsize=2)
+    graph.get("a", x=1)
+    graph.get("a", x=2)
+    graph.get("a", x=1)   # ۱ تازه‌ترین می‌شود
+    graph.get("a", x=3)   # ۲ بیرون می‌رود
+    assert calls["a"] == 3
+    graph.get("a", x=1)
+    assert calls["a"] == 3
+    graph.get("a", x=2)
+    assert calls["a"] == 4
+
+
+def test_ttl_expires_entry_and_everything_built_from_it():
+    graph, calls = counting_graph(ttl=lambda value: 60 if value['x'] < 0 else None)
+    graph.get("c", x=-1, y=2, z=3)
+    graph.clock.now += 59
+    graph.get("c", x=-1, y=2, z=3)
+    assert calls == {"a": 1, "b": 1, "c": 1}
+    graph.clock.now += 2
+    graph.get("c", x=-1, y=2, z=3)
+    assert calls == {"a": 2, "b": 2, "c": 2}
+    # خروجی بدون ttl منقضی نمی‌شود
+    graph.get("c", x=1, y=2, z=3)
+    graph.clock.now += 10 ** 6
+    graph.get("c", x=1, y=2, z=3)
+    assert calls == {"a": 3, "b": 3, "c": 3}
+
+
+@pytest.fixture
+def fallback_production(monkeypatch):
+    calls = Counter()
+
+    def pvgis(lat, lon, capacity_kw, tilt, aspect=0):
+        calls["pvgis"] += 1
+        return {'success': False}
+
+    def local(lat, lon, capacity_kw, tilt, aspect=0):
+        calls["local"] += 1
+        return {'success': True, 'yearly': 1600.0, 'monthly': {}, 'source': "محاسبه محلی (pvlib)"}
+
+    monkeypatch.setattr(sources, "get_pvgis_data", pvgis)
+    monkeypatch.setattr(sources, "calculate_local_production", local)
+    return calls
+
+
+def test_pvgis_fallback_is_marked(fallback_production):
+    assert sources.get_production(35.7, 51.4, 1.0, use_pvgis=True)['fallback']
+    assert 'fallback' not in sources.get_production(35.7, 51.4, 1.0, use_pvgis=False)
+
+
+def test_irradiance_fallback_is_retried_after_ttl(fallback_production, monkeypatch):
+    graph = stages.graph
+    monkeypatch.setattr(graph, "clock", Clock())
+    graph.clear()
+    params = dict(lat=35.7, lon=51.4, tilt=35, azimuth=0.0, use_pvgis=True)
+    graph.get("irradiance", **params)
+    graph.get("irradiance", **params)
+    assert fallback_production["pvgis"] == 1
+    graph.clock.now += stages.FALLBACK_TTL + 1
+    graph.get("irradiance", **params)
+    assert fallback_production["pvgis"] == 2
+    graph.clear()
@@ -0,0 +1,108 @@
+import io
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from solar.tmy import COLUMNS, HOURS, read_epw, read_pvgis_csv, read_pvgis_json
+
+GHI = COLUMNS.index("ghi")
+TEMP = COLUMNS.index("temp_air")
+
+
+def hours(year):
+    start = datetime(year, 1, 1)
+    count = 8784 if year % 4 == 0 else HOURS
+    return [start + timedelta(hours=h) for h in range(count)]
+
+
+def epw(utc_offset=0.0, year=2019, ghi=None):
+    """EPW کوچک: GHI هر ساعت برابر شماره ساعت سال و دما برابر روز ماه."""
+    times = hours(year)
+    ghi = ghi or list(range(len(times)))
+    lines = [f"LOCATION,Tehran,THR,IRN,ITMY,407540,35.68,51.32,{utc_offset},1191.0"]
+    lines += ["HEADER"] * 7
+    for t, g in zip(times, ghi):
+        fields = [str(t.year), str(t.month), str(t.day), str(t.hour + 1), "60", "?", str(t.day)] + ["0"] * 15
+        fields[13], fields[14], fields[15], fields[21] = str(g), "0", "0", "2.5"
+        lines.append(",".join(fields))
+    return lines
+
+
+def test_epw_without_offset_keeps_order():
+    record = read_epw(epw())
+    assert (record['lat'], record['lon'], record['source'], record['name']) == (35.68, 51.32, "EPW", "Tehran")
+    assert record['data'].shape == (len(COLUMNS), HOURS)
+    np.testing.assert_array_equal(record['data'][GHI], np.arange(HOURS))
+
+
+def test_epw_whole_hour_offset_wraps_first_rows_to_year_end():
+    data = read_epw(epw(utc_offset=3))['data'][GHI]
+    # ساعت UTC h همان ساعت محلی h + 3 است؛ سه ساعت اول محلی به انتهای سال UTC می‌روند
+    assert data[0] == 3
+    np.testing.assert_array_equal(data[-3:], [0, 1, 2])
+
+
+def test_epw_fractional_offset_splits_between_hours():
+    data = read_epw(epw(utc_offset=3.5))['data'][GHI]
+    assert data[0] == pytest.approx(3.5)
+    assert data[100] == pytest.approx(103.5)
+    # آخرین ساعت UTC نیمی از ساعت محلی ۲ و نیمی از ساعت ۳ سال است
+    assert data[-1] == pytest.approx(2.5)
+
+
+def test_epw_leap_day_is_dropped():
+    data = read_epw(epw(year=2020))['data']
+    assert data.shape[1] == HOURS
+    feb29 = 59 * 24
+    assert data[GHI, feb29 - 1] == feb29 - 1
+    assert data[GHI, feb29] == feb29 + 24
+    assert data[TEMP, feb29] == 1   # ۱ مارس
+
+
+def test_epw_missing_values_are_interpolated():
+    ghi = list(range(HOURS))
+    ghi[10] = 9999
+    assert read_epw(epw(ghi=ghi))['data'][GHI, 10] == 10
+
+
+def test_short_file_is_rejected():
+    with pytest.raises(ValueError):
+        read_epw(epw()[:-1])
+
+
+def pvgis_rows(year=2019):
+    for h, t in enumerate(hours(year)):
+        yield t.strftime("%Y%m%d:%H%M"), {"T2m": t.day, "G(h)": h, "Gb(n)": 0, "Gd(h)": 0, "WS10m": 2.5}
+
+
+def test_pvgis_csv_is_utc_and_skips_footer():
+    names = ["time(UTC)", "T2m", "RH", "G(h)", "Gb(n)", "Gd(h)", "IR(h)", "WS10m", "WD10m", "SP"]
+    lines = ["Latitude (decimal degrees): 29.610", "Longitude (decimal degrees): 52.530", "Elevation (m): 1500",
+             ",".join(names)]
+    for time, values in pvgis_rows(2020):
+        lines.append(",".join([time] + [str(values.get(n, 0)) for n in names[1:]]))
+    lines += ["T2m: 2-m air temperature (degree Celsius)", "G(h): Global irradiance on the horizontal plane"]
+    record = read_pvgis_csv(lines)
+    assert (record['lat'], record['lon'], record['source']) == (29.61, 52.53, "PVGIS TMY")
+    data = record['data']
+    assert data.shape == (len(COLUMNS), HOURS)
+    assert data[GHI, 0] == 0
+    assert data[GHI, 59 * 24] == 60 * 24   # ۲۹ فوریه حذف شده
+    assert data[TEMP, -1] == 31
+
+
+def test_pvgis_json():
+    payload = {
+        'inputs': {'location': {'latitude': 38.08, 'longitude': 46.29}},
+        'outputs': {'tmy_hourly': [{'time(UTC)': time, **values} for time, values in pvgis_rows()]},
+    }
+    record = read_pvgis_json(io.StringIO(json.dumps(payload)))
+    assert (record['lat'], record['lon']) == (38.08, 46.29)
+    np.testing.assert_array_equal(record['data'][GHI], np.arange(HOURS))
+
+
+def test_pvgis_csv_without_header_is_rejected():
+    with pytest.raises(ValueError):
+        read_pvgis_csv(["Latitude (decimal degrees): 29.6", "20190101:0000,1,2,3"])
@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pytest
+
+from solar import yield_grid
+from solar.months import MONTHS_ORDER
+from solar.yield_grid import YieldGrid, load_yield_grid, write_meta
+
+LAT0, LON0, STEP = 30.0, 50.0, 0.5
+TILTS = (10, 20)
+
+
+@pytest.fixture
+def grid_path(tmp_path):
+    """شبکه ۳×۳ که مقدارش تابعی خطی از اندیس‌هاست: 100·i + 10·j + k + ماه/100."""
+    i, j, k, m = np.meshgrid(np.arange(3), np.arange(3), np.arange(2), np.arange(12), indexing="ij")
+    path = str(tmp_path / "grid.npy")
+    np.save(path, (100 * i + 10 * j + k + m / 100).astype(np.float32))
+    write_meta(path, LAT0, LON0, STEP, TILTS)
+    load_yield_grid.cache_clear()
+    yield path
+    load_yield_grid.cache_clear()
+
+
+def expected(i, j, k):
+    return 100 * i + 10 * j + k + np.arange(12) / 100
+
+
+def test_corners_are_exact(grid_path):
+    grid = YieldGrid(grid_path)
+    for i in range(3):
+        for j in range(3):
+            for k, tilt in enumerate(TILTS):
+                np.testing.assert_allclose(grid.specific_monthly(LAT0 + i * STEP, LON0 + j * STEP, tilt),
+                                           expected(i, j, k), atol=1e-4)
+
+
+def test_bilinear_between_corners(grid_path):
+    grid = YieldGrid(grid_path)
+    monthly = grid.specific_monthly(LAT0 + 0.25 * STEP, LON0 + 1.5 * STEP, 15)
+    np.testing.assert_allclose(monthly, expected(0.25, 1.5, 0.5), atol=1e-4)
+    # زاویه بیرون از بازه شبکه به نزدیک‌ترین زاویه بریده می‌شود
+    np.testing.assert_allclose(grid.specific_monthly(LAT0, LON0, 45), expected(0, 0, 1), atol=1e-4)
+
+
+def test_outside_bounds_is_none(grid_path):
+    grid = YieldGrid(grid_path)
+    for lat, lon in ((LAT0 - 0.01, LON0), (LAT0, LON0 + 2 * STEP + 0.01), (LAT0 + 3 * STEP, LON0 + STEP)):
+        assert grid.specific_monthly(lat, lon, 15) is None
+        assert grid.calculate_production(lat, lon, 5.0, 15) == {'success': False}
+    result = grid.calculate_production(LAT0, LON0, 2.0, 10)
+    assert result['success'] and list(result['monthly']) == MONTHS_ORDER
+    assert result['yearly'] == pytest.approx(2 * expected(0, 0, 0).sum(), rel=1e-5)
+
+
+def test_grid_not_matching_meta_is_ignored(grid_path):
+    assert load_yield_grid(grid_path) is not None
+    np.save(grid_path, np.zeros((3, 3, 2, 12), dtype=np.float32))   # شبکه نو، meta قدیمی
+    load_yield_grid.cache_clear()
+    assert load_yield_grid(grid_path) is None
+    with pytest.raises(ValueError):
+        YieldGrid(grid_path)
+    write_meta(grid_path, LAT0, LON0, STEP, TILTS)
+    load_yield_grid.cache_clear()
+    assert load_yield_grid(grid_path) is not None
+
+
+def test_meta_is_replaced_atomically(grid_path, tmp_path):
+    with open(yield_grid._meta_path(grid_path), encoding="utf-8") as f:
+        meta = json.load(f)
+    assert meta['sha256'] and meta['tilts'] == list(TILTS)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["grid.json", "grid.npy"]